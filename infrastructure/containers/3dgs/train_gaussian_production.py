@@ -62,6 +62,8 @@ except ImportError as e:
     logger.error(f"❌ Failed to import SpaceportDataset: {e}")
     raise ImportError("SpaceportDataset not available") from e
 
+from utils.view_sampler import LossWeightedViewSampler
+
 class Trainer:
     def __init__(self, config_path: str):
         with open(config_path, 'r') as f:
@@ -167,19 +169,24 @@ class Trainer:
             'DENSIFY_UNTIL_ITER': 'gaussian_management.densification.end_iteration',
             'DENSIFY_GRAD_THRESHOLD': 'gaussian_management.densification.grad_threshold',
             'PERCENT_DENSE': 'gaussian_management.densification.percent_dense',
-            'OPACITY_RESET_INTERVAL': 'gaussian_management.opacity_reset_interval'
+            'OPACITY_RESET_INTERVAL': 'gaussian_management.opacity_reset_interval',
+            # Loss-weighted view sampling
+            'VIEW_SAMPLING_ENABLED': 'optimization.view_sampling.enabled',
+            'VIEW_SAMPLING_EXPONENT': 'optimization.view_sampling.exponent',
+            'VIEW_SAMPLING_UNIFORM_FLOOR': 'optimization.view_sampling.uniform_floor',
         }
         
         for env_var, config_path in env_params.items():
             value = os.environ.get(env_var)
             if value is not None:
                 # Convert string values to appropriate types
-                if env_var in ['PSNR_PLATEAU_TERMINATION']:
+                if env_var in ['PSNR_PLATEAU_TERMINATION', 'VIEW_SAMPLING_ENABLED']:
                     value = value.lower() in ('true', '1', 'yes', 'on')
                 elif env_var in ['MAX_ITERATIONS', 'MIN_ITERATIONS', 'PLATEAU_PATIENCE', 'LOG_INTERVAL', 'SAVE_INTERVAL', 
                                 'DENSIFICATION_INTERVAL', 'DENSIFY_FROM_ITER', 'DENSIFY_UNTIL_ITER', 'OPACITY_RESET_INTERVAL']:
                     value = int(value)
-                elif env_var in ['TARGET_PSNR', 'LEARNING_RATE', 'DENSIFY_GRAD_THRESHOLD', 'PERCENT_DENSE']:
+                elif env_var in ['TARGET_PSNR', 'LEARNING_RATE', 'DENSIFY_GRAD_THRESHOLD', 'PERCENT_DENSE',
+                                 'VIEW_SAMPLING_EXPONENT', 'VIEW_SAMPLING_UNIFORM_FLOOR']:
                     value = float(value)
                 
                 # Set nested config values
@@ -502,6 +509,19 @@ class Trainer:
         sh_max_bands = sh_config.get('max_bands', 3)
         sh_band_interval = sh_config.get('band_increase_interval', 5000)
         
+        # Loss-weighted view sampling: spend steps on views the model fits worst
+        view_config = self.config.get('optimization', {}).get('view_sampling', {})
+        view_sampler = None
+        view_report_interval = view_config.get('report_interval', 1000)
+        if view_config.get('enabled', True):
+            view_sampler = LossWeightedViewSampler(
+                train_indices,
+                exponent=view_config.get('exponent', 0.5),
+                uniform_floor=view_config.get('uniform_floor', 0.2),
+                ema_decay=view_config.get('ema_decay', 0.9),
+                seed=view_config.get('seed', 42),
+            )
+        
         logger.info(f"🔥 REAL gsplat Training Configuration:")
         logger.info(f"   Max Iterations: {max_iterations}")
         logger.info(f"   Training Images: {len(train_indices)}")
@@ -514,6 +534,11 @@ class Trainer:
         logger.info(f"   Start bands: {sh_start_bands}")
         logger.info(f"   Max bands: {sh_max_bands}")
         logger.info(f"   Band increase interval: {sh_band_interval}")
+        if view_sampler is not None:
+            logger.info(f"🎯 Loss-weighted view sampling: exponent {view_sampler.exponent}, "
+                        f"uniform floor {view_sampler.uniform_floor}, EMA decay {view_sampler.ema_decay}")
+        else:
+            logger.info(f"🎯 View sampling: uniform")
         
         # Initialize gradient accumulation
         self.initialize_gradient_accumulation(gaussians)
@@ -533,8 +558,11 @@ class Trainer:
             else:
                 current_sh_degree = 0  # Only DC coefficients
             
-            # Sample random training view
-            train_idx = np.random.choice(train_indices)
+            # Sample training view (loss-weighted when enabled)
+            if view_sampler is not None:
+                train_idx = view_sampler.sample()
+            else:
+                train_idx = np.random.choice(train_indices)
             image_id = list(scene_data['images'].keys())[train_idx]
             
             # Load ground truth image
@@ -643,6 +671,15 @@ class Trainer:
             loss_history.append(total_loss.item())
             psnr_history.append(current_psnr)
             
+            if view_sampler is not None:
+                view_sampler.update(train_idx, loss_history[-1])
+                if iteration % view_report_interval == 0 and iteration > 0:
+                    snapshot = view_sampler.snapshot(iteration)
+                    hardest = snapshot['top_views'][0]
+                    logger.info(f"🎯 View sampling at iter {iteration}: {snapshot['effective_views']:.1f}/{len(train_indices)} "
+                                f"effective views, p range {snapshot['min_probability']:.4f}-{snapshot['max_probability']:.4f}, "
+                                f"hardest view {hardest['view']} (loss {hardest['loss_estimate']:.4f})")
+            
             # Track best PSNR
             if current_psnr > best_psnr:
                 best_psnr = current_psnr
@@ -744,6 +781,9 @@ class Trainer:
             'loss_curve': loss_history[-100:] if len(loss_history) > 100 else loss_history,
             'psnr_curve': psnr_history[-100:] if len(psnr_history) > 100 else psnr_history,
             'validation_psnr_curve': val_psnr_history,
+            
+            # Training view sampling distribution over time
+            'view_sampling': view_sampler.summary() if view_sampler is not None else {'strategy': 'uniform'},
         }
         
         metadata_path = self.output_dir / "training_metadata.json"
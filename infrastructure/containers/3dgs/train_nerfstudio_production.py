@@ -318,7 +318,11 @@ class NerfStudioTrainer:
             return False
     
     def convert_colmap_text_to_binary(self, sparse_txt_dir: Path, sparse_bin_dir: Path) -> bool:
-        """Convert COLMAP text files (TXT) to binary (BIN) using COLMAP's model_converter."""
+        """Convert COLMAP text files (TXT) to binary (BIN) using COLMAP's model_converter.
+
+        When the input already ships cameras.bin / images.bin / points3D.bin (written by the
+        SfM converter), they are copied instead and no colmap subprocess is started.
+        """
         logger.info("🔄 Converting COLMAP TXT to BIN (required by ns-process-data)...")
         logger.info(f"   TXT input: {sparse_txt_dir}")
         logger.info(f"   BIN output: {sparse_bin_dir}")
@@ -332,6 +336,15 @@ class NerfStudioTrainer:
             logger.info("✅ Binary files already exist, skipping conversion")
             return True
 
+        # The SfM converter writes the binary model next to the text one; reuse it as-is
+        shipped_bins = [sparse_txt_dir / path.name for path in (cameras_bin, images_bin, points3D_bin)]
+        if all(path.exists() for path in shipped_bins):
+            for src in shipped_bins:
+                shutil.copy2(src, sparse_bin_dir / src.name)
+                logger.info(f"   ✅ {src.name}: {src.stat().st_size} bytes (from SfM output)")
+            logger.info("✅ Using binary COLMAP model from SfM output, skipping model_converter")
+            return True
+
         # Use COLMAP's model_converter (auto-detects text format, converts to binary)
         convert_cmd = [
             "colmap", "model_converter",
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+COLMAP Binary Model Writer
+Writes cameras.bin, images.bin and points3D.bin directly from arrays
+
+The layouts match COLMAP's src/colmap/scene/reconstruction_io.cc (all little-endian):
+
+    cameras.bin   uint64 count, then per camera:
+                  uint32 camera_id, int32 model_id, uint64 width, uint64 height, float64 params[]
+    images.bin    uint64 count, then per image:
+                  uint32 image_id, float64 qvec[4], float64 tvec[3], uint32 camera_id,
+                  name + NUL, uint64 num_points2D, (float64 x, float64 y, int64 point3D_id)[]
+    points3D.bin  uint64 count, then per point:
+                  uint64 point3D_id, float64 xyz[3], uint8 rgb[3], float64 error,
+                  uint64 track_length, (uint32 image_id, uint32 point2D_idx)[]
+
+Variable-length parts (2D points per image, track per point) are passed in CSR
+form: a flat array of elements plus an offsets array of length count + 1, so
+element range i is offsets[i]:offsets[i + 1]. Records are packed with NumPy
+structured dtypes instead of one struct.pack per value, and points are written
+in chunks so the packed buffer stays bounded for dense models.
+"""
+
+import struct
+from pathlib import Path
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+# COLMAP camera model ids (colmap/sensor/models.h)
+CAMERA_MODEL_IDS = {
+    'SIMPLE_PINHOLE': 0,
+    'PINHOLE': 1,
+    'SIMPLE_RADIAL': 2,
+    'RADIAL': 3,
+    'OPENCV': 4,
+    'OPENCV_FISHEYE': 5,
+    'FULL_OPENCV': 6,
+    'FOV': 7,
+    'SIMPLE_RADIAL_FISHEYE': 8,
+    'RADIAL_FISHEYE': 9,
+    'THIN_PRISM_FISHEYE': 10,
+}
+
+IMAGE_HEADER_DTYPE = np.dtype([('image_id', '<u4'), ('qvec', '<f8', 4), ('tvec', '<f8', 3), ('camera_id', '<u4')])
+POINT2D_DTYPE = np.dtype([('xy', '<f8', 2), ('point3d_id', '<i8')])
+POINT3D_HEADER_DTYPE = np.dtype([('point3d_id', '<u8'), ('xyz', '<f8', 3), ('rgb', 'u1', 3),
+                                 ('error', '<f8'), ('track_length', '<u8')])
+TRACK_ELEMENT_DTYPE = np.dtype([('image_id', '<u4'), ('point2d_idx', '<u4')])
+
+POINTS_CHUNK = 200_000  # Points packed per write
+
+# (camera_id, model name, width, height, params)
+CameraRecord = Tuple[int, str, int, int, Sequence[float]]
+
+
+def write_cameras_binary(path: Path, cameras: List[CameraRecord]) -> None:
+    """Write cameras.bin"""
+    with open(path, 'wb') as f:
+        f.write(struct.pack('<Q', len(cameras)))
+        for camera_id, model, width, height, params in cameras:
+            f.write(struct.pack('<iiQQ', camera_id, CAMERA_MODEL_IDS[model], width, height))
+            f.write(np.asarray(params, dtype='<f8').tobytes())
+
+
+def write_images_binary(path: Path, image_ids: np.ndarray, qvecs: np.ndarray, tvecs: np.ndarray,
+                        camera_ids: np.ndarray, names: Sequence[str], points2d_offsets: np.ndarray,
+                        points2d_xy: np.ndarray, points2d_point3d_ids: np.ndarray) -> None:
+    """
+    Write images.bin
+
+    Args:
+        image_ids, camera_ids: (N,) ids
+        qvecs: (N, 4) world-to-camera quaternions (w, x, y, z)
+        tvecs: (N, 3) world-to-camera translations
+        names: N image file names
+        points2d_offsets: (N + 1,) CSR offsets into the 2D point arrays
+        points2d_xy: (M, 2) pixel coordinates
+        points2d_point3d_ids: (M,) observed 3D point id (-1 for none)
+    """
+    headers = np.zeros(len(names), dtype=IMAGE_HEADER_DTYPE)
+    headers['image_id'] = image_ids
+    headers['qvec'] = qvecs
+    headers['tvec'] = tvecs
+    headers['camera_id'] = camera_ids
+
+    points2d = np.zeros(len(points2d_point3d_ids), dtype=POINT2D_DTYPE)
+    points2d['xy'] = np.asarray(points2d_xy, dtype=np.float64).reshape(-1, 2)
+    points2d['point3d_id'] = points2d_point3d_ids
+    offsets = np.asarray(points2d_offsets, dtype=np.int64)
+
+    with open(path, 'wb') as f:
+        f.write(struct.pack('<Q', len(names)))
+        for i, name in enumerate(names):
+            start, end = offsets[i], offsets[i + 1]
+            f.write(headers[i:i + 1].tobytes())
+            f.write(name.encode('utf-8') + b'\x00')
+            f.write(struct.pack('<Q', end - start))
+            f.write(points2d[start:end].tobytes())
+
+
+def write_points3d_binary(path: Path, point3d_ids: np.ndarray, xyz: np.ndarray, rgb: np.ndarray,
+                          errors: np.ndarray, track_offsets: np.ndarray, track_image_ids: np.ndarray,
+                          track_point2d_idx: np.ndarray, chunk_size: int = POINTS_CHUNK) -> None:
+    """
+    Write points3D.bin
+
+    Args:
+        point3d_ids: (P,) ids
+        xyz: (P, 3) coordinates
+        rgb: (P, 3) uint8 colors
+        errors: (P,) reprojection errors (or a scalar)
+        track_offsets: (P + 1,) CSR offsets into the track arrays
+        track_image_ids, track_point2d_idx: (T,) track elements
+    """
+    num_points = len(point3d_ids)
+    offsets = np.asarray(track_offsets, dtype=np.int64)
+    track = np.zeros(len(track_image_ids), dtype=TRACK_ELEMENT_DTYPE)
+    track['image_id'] = track_image_ids
+    track['point2d_idx'] = track_point2d_idx
+    errors = np.broadcast_to(np.asarray(errors, dtype=np.float64), (num_points,))
+
+    header_size = POINT3D_HEADER_DTYPE.itemsize
+    element_size = TRACK_ELEMENT_DTYPE.itemsize
+    header_columns = np.arange(header_size)
+    element_columns = np.arange(element_size)
+
+    with open(path, 'wb') as f:
+        f.write(struct.pack('<Q', num_points))
+        for start in range(0, num_points, chunk_size):
+            end = min(start + chunk_size, num_points)
+            headers = np.zeros(end - start, dtype=POINT3D_HEADER_DTYPE)
+            headers['point3d_id'] = point3d_ids[start:end]
+            headers['xyz'] = xyz[start:end]
+            headers['rgb'] = rgb[start:end]
+            headers['error'] = errors[start:end]
+            lengths = np.diff(offsets[start:end + 1])
+            headers['track_length'] = lengths
+
+            # Point p's header lands after p headers and all track elements before it;
+            # track element j (of point p) lands after p + 1 headers and j elements.
+            t0, t1 = offsets[start], offsets[end]
+            local_offsets = offsets[start:end] - t0
+            buffer = np.empty(header_size * (end - start) + element_size * (t1 - t0), dtype=np.uint8)
+            header_starts = header_size * np.arange(end - start) + element_size * local_offsets
+            buffer[header_starts[:, None] + header_columns] = headers.view(np.uint8).reshape(-1, header_size)
+            if t1 > t0:
+                owner = np.repeat(np.arange(end - start), lengths)
+                element_starts = header_size * (owner + 1) + element_size * np.arange(t1 - t0)
+                buffer[element_starts[:, None] + element_columns] = track[t0:t1].view(np.uint8).reshape(-1, element_size)
+            f.write(buffer.tobytes())
+
+
+def read_binary_model_summary(sparse_dir: Path) -> Dict[str, int]:
+    """
+    Counts of a binary model without loading it (for conversion validation)
+
+    Returns:
+        camera_count, image_count, point_count, total_correspondences
+    """
+    sparse_dir = Path(sparse_dir)
+    summary = {'camera_count': 0, 'image_count': 0, 'point_count': 0, 'total_correspondences': 0}
+    for key, name in (('camera_count', 'cameras.bin'), ('point_count', 'points3D.bin')):
+        path = sparse_dir / name
+        if path.exists():
+            with open(path, 'rb') as f:
+                summary[key] = struct.unpack('<Q', f.read(8))[0]
+
+    images_file = sparse_dir / 'images.bin'
+    if images_file.exists():
+        with open(images_file, 'rb') as f:
+            summary['image_count'] = struct.unpack('<Q', f.read(8))[0]
+            for _ in range(summary['image_count']):
+                f.seek(IMAGE_HEADER_DTYPE.itemsize, 1)
+                while f.read(1) not in (b'\x00', b''):
+                    pass
+                num_points2d = struct.unpack('<Q', f.read(8))[0]
+                summary['total_correspondences'] += num_points2d
+                f.seek(num_points2d * POINT2D_DTYPE.itemsize, 1)
+    return summary
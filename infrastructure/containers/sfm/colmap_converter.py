@@ -1,33 +1,51 @@
 #!/usr/bin/env python3
 """
 COLMAP Format Converter for OpenSfM Output
-Converts OpenSfM reconstruction to COLMAP text format for 3DGS compatibility
+Converts OpenSfM reconstruction to COLMAP text and/or binary format for 3DGS compatibility
+
+Environment:
+    SFM_COLMAP_FORMAT   'both' (default), 'text' or 'binary' model files in sparse/0
 """
 
 import os
 import json
 import numpy as np
 from pathlib import Path
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, Tuple, Optional
 import logging
-import shutil
-from collections import defaultdict
+
+from colmap_binary import (
+    read_binary_model_summary,
+    write_cameras_binary,
+    write_images_binary,
+    write_points3d_binary,
+)
+from image_staging import ImageStager
+from reconstruction_model import ReconstructionModel, TrackTable
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+COLMAP_OUTPUT_FORMATS = ('both', 'text', 'binary')
+
 
 class OpenSfMToCOLMAPConverter:
     """Convert OpenSfM reconstruction to COLMAP format with proper 2D-3D correspondences"""
     
-    def __init__(self, opensfm_path: Path, output_path: Path):
+    POINTS_TEXT_CHUNK = 50_000  # points3D.txt lines formatted per write
+    
+    def __init__(self, opensfm_path: Path, output_path: Path, stager: Optional[ImageStager] = None,
+                 model: Optional[ReconstructionModel] = None, output_format: Optional[str] = None):
         """
         Initialize converter
         
         Args:
             opensfm_path: Path to OpenSfM reconstruction directory
             output_path: Path to output dataset directory
+            stager: Image stager shared with the pipeline (hardlink/reflink before copy)
+            model: Already-parsed reconstruction.json (parsed here if not given)
+            output_format: 'both', 'text' or 'binary' (defaults to SFM_COLMAP_FORMAT, then 'both')
         """
         self.opensfm_path = Path(opensfm_path)
         self.output_path = Path(output_path)
@@ -36,42 +54,51 @@ class OpenSfMToCOLMAPConverter:
         self.images_dir = self.output_path / "images"
         self.sparse_dir = self.output_path / "sparse" / "0"
         
+        self.model = model
         self.reconstruction = None
-        self.tracks = None
+        self.track_table = None
         self.camera_id_mapping = {}
-        self.image_id_mapping = {}
-        self.point_id_mapping = {}
+        self.stager = stager or ImageStager()
+        
+        self.output_format = (output_format or os.environ.get('SFM_COLMAP_FORMAT', 'both')).lower()
+        if self.output_format not in COLMAP_OUTPUT_FORMATS:
+            logger.warning(f"⚠️ Unknown COLMAP output format '{self.output_format}', writing both")
+            self.output_format = 'both'
+        self.write_text = self.output_format in ('both', 'text')
+        self.write_binary = self.output_format in ('both', 'binary')
+        self.colmap_cameras = []
         
         logger.info(f"🔄 Initializing OpenSfM to COLMAP converter")
         logger.info(f"   Input: {opensfm_path}")
         logger.info(f"   Output: {output_path}")
         logger.info(f"   Images: {self.images_dir}")
         logger.info(f"   Sparse: {self.sparse_dir}")
+        logger.info(f"   Model format: {self.output_format}")
     
     def load_opensfm_data(self) -> bool:
         """Load OpenSfM reconstruction and track data"""
         reconstruction_file = self.opensfm_path / "reconstruction.json"
         
-        if not reconstruction_file.exists():
+        if self.model is None and not reconstruction_file.exists():
             logger.error(f"❌ OpenSfM reconstruction not found: {reconstruction_file}")
             return False
         
         try:
-            # Load reconstruction
-            with open(reconstruction_file, 'r') as f:
-                reconstructions = json.load(f)
+            # Load reconstruction (parsed once; the pipeline hands over its model)
+            if self.model is None:
+                self.model = ReconstructionModel.load(reconstruction_file)
             
-            if not reconstructions:
+            if not len(self.model):
                 logger.error("❌ No reconstructions found in OpenSfM output")
                 return False
             
             # Use the first (largest) reconstruction
-            self.reconstruction = reconstructions[0]
+            self.reconstruction = self.model.first
             
             logger.info(f"✅ Loaded OpenSfM reconstruction:")
-            logger.info(f"   Cameras: {len(self.reconstruction.get('cameras', {}))}")
-            logger.info(f"   Shots: {len(self.reconstruction.get('shots', {}))}")
-            logger.info(f"   Points: {len(self.reconstruction.get('points', {}))}")
+            logger.info(f"   Cameras: {len(self.reconstruction.cameras)}")
+            logger.info(f"   Shots: {self.reconstruction.num_shots}")
+            logger.info(f"   Points: {self.reconstruction.num_points}")
             
             # Load tracks for 2D-3D correspondence
             self._load_tracks()
@@ -83,53 +110,40 @@ class OpenSfMToCOLMAPConverter:
             return False
     
     def _load_tracks(self) -> None:
-        """Load OpenSfM tracks for 2D-3D correspondence"""
-        # Try multiple track file locations
+        """Load OpenSfM tracks into the indexed 2D-3D track table"""
+        # tracks.csv is what create_tracks writes; the JSON files are legacy exports
+        tracks_csv = self.opensfm_path / "tracks.csv"
+        if tracks_csv.exists():
+            try:
+                self.track_table = TrackTable.from_tracks_csv(tracks_csv, self.reconstruction)
+                logger.info(f"✅ Loaded tracks from: {tracks_csv}")
+            except (OSError, ValueError) as e:
+                logger.warning(f"⚠️ Failed to load tracks from {tracks_csv}: {e}")
+        
         track_files = [
             self.opensfm_path / "tracks.json",
             self.opensfm_path / "features.json"
         ]
         
-        tracks_loaded = False
-        
         for track_file in track_files:
-            if track_file.exists():
+            if self.track_table is None and track_file.exists():
                 try:
                     with open(track_file, 'r') as f:
-                        self.tracks = json.load(f)
+                        tracks = json.load(f)
+                    self.track_table = TrackTable.from_tracks(tracks, self.reconstruction)
                     logger.info(f"✅ Loaded tracks from: {track_file}")
-                    tracks_loaded = True
                     break
                 except Exception as e:
                     logger.warning(f"⚠️ Failed to load tracks from {track_file}: {e}")
         
         # If no tracks file, extract from reconstruction points
-        if not tracks_loaded:
+        if self.track_table is None:
             logger.info("🔄 Extracting tracks from reconstruction points...")
-            self._extract_tracks_from_points()
-    
-    def _extract_tracks_from_points(self) -> None:
-        """Extract tracks from OpenSfM point observations"""
-        self.tracks = {}
-        points_data = self.reconstruction.get('points', {})
-        
-        for point_id, point_data in points_data.items():
-            observations = point_data.get('observations', {})
-            if observations:
-                track = []
-                for shot_id, obs_data in observations.items():
-                    # obs_data typically contains [x, y] coordinates
-                    if isinstance(obs_data, list) and len(obs_data) >= 2:
-                        x, y = obs_data[0], obs_data[1]
-                        track.append({
-                            'shot_id': shot_id,
-                            'feature': [x, y]
-                        })
-                
-                if track:
-                    self.tracks[point_id] = track
+            self.track_table = TrackTable.from_reconstruction(self.reconstruction)
         
-        logger.info(f"✅ Extracted {len(self.tracks)} tracks from point observations")
+        tracked_points = int(np.count_nonzero(self.track_table.track_lengths))
+        logger.info(f"📍 Track table: {len(self.track_table)} observations of {tracked_points} points "
+                    f"in {int(np.count_nonzero(np.diff(self.track_table.shot_offsets)))} images")
     
     def create_dataset_structure(self) -> None:
         """Create the proper dataset directory structure"""
@@ -142,19 +156,19 @@ class OpenSfMToCOLMAPConverter:
         logger.info(f"   Sparse: {self.sparse_dir}")
     
     def copy_images(self) -> None:
-        """Copy all images to the images/ directory"""
+        """Stage all images into the images/ directory (hardlink/reflink, copy as fallback)"""
         source_images_dir = self.opensfm_path / "images"
         
         if not source_images_dir.exists():
             logger.warning(f"⚠️ Source images directory not found: {source_images_dir}")
             return
         
-        shots_data = self.reconstruction.get('shots', {})
+        shot_names = self.reconstruction.registered_shots
         copied_count = 0
         
-        logger.info(f"📸 Copying {len(shots_data)} images...")
+        logger.info(f"📸 Copying {len(shot_names)} images...")
         
-        for shot_name in shots_data.keys():
+        for shot_name in shot_names:
             # Try different extensions
             source_file = None
             for ext in ['.JPG', '.jpg', '.PNG', '.png', '.JPEG', '.jpeg']:
@@ -171,301 +185,287 @@ class OpenSfMToCOLMAPConverter:
             if source_file:
                 dest_file = self.images_dir / source_file.name
                 try:
-                    shutil.copy2(source_file, dest_file)
+                    self.stager.stage(source_file, dest_file)
                     copied_count += 1
                     if copied_count <= 3:
                         logger.info(f"   📄 Copied: {source_file.name}")
                     elif copied_count == 4:
-                        logger.info(f"   📄 ... and {len(shots_data) - 3} more images")
+                        logger.info(f"   📄 ... and {len(shot_names) - 3} more images")
                 except Exception as e:
                     logger.error(f"❌ Failed to copy {source_file.name}: {e}")
             else:
                 logger.warning(f"⚠️ Image not found: {shot_name}")
         
-        logger.info(f"✅ Copied {copied_count}/{len(shots_data)} images")
+        logger.info(f"✅ Copied {copied_count}/{len(shot_names)} images ({self.stager.summary()})")
     
     def convert_cameras(self) -> None:
-        """Convert OpenSfM cameras to COLMAP cameras.txt"""
-        cameras_file = self.sparse_dir / "cameras.txt"
-        cameras_data = self.reconstruction.get('cameras', {})
+        """Convert OpenSfM cameras to COLMAP cameras.txt / cameras.bin"""
+        cameras_data = self.reconstruction.cameras
         
         logger.info(f"🔄 Converting {len(cameras_data)} cameras to COLMAP format")
         
-        with open(cameras_file, 'w') as f:
-            f.write("# Camera list with one line of data per camera:\n")
-            f.write("#   CAMERA_ID, MODEL, WIDTH, HEIGHT, PARAMS[]\n")
-            f.write(f"# Number of cameras: {len(cameras_data)}\n")
+        self.colmap_cameras = []
+        camera_id = 1
+        for camera_key, camera_data in cameras_data.items():
+            # Store mapping for later use
+            self.camera_id_mapping[camera_key] = camera_id
             
-            camera_id = 1
-            for camera_key, camera_data in cameras_data.items():
-                # Store mapping for later use
-                self.camera_id_mapping[camera_key] = camera_id
-                
-                # Extract camera parameters
-                width = int(camera_data.get('width', 1920))
-                height = int(camera_data.get('height', 1080))
-                
-                # Convert OpenSfM camera model to COLMAP
-                projection_type = camera_data.get('projection_type', 'perspective')
-                
-                if projection_type == 'perspective':
-                    focal = camera_data.get('focal', 1.0)
-                    k1 = camera_data.get('k1', 0.0)
-                    k2 = camera_data.get('k2', 0.0)
-                    
-                    # Convert normalized focal to pixel focal length
-                    focal_pixels = focal * max(width, height)
-                    
-                    # COLMAP RADIAL model: f, cx, cy, k1, k2
-                    model = "RADIAL"
-                    cx = width / 2.0
-                    cy = height / 2.0
-                    params = [focal_pixels, cx, cy, k1, k2]
-                    
-                elif projection_type == 'fisheye':
-                    focal = camera_data.get('focal', 1.0)
-                    k1 = camera_data.get('k1', 0.0)
-                    k2 = camera_data.get('k2', 0.0)
-                    
-                    focal_pixels = focal * max(width, height)
-                    
-                    model = "OPENCV_FISHEYE"
-                    cx = width / 2.0
-                    cy = height / 2.0
-                    params = [focal_pixels, focal_pixels, cx, cy, k1, k2, 0.0, 0.0]
-                    
-                else:
-                    # Default to simple pinhole
-                    model = "SIMPLE_PINHOLE"
-                    focal_pixels = max(width, height) * 1.2
-                    cx = width / 2.0
-                    cy = height / 2.0
-                    params = [focal_pixels, cx, cy]
-                
-                # Write camera line
-                params_str = " ".join([f"{p:.6f}" for p in params])
-                f.write(f"{camera_id} {model} {width} {height} {params_str}\n")
-                
-                camera_id += 1
-        
-        logger.info(f"✅ Generated cameras.txt with {len(cameras_data)} cameras")
-    
-    def convert_images(self) -> None:
-        """Convert OpenSfM shots to COLMAP images.txt with 2D-3D correspondences"""
-        images_file = self.sparse_dir / "images.txt"
-        shots_data = self.reconstruction.get('shots', {})
-        
-        logger.info(f"🔄 Converting {len(shots_data)} images with 2D-3D correspondences")
-        
-        # Build correspondence data
-        image_correspondences = self._build_image_correspondences()
-        
-        with open(images_file, 'w') as f:
-            f.write("# Image list with two lines of data per image:\n")
-            f.write("#   IMAGE_ID, QW, QX, QY, QZ, TX, TY, TZ, CAMERA_ID, NAME\n")
-            f.write("#   POINTS2D[] as (X, Y, POINT3D_ID)\n")
+            # Extract camera parameters
+            width = int(camera_data.get('width', 1920))
+            height = int(camera_data.get('height', 1080))
             
-            # Calculate mean observations
-            total_observations = sum(len(obs) for obs in image_correspondences.values())
-            mean_obs = total_observations / len(shots_data) if shots_data else 0
-            f.write(f"# Number of images: {len(shots_data)}, mean observations per image: {mean_obs:.1f}\n")
+            # Convert OpenSfM camera model to COLMAP
+            projection_type = camera_data.get('projection_type', 'perspective')
             
-            image_id = 1
-            for shot_name, shot_data in shots_data.items():
-                # Store mapping
-                self.image_id_mapping[shot_name] = image_id
+            if projection_type == 'perspective':
+                focal = camera_data.get('focal', 1.0)
+                k1 = camera_data.get('k1', 0.0)
+                k2 = camera_data.get('k2', 0.0)
                 
-                # Extract camera pose
-                rotation = shot_data.get('rotation', [0.0, 0.0, 0.0])
-                translation = shot_data.get('translation', [0.0, 0.0, 0.0])
-                camera_key = shot_data.get('camera', list(self.reconstruction.get('cameras', {}).keys())[0])
-                camera_id = self.camera_id_mapping.get(camera_key, 1)
+                # Convert normalized focal to pixel focal length
+                focal_pixels = focal * max(width, height)
                 
-                # Convert OpenSfM rotation (axis-angle) to quaternion
-                quat = self._axis_angle_to_quaternion(rotation)
-                qw, qx, qy, qz = quat
+                # COLMAP RADIAL model: f, cx, cy, k1, k2
+                model = "RADIAL"
+                cx = width / 2.0
+                cy = height / 2.0
+                params = [focal_pixels, cx, cy, k1, k2]
                 
-                # OpenSfM uses camera-to-world, COLMAP uses world-to-camera
-                R = self._quaternion_to_rotation_matrix(quat)
-                t = np.array(translation)
+            elif projection_type == 'fisheye':
+                focal = camera_data.get('focal', 1.0)
+                k1 = camera_data.get('k1', 0.0)
+                k2 = camera_data.get('k2', 0.0)
                 
-                # Invert transformation
-                R_inv = R.T
-                t_inv = -R_inv @ t
+                focal_pixels = focal * max(width, height)
                 
-                # Convert back to quaternion
-                quat_inv = self._rotation_matrix_to_quaternion(R_inv)
-                qw, qx, qy, qz = quat_inv
-                tx, ty, tz = t_inv
+                model = "OPENCV_FISHEYE"
+                cx = width / 2.0
+                cy = height / 2.0
+                params = [focal_pixels, focal_pixels, cx, cy, k1, k2, 0.0, 0.0]
                 
-                # Write image line
-                f.write(f"{image_id} {qw:.9f} {qx:.9f} {qy:.9f} {qz:.9f} "
-                       f"{tx:.6f} {ty:.6f} {tz:.6f} {camera_id} {shot_name}\n")
+            else:
+                # Default to simple pinhole
+                model = "SIMPLE_PINHOLE"
+                focal_pixels = max(width, height) * 1.2
+                cx = width / 2.0
+                cy = height / 2.0
+                params = [focal_pixels, cx, cy]
+            
+            self.colmap_cameras.append((camera_id, model, width, height, params))
+            camera_id += 1
+        
+        if self.write_text:
+            with open(self.sparse_dir / "cameras.txt", 'w') as f:
+                f.write("# Camera list with one line of data per camera:\n")
+                f.write("#   CAMERA_ID, MODEL, WIDTH, HEIGHT, PARAMS[]\n")
+                f.write(f"# Number of cameras: {len(cameras_data)}\n")
+                for camera_id, model, width, height, params in self.colmap_cameras:
+                    params_str = " ".join([f"{p:.6f}" for p in params])
+                    f.write(f"{camera_id} {model} {width} {height} {params_str}\n")
+        
+        if self.write_binary:
+            write_cameras_binary(self.sparse_dir / "cameras.bin", self.colmap_cameras)
+        
+        logger.info(f"✅ Generated {self._model_files('cameras')} with {len(cameras_data)} cameras")
+    
+    def convert_images(self) -> None:
+        """Convert OpenSfM shots to COLMAP images.txt / images.bin with 2D-3D correspondences"""
+        recon = self.reconstruction
+        shot_names = recon.registered_shots
+        default_camera = next(iter(recon.cameras), None)
+        
+        logger.info(f"🔄 Converting {len(shot_names)} images with 2D-3D correspondences")
+        
+        # Image ids follow registered shot order, point ids follow reconstruction point order
+        table = self.track_table
+        image_ids = np.arange(1, len(shot_names) + 1)
+        point3d_ids = table.point_index.astype(np.int64) + 1
+        
+        # Resolve camera ids once per camera key, then convert all poses in one pass
+        camera_id_by_key = {key: self.camera_id_mapping.get(key or default_camera, 1)
+                            for key in set(recon.shot_cameras)}
+        camera_ids = np.array([camera_id_by_key[key] for key in recon.shot_cameras], dtype=np.int64)
+        qvecs, tvecs = self._shots_to_world_to_camera(recon.shot_rotations, recon.shot_translations)
+        points2d_xy = self._points2d_pixels(default_camera)
+        
+        # Calculate mean observations
+        total_observations = len(table)
+        mean_obs = total_observations / len(shot_names) if shot_names else 0
+        
+        if self.write_text:
+            with open(self.sparse_dir / "images.txt", 'w') as f:
+                f.write("# Image list with two lines of data per image:\n")
+                f.write("#   IMAGE_ID, QW, QX, QY, QZ, TX, TY, TZ, CAMERA_ID, NAME\n")
+                f.write("#   POINTS2D[] as (X, Y, POINT3D_ID)\n")
+                f.write(f"# Number of images: {len(shot_names)}, mean observations per image: {mean_obs:.1f}\n")
                 
-                # Write 2D-3D correspondences
-                correspondences = image_correspondences.get(shot_name, [])
-                if correspondences:
-                    points_str = " ".join([f"{x:.6f} {y:.6f} {point_id}" 
-                                         for x, y, point_id in correspondences])
+                xy = points2d_xy.tolist()
+                ids = point3d_ids.tolist()
+                bounds = table.shot_offsets.tolist()
+                for shot_idx, shot_name in enumerate(shot_names):
+                    qw, qx, qy, qz = qvecs[shot_idx]
+                    tx, ty, tz = tvecs[shot_idx]
+                    
+                    # Write image line
+                    f.write(f"{image_ids[shot_idx]} {qw:.9f} {qx:.9f} {qy:.9f} {qz:.9f} "
+                           f"{tx:.6f} {ty:.6f} {tz:.6f} {camera_ids[shot_idx]} {shot_name}\n")
+                    
+                    # Write 2D-3D correspondences (this image's contiguous run of the track table)
+                    rows = range(bounds[shot_idx], bounds[shot_idx + 1])
+                    points_str = " ".join([f"{xy[row][0]:.6f} {xy[row][1]:.6f} {ids[row]}" for row in rows])
                     f.write(f"{points_str}\n")
-                else:
-                    f.write("\n")
-                
-                image_id += 1
         
-        logger.info(f"✅ Generated images.txt with {len(shots_data)} images and {total_observations} total correspondences")
-    
-    def _build_image_correspondences(self) -> Dict[str, List[Tuple[float, float, int]]]:
-        """Build 2D-3D correspondence data for each image"""
-        correspondences = defaultdict(list)
-        
-        if not self.tracks:
-            logger.warning("⚠️ No tracks available for correspondence generation")
-            return correspondences
-        
-        point_id = 1
-        for track_key, track_data in self.tracks.items():
-            # Store point ID mapping
-            self.point_id_mapping[track_key] = point_id
-            
-            if isinstance(track_data, list):
-                # Track data is a list of observations
-                for obs in track_data:
-                    if isinstance(obs, dict):
-                        shot_id = obs.get('shot_id')
-                        feature = obs.get('feature', [])
-                        if shot_id and len(feature) >= 2:
-                            x, y = feature[0], feature[1]
-                            correspondences[shot_id].append((x, y, point_id))
-            
-            point_id += 1
+        if self.write_binary:
+            write_images_binary(self.sparse_dir / "images.bin", image_ids, qvecs, tvecs, camera_ids,
+                                shot_names, table.shot_offsets, points2d_xy, point3d_ids)
         
-        total_correspondences = sum(len(obs) for obs in correspondences.values())
-        logger.info(f"📍 Built correspondences for {len(correspondences)} images, {total_correspondences} total points")
+        logger.info(f"✅ Generated {self._model_files('images')} with {len(shot_names)} images "
+                    f"and {total_observations} total correspondences")
+    
+    def _points2d_pixels(self, default_camera: Optional[str]) -> np.ndarray:
+        """
+        Track table coordinates as COLMAP pixel coordinates
         
-        return correspondences
+        OpenSfM stores observations normalized by the larger image side and
+        centered on the image; COLMAP POINTS2D are pixels with the image's
+        top-left corner at (0, 0), so x_px = x * max(w, h) + w / 2.
+        """
+        recon = self.reconstruction
+        table = self.track_table
+        camera_sizes = {}
+        for key in set(recon.shot_cameras):
+            camera_data = recon.cameras.get(key or default_camera, {}) or {}
+            camera_sizes[key] = (int(camera_data.get('width', 1920)), int(camera_data.get('height', 1080)))
+        shot_sizes = np.array([camera_sizes[key] for key in recon.shot_cameras], dtype=np.float64).reshape(-1, 2)
+        
+        sizes = shot_sizes[table.shot_index]
+        return table.xy * sizes.max(axis=1)[:, None] + sizes / 2.0
     
     def convert_points(self) -> None:
-        """Convert OpenSfM points to COLMAP points3D.txt with track information"""
-        points_file = self.sparse_dir / "points3D.txt"
-        points_data = self.reconstruction.get('points', {})
-        
-        logger.info(f"🔄 Converting {len(points_data)} points with track information")
-        
-        with open(points_file, 'w') as f:
-            f.write("# 3D point list with one line of data per point:\n")
-            f.write("#   POINT3D_ID, X, Y, Z, R, G, B, ERROR, TRACK[] as (IMAGE_ID, POINT2D_IDX)\n")
-            
-            # Calculate mean track length
-            total_track_length = 0
-            valid_points = 0
-            
-            for point_key in points_data.keys():
-                if point_key in self.tracks:
-                    total_track_length += len(self.tracks[point_key])
-                    valid_points += 1
-            
-            mean_track_length = total_track_length / valid_points if valid_points > 0 else 0
-            f.write(f"# Number of points: {len(points_data)}, mean track length: {mean_track_length:.1f}\n")
-            
-            for point_key, point_data in points_data.items():
-                point_id = self.point_id_mapping.get(point_key, 1)
-                
-                # Extract 3D coordinates
-                coordinates = point_data.get('coordinates', [0.0, 0.0, 0.0])
-                x, y, z = coordinates
-                
-                # Extract color
-                color = point_data.get('color', [255, 255, 255])
-                r, g, b = [int(c) for c in color]
-                
-                # Error estimate
-                error = 0.5
-                
-                # Build track information
-                track_str = ""
-                if point_key in self.tracks:
-                    track_entries = []
-                    point2d_idx = 0  # Simple indexing for 2D points
-                    
-                    for obs in self.tracks[point_key]:
-                        if isinstance(obs, dict):
-                            shot_id = obs.get('shot_id')
-                            if shot_id and shot_id in self.image_id_mapping:
-                                image_id = self.image_id_mapping[shot_id]
-                                track_entries.append(f"{image_id} {point2d_idx}")
-                                point2d_idx += 1
-                    
-                    track_str = " ".join(track_entries)
+        """Convert OpenSfM points to COLMAP points3D.txt / points3D.bin with track information"""
+        recon = self.reconstruction
+        
+        logger.info(f"🔄 Converting {recon.num_points} points with track information")
+        
+        # Tracks reference images by id and 2D points by their index in that image's run
+        table = self.track_table
+        point3d_ids = np.arange(1, recon.num_points + 1)
+        track_shots, track_point2d_idx = table.point_tracks()
+        track_image_ids = track_shots.astype(np.int64) + 1
+        track_offsets = table.point_offsets
+        error = 0.5  # Error estimate
+        
+        if self.write_text:
+            track_lengths = table.track_lengths
+            valid_points = int(np.count_nonzero(track_lengths))
+            mean_track_length = len(table) / valid_points if valid_points > 0 else 0
+            with open(self.sparse_dir / "points3D.txt", 'w') as f:
+                f.write("# 3D point list with one line of data per point:\n")
+                f.write("#   POINT3D_ID, X, Y, Z, R, G, B, ERROR, TRACK[] as (IMAGE_ID, POINT2D_IDX)\n")
+                f.write(f"# Number of points: {recon.num_points}, mean track length: {mean_track_length:.1f}\n")
                 
-                # Write point line
-                f.write(f"{point_id} {x:.6f} {y:.6f} {z:.6f} {r} {g} {b} {error:.6f} {track_str}\n")
-        
-        logger.info(f"✅ Generated points3D.txt with {len(points_data)} points")
+                # Format and write in chunks rather than one write per point
+                ids = point3d_ids.tolist()
+                coordinates = recon.point_coordinates.tolist()
+                colors = recon.point_colors.tolist()
+                image_ids = track_image_ids.tolist()
+                point2d_idx = track_point2d_idx.tolist()
+                bounds = track_offsets.tolist()
+                for chunk_start in range(0, recon.num_points, self.POINTS_TEXT_CHUNK):
+                    lines = []
+                    for point_idx in range(chunk_start, min(chunk_start + self.POINTS_TEXT_CHUNK, recon.num_points)):
+                        x, y, z = coordinates[point_idx]
+                        r, g, b = colors[point_idx]
+                        track_str = " ".join([f"{image_ids[k]} {point2d_idx[k]}"
+                                              for k in range(bounds[point_idx], bounds[point_idx + 1])])
+                        lines.append(f"{ids[point_idx]} {x:.6f} {y:.6f} {z:.6f} {r} {g} {b} {error:.6f} {track_str}\n")
+                    f.writelines(lines)
+        
+        if self.write_binary:
+            write_points3d_binary(self.sparse_dir / "points3D.bin", point3d_ids, recon.point_coordinates,
+                                  recon.point_colors, error, track_offsets, track_image_ids, track_point2d_idx)
+        
+        logger.info(f"✅ Generated {self._model_files('points3D')} with {recon.num_points} points")
     
-    def _axis_angle_to_quaternion(self, axis_angle: List[float]) -> np.ndarray:
-        """Convert axis-angle rotation to quaternion"""
-        axis_angle = np.array(axis_angle)
-        angle = np.linalg.norm(axis_angle)
-        
-        if angle < 1e-8:
-            return np.array([1.0, 0.0, 0.0, 0.0])
-        
-        axis = axis_angle / angle
-        half_angle = angle / 2.0
-        
-        w = np.cos(half_angle)
-        xyz = np.sin(half_angle) * axis
-        
-        return np.array([w, xyz[0], xyz[1], xyz[2]])
+    def _model_files(self, stem: str) -> str:
+        """Names of the model files written for `stem`, for logs"""
+        return " + ".join(f"{stem}.{ext}" for ext, enabled in (('txt', self.write_text), ('bin', self.write_binary))
+                          if enabled)
     
-    def _quaternion_to_rotation_matrix(self, quat: np.ndarray) -> np.ndarray:
-        """Convert quaternion to rotation matrix"""
-        qw, qx, qy, qz = quat
+    def _shots_to_world_to_camera(self, rotations: np.ndarray, translations: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Convert every shot's pose at once: axis-angle → quaternion → matrix →
+        invert → quaternion, applied to stacked arrays.
         
-        # Normalize quaternion
-        norm = np.sqrt(qw*qw + qx*qx + qy*qy + qz*qz)
-        qw, qx, qy, qz = qw/norm, qx/norm, qy/norm, qz/norm
+        Args:
+            rotations: (N, 3) OpenSfM axis-angle rotations
+            translations: (N, 3) OpenSfM translations
+            
+        Returns:
+            (N, 4) COLMAP quaternions (qw, qx, qy, qz) and (N, 3) translations
+        """
+        R = self._quaternions_to_rotation_matrices(self._axis_angles_to_quaternions(rotations))
         
-        # Convert to rotation matrix
-        R = np.array([
-            [1 - 2*(qy*qy + qz*qz), 2*(qx*qy - qw*qz), 2*(qx*qz + qw*qy)],
-            [2*(qx*qy + qw*qz), 1 - 2*(qx*qx + qz*qz), 2*(qy*qz - qw*qx)],
-            [2*(qx*qz - qw*qy), 2*(qy*qz + qw*qx), 1 - 2*(qx*qx + qy*qy)]
-        ])
+        # Invert transformation
+        R_inv = np.swapaxes(R, 1, 2)
+        t_inv = -np.einsum('nij,nj->ni', R_inv, np.asarray(translations, dtype=np.float64).reshape(-1, 3))
         
+        return self._rotation_matrices_to_quaternions(R_inv), t_inv
+    
+    def _axis_angles_to_quaternions(self, axis_angles: np.ndarray) -> np.ndarray:
+        """Convert (N, 3) axis-angle rotations to (N, 4) quaternions"""
+        axis_angles = np.asarray(axis_angles, dtype=np.float64).reshape(-1, 3)
+        angles = np.linalg.norm(axis_angles, axis=1)
+        
+        quats = np.zeros((len(axis_angles), 4))
+        quats[:, 0] = 1.0
+        rotating = angles >= 1e-8
+        axes = axis_angles[rotating] / angles[rotating, None]
+        half_angles = angles[rotating] / 2.0
+        quats[rotating, 0] = np.cos(half_angles)
+        quats[rotating, 1:] = np.sin(half_angles)[:, None] * axes
+        return quats
+    
+    def _quaternions_to_rotation_matrices(self, quats: np.ndarray) -> np.ndarray:
+        """Convert (N, 4) quaternions to (N, 3, 3) rotation matrices"""
+        quats = quats / np.sqrt((quats * quats).sum(axis=1))[:, None]
+        qw, qx, qy, qz = quats.T
+        
+        R = np.empty((len(quats), 3, 3))
+        R[:, 0, 0] = 1 - 2*(qy*qy + qz*qz)
+        R[:, 0, 1] = 2*(qx*qy - qw*qz)
+        R[:, 0, 2] = 2*(qx*qz + qw*qy)
+        R[:, 1, 0] = 2*(qx*qy + qw*qz)
+        R[:, 1, 1] = 1 - 2*(qx*qx + qz*qz)
+        R[:, 1, 2] = 2*(qy*qz - qw*qx)
+        R[:, 2, 0] = 2*(qx*qz - qw*qy)
+        R[:, 2, 1] = 2*(qy*qz + qw*qx)
+        R[:, 2, 2] = 1 - 2*(qx*qx + qy*qy)
         return R
     
-    def _rotation_matrix_to_quaternion(self, R: np.ndarray) -> np.ndarray:
-        """Convert rotation matrix to quaternion"""
-        trace = np.trace(R)
-        
-        if trace > 0:
-            s = np.sqrt(trace + 1.0) * 2
-            qw = 0.25 * s
-            qx = (R[2, 1] - R[1, 2]) / s
-            qy = (R[0, 2] - R[2, 0]) / s
-            qz = (R[1, 0] - R[0, 1]) / s
-        elif R[0, 0] > R[1, 1] and R[0, 0] > R[2, 2]:
-            s = np.sqrt(1.0 + R[0, 0] - R[1, 1] - R[2, 2]) * 2
-            qw = (R[2, 1] - R[1, 2]) / s
-            qx = 0.25 * s
-            qy = (R[0, 1] + R[1, 0]) / s
-            qz = (R[0, 2] + R[2, 0]) / s
-        elif R[1, 1] > R[2, 2]:
-            s = np.sqrt(1.0 + R[1, 1] - R[0, 0] - R[2, 2]) * 2
-            qw = (R[0, 2] - R[2, 0]) / s
-            qx = (R[0, 1] + R[1, 0]) / s
-            qy = 0.25 * s
-            qz = (R[1, 2] + R[2, 1]) / s
-        else:
-            s = np.sqrt(1.0 + R[2, 2] - R[0, 0] - R[1, 1]) * 2
-            qw = (R[1, 0] - R[0, 1]) / s
-            qx = (R[0, 2] + R[2, 0]) / s
-            qy = (R[1, 2] + R[2, 1]) / s
-            qz = 0.25 * s
-        
-        return np.array([qw, qx, qy, qz])
+    def _rotation_matrices_to_quaternions(self, R: np.ndarray) -> np.ndarray:
+        """Convert (N, 3, 3) rotation matrices to (N, 4) quaternions"""
+        r00, r01, r02 = R[:, 0, 0], R[:, 0, 1], R[:, 0, 2]
+        r10, r11, r12 = R[:, 1, 0], R[:, 1, 1], R[:, 1, 2]
+        r20, r21, r22 = R[:, 2, 0], R[:, 2, 1], R[:, 2, 2]
+        trace = r00 + r11 + r22
+        
+        # Branch on the trace, then on the largest diagonal entry; each shot only evaluates its own branch
+        quats = np.empty((len(R), 4))
+        m0 = trace > 0
+        m1 = ~m0 & (r00 > r11) & (r00 > r22)
+        m2 = ~m0 & ~m1 & (r11 > r22)
+        m3 = ~m0 & ~m1 & ~m2
+        
+        s = np.sqrt(trace[m0] + 1.0) * 2
+        quats[m0] = np.stack([0.25 * s, (r21[m0] - r12[m0]) / s, (r02[m0] - r20[m0]) / s, (r10[m0] - r01[m0]) / s], axis=1)
+        s = np.sqrt(1.0 + r00[m1] - r11[m1] - r22[m1]) * 2
+        quats[m1] = np.stack([(r21[m1] - r12[m1]) / s, 0.25 * s, (r01[m1] + r10[m1]) / s, (r02[m1] + r20[m1]) / s], axis=1)
+        s = np.sqrt(1.0 + r11[m2] - r00[m2] - r22[m2]) * 2
+        quats[m2] = np.stack([(r02[m2] - r20[m2]) / s, (r01[m2] + r10[m2]) / s, 0.25 * s, (r12[m2] + r21[m2]) / s], axis=1)
+        s = np.sqrt(1.0 + r22[m3] - r00[m3] - r11[m3]) * 2
+        quats[m3] = np.stack([(r10[m3] - r01[m3]) / s, (r02[m3] + r20[m3]) / s, (r12[m3] + r21[m3]) / s, 0.25 * s], axis=1)
+        return quats
     
     def validate_conversion(self) -> Dict:
         """Validate the COLMAP conversion"""
@@ -497,13 +497,23 @@ class OpenSfMToCOLMAPConverter:
             validation_results['images_file_exists'] = images_file.exists()
             validation_results['points_file_exists'] = points_file.exists()
             
+            # Binary-only output: count from the .bin headers instead
+            if not self.write_text:
+                validation_results['cameras_file_exists'] = (self.sparse_dir / "cameras.bin").exists()
+                validation_results['images_file_exists'] = (self.sparse_dir / "images.bin").exists()
+                validation_results['points_file_exists'] = (self.sparse_dir / "points3D.bin").exists()
+                validation_results.update(read_binary_model_summary(self.sparse_dir))
+                if validation_results['image_count'] > 0:
+                    validation_results['mean_correspondences_per_image'] = (
+                        validation_results['total_correspondences'] / validation_results['image_count'])
+            
             # Count cameras
-            if cameras_file.exists():
+            if self.write_text and cameras_file.exists():
                 with open(cameras_file, 'r') as f:
                     validation_results['camera_count'] = sum(1 for line in f if line.strip() and not line.startswith('#'))
             
             # Count images and correspondences
-            if images_file.exists():
+            if self.write_text and images_file.exists():
                 with open(images_file, 'r') as f:
                     lines = [line.strip() for line in f if line.strip() and not line.startswith('#')]
                     validation_results['image_count'] = len(lines) // 2
@@ -521,7 +531,7 @@ class OpenSfMToCOLMAPConverter:
                         validation_results['mean_correspondences_per_image'] = total_correspondences / validation_results['image_count']
             
             # Count points
-            if points_file.exists():
+            if self.write_text and points_file.exists():
                 with open(points_file, 'r') as f:
                     validation_results['point_count'] = sum(1 for line in f if line.strip() and not line.startswith('#'))
             
@@ -5,15 +5,19 @@ Maps photos to 3D positions along flight path using speed and timing constraints
 """
 
 import os
+import re
 import csv
 import json
 import math
+import struct
 import numpy as np
 import pandas as pd
 from pathlib import Path
 from typing import Dict, List, Tuple, Optional, Union
 from datetime import datetime, timedelta
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from bisect import bisect_left
+from concurrent.futures import ThreadPoolExecutor
 import utm
 import pyproj
 from geopy.distance import geodesic
@@ -43,22 +47,413 @@ class FlightSegment:
     altitude_change: float  # meters
     curvature_radius: Optional[float] = None  # meters, if specified
     
+    # Spline through start/control/end points, built on first use
+    _spline: Optional[CubicSpline] = field(default=None, init=False, repr=False, compare=False)
+    
+    def _curve(self) -> CubicSpline:
+        if self._spline is None:
+            all_points = np.array([self.start_point] + self.control_points + [self.end_point], dtype=float)
+            self._spline = CubicSpline(np.linspace(0, 1, len(all_points)), all_points, axis=0)
+        return self._spline
+    
     def interpolate_point(self, t: float) -> np.ndarray:
         """Get point along segment (t=0 is start, t=1 is end)"""
         if self.control_points:
             # Use spline interpolation for curved path
-            all_points = [self.start_point] + self.control_points + [self.end_point]
-            t_values = np.linspace(0, 1, len(all_points))
-            
-            # Create spline for each dimension
-            x_spline = CubicSpline(t_values, [p[0] for p in all_points])
-            y_spline = CubicSpline(t_values, [p[1] for p in all_points])
-            z_spline = CubicSpline(t_values, [p[2] for p in all_points])
-            
-            return np.array([x_spline(t), y_spline(t), z_spline(t)])
+            return self._curve()(t)
         else:
             # Linear interpolation for straight segments
             return self.start_point + t * (self.end_point - self.start_point)
+    
+    def interpolate_points(self, t_values: np.ndarray) -> np.ndarray:
+        """Vectorized interpolate_point: (N,) parameters -> (N, 3) points"""
+        t_values = np.asarray(t_values, dtype=float)
+        if self.control_points:
+            return self._curve()(t_values)
+        return self.start_point + t_values[:, None] * (self.end_point - self.start_point)
+
+
+class TrajectoryIndex:
+    """
+    Dense polyline index over the 3D flight path for batched nearest-point queries.
+
+    Every segment is sampled once (straight segments by their endpoints, curved
+    ones every TRAJECTORY_SAMPLE_SPACING_M along the spline) into polyline edges
+    that remember their segment and spline parameter. Queries project all XY
+    points onto all edges in one vectorized pass, chunked to bound memory.
+    """
+
+    TRAJECTORY_SAMPLE_SPACING_M = 1.0
+    MAX_SAMPLES_PER_SEGMENT = 512
+    QUERY_CHUNK_ELEMENTS = 2_000_000  # queries x edges per vectorized block
+
+    def __init__(self, segments: List[FlightSegment], path_distances: List[float]):
+        starts, ends, edge_segments, t_starts, t_ends = [], [], [], [], []
+        self.segment_t: List[np.ndarray] = []
+        self.segment_points: List[np.ndarray] = []
+        for seg_idx, segment in enumerate(segments):
+            if segment.control_points:
+                n = int(np.clip(np.ceil(segment.distance / self.TRAJECTORY_SAMPLE_SPACING_M) + 1,
+                                8, self.MAX_SAMPLES_PER_SEGMENT))
+            else:
+                n = 2
+            t = np.linspace(0.0, 1.0, n)
+            points = segment.interpolate_points(t)
+            self.segment_t.append(t)
+            self.segment_points.append(points)
+            starts.append(points[:-1])
+            ends.append(points[1:])
+            edge_segments.append(np.full(n - 1, seg_idx))
+            t_starts.append(t[:-1])
+            t_ends.append(t[1:])
+
+        self.segments = segments
+        self.path_distances = np.asarray(path_distances, dtype=float)
+        self.segment_lengths = np.array([s.distance for s in segments], dtype=float)
+        if starts:
+            self.edge_start = np.concatenate(starts)
+            self.edge_end = np.concatenate(ends)
+            self.edge_segment = np.concatenate(edge_segments)
+            self.edge_t0 = np.concatenate(t_starts)
+            self.edge_t1 = np.concatenate(t_ends)
+        else:
+            self.edge_start = self.edge_end = np.zeros((0, 3))
+            self.edge_segment = np.zeros(0, dtype=int)
+            self.edge_t0 = self.edge_t1 = np.zeros(0)
+        self.edge_vec = self.edge_end[:, :2] - self.edge_start[:, :2]
+        self.edge_len_sq = np.einsum('ij,ij->i', self.edge_vec, self.edge_vec)
+
+    def __len__(self) -> int:
+        return len(self.edge_start)
+
+    def query(self, xy: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Closest trajectory point (in XY) for each row of `xy`.
+
+        Returns arrays: segment_index, parameter_t, distance_m, local_position (K, 3).
+        Ties go to the earliest edge along the path.
+        """
+        xy = np.atleast_2d(np.asarray(xy, dtype=float))
+        k = len(xy)
+        n_edges = len(self)
+        if n_edges == 0:
+            return {
+                'segment_index': np.full(k, -1),
+                'parameter_t': np.zeros(k),
+                'distance_m': np.full(k, np.inf),
+                'local_position': np.zeros((k, 3)),
+            }
+
+        best_edge = np.empty(k, dtype=int)
+        best_u = np.empty(k)
+        best_dist = np.empty(k)
+        chunk = max(1, self.QUERY_CHUNK_ELEMENTS // n_edges)
+        safe_len_sq = np.where(self.edge_len_sq > 0, self.edge_len_sq, 1.0)
+        for lo in range(0, k, chunk):
+            q = xy[lo:lo + chunk]
+            rel = q[:, None, :] - self.edge_start[None, :, :2]
+            u = np.einsum('qej,ej->qe', rel, self.edge_vec) / safe_len_sq
+            u = np.clip(np.where(self.edge_len_sq > 0, u, 0.0), 0.0, 1.0)
+            diff = rel - u[:, :, None] * self.edge_vec[None, :, :]
+            dist_sq = np.einsum('qej,qej->qe', diff, diff)
+            edge = np.argmin(dist_sq, axis=1)
+            rows = np.arange(len(q))
+            best_edge[lo:lo + chunk] = edge
+            best_u[lo:lo + chunk] = u[rows, edge]
+            best_dist[lo:lo + chunk] = np.sqrt(dist_sq[rows, edge])
+
+        start = self.edge_start[best_edge]
+        position = start + best_u[:, None] * (self.edge_end[best_edge] - start)
+        t0 = self.edge_t0[best_edge]
+        return {
+            'segment_index': self.edge_segment[best_edge],
+            'parameter_t': t0 + best_u * (self.edge_t1[best_edge] - t0),
+            'distance_m': best_dist,
+            'local_position': position,
+        }
+
+    def point_at(self, seg_idx: int, t: float) -> np.ndarray:
+        """Point at spline parameter t of a segment, read off the sampled polyline"""
+        t_samples = self.segment_t[seg_idx]
+        points = self.segment_points[seg_idx]
+        return np.array([np.interp(t, t_samples, points[:, dim]) for dim in range(3)])
+
+    def path_distance(self, seg_idx: np.ndarray, t: np.ndarray) -> np.ndarray:
+        """Cumulative path distance at (segment, t) pairs, matching path_distances + t * segment length"""
+        seg_idx = np.asarray(seg_idx)
+        if len(self.segments) == 0:
+            return np.zeros(seg_idx.shape)
+        valid = (seg_idx >= 0) & (seg_idx < len(self.segments))
+        safe = np.where(valid, seg_idx, 0)
+        distance = self.path_distances[safe] + np.asarray(t) * self.segment_lengths[safe]
+        return np.where(valid, distance, 0.0)
+
+
+# =============================
+# SINGLE-READ EXIF SCANNER
+# =============================
+# Every photo is read once: only the JPEG APPn headers up to the first APP1
+# Exif and XMP packets are pulled off disk (~64 KB on DJI images), and GPS,
+# DJI XMP altitudes and timestamps are decoded from that one read. Results are
+# memoized by (path, mtime) so ordering, GPS extraction and trajectory
+# projection all share the same scan.
+
+EXIF_SCAN_WORKERS = int(os.environ.get('SFM_EXIF_SCAN_WORKERS', '16'))
+
+_JPEG_SOI = b'\xff\xd8'
+_JPEG_SOS = 0xDA
+_JPEG_EOI = 0xD9
+_JPEG_APP1 = 0xE1
+_EXIF_HEADER = b'Exif\x00\x00'
+_XMP_HEADER = b'http://ns.adobe.com/xap/1.0/\x00'
+
+# TIFF tags used by the scanner (IFD0 / Exif IFD / GPS IFD)
+_TAG_DATETIME = 0x0132
+_TAG_EXIF_IFD = 0x8769
+_TAG_GPS_IFD = 0x8825
+_TAG_DATETIME_ORIGINAL = 0x9003
+_TAG_DATETIME_DIGITIZED = 0x9004
+_GPS_LATITUDE_REF, _GPS_LATITUDE = 1, 2
+_GPS_LONGITUDE_REF, _GPS_LONGITUDE = 3, 4
+_GPS_ALTITUDE_REF, _GPS_ALTITUDE = 5, 6
+
+# TIFF field type -> (struct code, size in bytes)
+_TIFF_TYPES = {
+    1: ('B', 1), 2: ('s', 1), 3: ('H', 2), 4: ('L', 4), 5: ('LL', 8),
+    7: ('B', 1), 9: ('l', 4), 10: ('ll', 8),
+}
+
+_DJI_XMP_ALTITUDE_RE = re.compile(
+    rb'drone-dji:(AbsoluteAltitude|RelativeAltitude)\s*(?:=\s*"([^"]*)"|>([^<]*)<)'
+)
+
+_EXIF_TIMESTAMP_FORMAT = '%Y:%m:%d %H:%M:%S'
+
+_exif_scan_cache: Dict[Tuple[str, int], 'PhotoExif'] = {}
+
+
+@dataclass(frozen=True)
+class PhotoExif:
+    """Everything the processor needs from one photo's metadata"""
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    gps_altitude: Optional[float] = None  # meters, EXIF GPSAltitude (signed by GPSAltitudeRef)
+    absolute_altitude: Optional[float] = None  # meters, DJI XMP AbsoluteAltitude
+    relative_altitude: Optional[float] = None  # meters above takeoff, DJI XMP RelativeAltitude
+    timestamp: Optional[datetime] = None
+
+    @property
+    def has_gps(self) -> bool:
+        return self.latitude is not None and self.longitude is not None
+
+
+def _ratio_to_float(value) -> float:
+    """Convert exifread Ratio, (num, den) tuple or number to float."""
+    try:
+        # exifread Ratio has .num and .den
+        return float(value.num) / float(value.den)
+    except AttributeError:
+        # Sometimes it's a tuple (num, den)
+        if isinstance(value, (list, tuple)) and len(value) == 2:
+            return float(value[0]) / float(value[1])
+        # Already numeric
+        return float(value)
+
+
+def _dms_to_decimal(dms, ref: str) -> float:
+    """Convert EXIF DMS components and ref to signed decimal degrees."""
+    degrees = _ratio_to_float(dms[0])
+    minutes = _ratio_to_float(dms[1])
+    seconds = _ratio_to_float(dms[2])
+    decimal = degrees + minutes / 60.0 + seconds / 3600.0
+    if ref in ['S', 'W']:
+        decimal = -decimal
+    return decimal
+
+
+def _parse_exif_timestamp(*candidates) -> Optional[datetime]:
+    """First candidate string that parses as an EXIF timestamp, in priority order."""
+    for value in candidates:
+        if not value:
+            continue
+        try:
+            return datetime.strptime(str(value).strip('\x00 '), _EXIF_TIMESTAMP_FORMAT)
+        except ValueError:
+            continue
+    return None
+
+
+def _read_jpeg_app1_segments(f) -> Tuple[Optional[bytes], Optional[bytes]]:
+    """
+    Walk the JPEG marker segments and return the (Exif TIFF block, XMP packet).
+
+    Only APP1 payloads are read; every other segment is skipped with a seek, and
+    the walk stops as soon as both packets are found or image data starts.
+    """
+    tiff = None
+    xmp = None
+    while tiff is None or xmp is None:
+        byte = f.read(1)
+        if not byte:
+            break
+        if byte != b'\xff':
+            break  # Lost sync with the marker stream
+        marker = f.read(1)
+        while marker == b'\xff':  # Fill bytes
+            marker = f.read(1)
+        if not marker:
+            break
+        code = marker[0]
+        if code in (_JPEG_SOS, _JPEG_EOI):
+            break
+        if 0xD0 <= code <= 0xD7 or code == 0x01:
+            continue  # Standalone markers carry no length
+        length_bytes = f.read(2)
+        if len(length_bytes) < 2:
+            break
+        length = struct.unpack('>H', length_bytes)[0] - 2
+        if length < 0:
+            break
+        if code != _JPEG_APP1:
+            f.seek(length, os.SEEK_CUR)
+            continue
+        payload = f.read(length)
+        if payload.startswith(_EXIF_HEADER) and tiff is None:
+            tiff = payload[len(_EXIF_HEADER):]
+        elif payload.startswith(_XMP_HEADER) and xmp is None:
+            xmp = payload[len(_XMP_HEADER):]
+    return tiff, xmp
+
+
+def _read_tiff_ifd(tiff: bytes, offset: int, endian: str, wanted: set) -> Dict[int, object]:
+    """Decode the `wanted` tags of one IFD: ASCII as str, rationals as (num, den) tuples."""
+    entries = {}
+    count = struct.unpack_from(endian + 'H', tiff, offset)[0]
+    for i in range(count):
+        entry = offset + 2 + 12 * i
+        tag, field_type, n = struct.unpack_from(endian + 'HHL', tiff, entry)
+        if tag not in wanted or field_type not in _TIFF_TYPES:
+            continue
+        code, size = _TIFF_TYPES[field_type]
+        total = size * n
+        data_offset = entry + 8 if total <= 4 else struct.unpack_from(endian + 'L', tiff, entry + 8)[0]
+        raw = tiff[data_offset:data_offset + total]
+        if len(raw) < total:
+            continue  # Truncated or corrupt pointer
+        if field_type == 2:
+            entries[tag] = raw.split(b'\x00', 1)[0].decode('ascii', 'replace')
+        elif field_type in (5, 10):
+            flat = struct.unpack(endian + code[0] * (2 * n), raw)
+            entries[tag] = [(flat[2 * k], flat[2 * k + 1]) for k in range(n)]
+        else:
+            values = struct.unpack(endian + code * n, raw)
+            entries[tag] = values[0] if n == 1 else list(values)
+    return entries
+
+
+def _parse_exif_tiff(tiff: bytes) -> Dict:
+    """Pull GPS position/altitude and timestamps out of an Exif TIFF block."""
+    endian = {b'II': '<', b'MM': '>'}.get(tiff[:2])
+    if endian is None or struct.unpack_from(endian + 'H', tiff, 2)[0] != 42:
+        return {}
+    ifd0 = _read_tiff_ifd(tiff, struct.unpack_from(endian + 'L', tiff, 4)[0], endian,
+                          {_TAG_DATETIME, _TAG_EXIF_IFD, _TAG_GPS_IFD})
+    exif_ifd = {}
+    if _TAG_EXIF_IFD in ifd0:
+        exif_ifd = _read_tiff_ifd(tiff, ifd0[_TAG_EXIF_IFD], endian,
+                                  {_TAG_DATETIME_ORIGINAL, _TAG_DATETIME_DIGITIZED})
+    result = {
+        'timestamp': _parse_exif_timestamp(exif_ifd.get(_TAG_DATETIME_ORIGINAL),
+                                           exif_ifd.get(_TAG_DATETIME_DIGITIZED),
+                                           ifd0.get(_TAG_DATETIME)),
+    }
+    if _TAG_GPS_IFD in ifd0:
+        gps = _read_tiff_ifd(tiff, ifd0[_TAG_GPS_IFD], endian, {
+            _GPS_LATITUDE_REF, _GPS_LATITUDE, _GPS_LONGITUDE_REF, _GPS_LONGITUDE,
+            _GPS_ALTITUDE_REF, _GPS_ALTITUDE,
+        })
+        if all(tag in gps for tag in (_GPS_LATITUDE_REF, _GPS_LATITUDE, _GPS_LONGITUDE_REF, _GPS_LONGITUDE)):
+            result['latitude'] = _dms_to_decimal(gps[_GPS_LATITUDE], gps[_GPS_LATITUDE_REF])
+            result['longitude'] = _dms_to_decimal(gps[_GPS_LONGITUDE], gps[_GPS_LONGITUDE_REF])
+        if _GPS_ALTITUDE in gps:
+            altitude = _ratio_to_float(gps[_GPS_ALTITUDE][0])
+            # GPSAltitudeRef 1 = below sea level
+            ref = gps.get(_GPS_ALTITUDE_REF, 0)
+            result['gps_altitude'] = -altitude if ref == 1 else altitude
+    return result
+
+
+def _parse_dji_xmp(xmp: bytes) -> Dict:
+    """DJI drone-dji:AbsoluteAltitude / RelativeAltitude, as attributes or elements."""
+    result = {}
+    for match in _DJI_XMP_ALTITUDE_RE.finditer(xmp):
+        key = 'absolute_altitude' if match.group(1) == b'AbsoluteAltitude' else 'relative_altitude'
+        try:
+            result.setdefault(key, float(match.group(2) or match.group(3)))
+        except ValueError:
+            continue
+    return result
+
+
+def _scan_with_exifread(photo_path: Path) -> Dict:
+    """Fallback for non-JPEG files (PNG eXIf etc.): one exifread pass over the file."""
+    with open(photo_path, 'rb') as f:
+        tags = exifread.process_file(f, details=False)
+    result = {
+        'timestamp': _parse_exif_timestamp(*(str(tags[t]) for t in (
+            'EXIF DateTimeOriginal', 'EXIF DateTimeDigitized', 'Image DateTime') if t in tags)),
+    }
+    if all(t in tags for t in ('GPS GPSLatitude', 'GPS GPSLatitudeRef', 'GPS GPSLongitude', 'GPS GPSLongitudeRef')):
+        result['latitude'] = _dms_to_decimal(tags['GPS GPSLatitude'].values, str(tags['GPS GPSLatitudeRef']))
+        result['longitude'] = _dms_to_decimal(tags['GPS GPSLongitude'].values, str(tags['GPS GPSLongitudeRef']))
+    return result
+
+
+def scan_photo_exif(photo_path: Path) -> PhotoExif:
+    """
+    Read one photo's GPS, DJI altitudes and timestamp in a single pass.
+
+    Memoized by (path, mtime), so repeated lookups during ordering and trajectory
+    projection never touch the file again. Unreadable metadata yields an empty
+    PhotoExif rather than an exception.
+    """
+    photo_path = Path(photo_path)
+    try:
+        key = (str(photo_path), photo_path.stat().st_mtime_ns)
+    except OSError as e:
+        logger.debug(f"Could not stat {photo_path.name}: {e}")
+        return PhotoExif()
+    cached = _exif_scan_cache.get(key)
+    if cached is not None:
+        return cached
+
+    fields = {}
+    try:
+        with open(photo_path, 'rb') as f:
+            is_jpeg = f.read(2) == _JPEG_SOI
+            if is_jpeg:
+                tiff, xmp = _read_jpeg_app1_segments(f)
+                if tiff:
+                    fields.update(_parse_exif_tiff(tiff))
+                if xmp:
+                    fields.update(_parse_dji_xmp(xmp))
+        if not is_jpeg:
+            fields = _scan_with_exifread(photo_path)
+    except Exception as e:
+        logger.debug(f"Could not read EXIF from {photo_path.name}: {e}")
+
+    result = PhotoExif(**fields)
+    _exif_scan_cache[key] = result
+    return result
+
+
+def scan_photos_exif(photo_paths: List[Path], max_workers: int = EXIF_SCAN_WORKERS) -> Dict[Path, PhotoExif]:
+    """Scan many photos across a thread pool (the work is I/O bound); returns {path: PhotoExif}."""
+    photo_paths = [Path(p) for p in photo_paths]
+    if len(photo_paths) <= 1 or max_workers <= 1:
+        return {p: scan_photo_exif(p) for p in photo_paths}
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(photo_paths))) as pool:
+        return dict(zip(photo_paths, pool.map(scan_photo_exif, photo_paths)))
 
 
 class Advanced3DPathProcessor:
@@ -69,6 +464,8 @@ class Advanced3DPathProcessor:
     FALLBACK_PHOTO_INTERVAL_SEC = 3.0
     DEFAULT_GPS_ACCURACY_M = 5.0
     EXIF_TRAJECTORY_DOP = 2.0
+    CURVE_CONTROL_FACTOR = 0.3  # Control point offset as a share of segment length
+    ARC_LENGTH_SAMPLES = 100  # Derivative samples per segment for arc-length integration
     
     def __init__(self, csv_path: Path, images_dir: Path):
         """Initialize the 3D path processor"""
@@ -79,9 +476,11 @@ class Advanced3DPathProcessor:
         self.local_origin = None
         self.utm_zone = None
         self.utm_zone_letter = None
+        self.utm_origin = None  # (easting, northing) of local_origin in its UTM zone
         self.flight_segments = []
         self.path_distances = []
         self.total_path_length = 0
+        self.trajectory_index = None
         
         # Flight parameters (extracted from CSV)
         self.flight_speed_mps = None
@@ -253,78 +652,28 @@ class Advanced3DPathProcessor:
     # =============================
     def _ratio_to_float(self, value) -> float:
         """Convert exifread Ratio or tuple to float."""
-        try:
-            # exifread Ratio has .num and .den
-            return float(value.num) / float(value.den)
-        except AttributeError:
-            # Sometimes it's a tuple (num, den)
-            if isinstance(value, (list, tuple)) and len(value) == 2:
-                return float(value[0]) / float(value[1])
-            # Already numeric
-            return float(value)
+        return _ratio_to_float(value)
     
     def _dms_to_decimal(self, dms, ref: str) -> float:
         """Convert EXIF DMS components and ref to signed decimal degrees."""
-        degrees = self._ratio_to_float(dms[0])
-        minutes = self._ratio_to_float(dms[1])
-        seconds = self._ratio_to_float(dms[2])
-        decimal = degrees + minutes / 60.0 + seconds / 3600.0
-        if ref in ['S', 'W']:
-            decimal = -decimal
-        return decimal
+        return _dms_to_decimal(dms, ref)
     
     def extract_dji_gps_from_exif(self, photo_path: Path) -> Optional[Dict]:
         """Extract GPS lat/lon from DJI EXIF and timestamp if available.
-        Returns: {'latitude': float, 'longitude': float, 'timestamp': Optional[datetime]}
+        Returns: {'latitude': float, 'longitude': float, 'timestamp': Optional[datetime],
+                  'absolute_altitude': Optional[float], 'relative_altitude': Optional[float]}
+        Served from the memoized single-read scan (see scan_photo_exif).
         """
-        try:
-            with open(photo_path, 'rb') as f:
-                tags = exifread.process_file(f, details=False)
-            # GPS tags can appear with or without dots; exifread typical names:
-            lat_tag = None
-            lat_ref_tag = None
-            lon_tag = None
-            lon_ref_tag = None
-            for key in [
-                'GPS GPSLatitude', 'GPSLatitude',
-            ]:
-                if key in tags:
-                    lat_tag = tags[key]
-                    break
-            for key in [
-                'GPS GPSLatitudeRef', 'GPSLatitudeRef',
-            ]:
-                if key in tags:
-                    lat_ref_tag = str(tags[key])
-                    break
-            for key in [
-                'GPS GPSLongitude', 'GPSLongitude',
-            ]:
-                if key in tags:
-                    lon_tag = tags[key]
-                    break
-            for key in [
-                'GPS GPSLongitudeRef', 'GPSLongitudeRef',
-            ]:
-                if key in tags:
-                    lon_ref_tag = str(tags[key])
-                    break
-            if lat_tag and lat_ref_tag and lon_tag and lon_ref_tag:
-                # exifread returns list of 3 Ratio values for D/M/S
-                lat_vals = lat_tag.values if hasattr(lat_tag, 'values') else lat_tag
-                lon_vals = lon_tag.values if hasattr(lon_tag, 'values') else lon_tag
-                lat = self._dms_to_decimal(lat_vals, lat_ref_tag)
-                lon = self._dms_to_decimal(lon_vals, lon_ref_tag)
-                # Timestamp (optional)
-                timestamp = self._extract_photo_timestamp(photo_path)
-                return {
-                    'latitude': float(lat),
-                    'longitude': float(lon),
-                    'timestamp': timestamp
-                }
-        except Exception as e:
-            logger.debug(f"Could not extract GPS EXIF from {photo_path.name}: {e}")
-        return None
+        exif = scan_photo_exif(photo_path)
+        if not exif.has_gps:
+            return None
+        return {
+            'latitude': float(exif.latitude),
+            'longitude': float(exif.longitude),
+            'timestamp': exif.timestamp,
+            'absolute_altitude': exif.absolute_altitude,
+            'relative_altitude': exif.relative_altitude,
+        }
     
     def setup_local_coordinate_system(self):
         """Set up local 3D coordinate system centered on flight path"""
@@ -342,26 +691,57 @@ class Advanced3DPathProcessor:
         self.local_origin = (center_lat, center_lon, center_alt)
         self.utm_zone = utm_zone
         self.utm_zone_letter = utm_letter
+        self.utm_origin = (utm_easting, utm_northing)
         
         logger.info(f"🌍 Local coordinate system:")
         logger.info(f"   Origin: {center_lat:.6f}°, {center_lon:.6f}°, {center_alt:.1f}m")
         logger.info(f"   UTM Zone: {utm_zone}{utm_letter}")
     
-    def convert_to_local_3d(self, lat: float, lon: float, alt: float) -> np.ndarray:
-        """Convert GPS coordinates to local 3D coordinates"""
+    def _local_frame(self) -> Tuple[float, float]:
+        """UTM easting/northing of the local origin, projected once per coordinate system"""
         if self.local_origin is None:
             self.setup_local_coordinate_system()
+        if self.utm_origin is None:
+            # local_origin was assigned directly rather than through setup_local_coordinate_system
+            origin_e, origin_n, self.utm_zone, self.utm_zone_letter = utm.from_latlon(self.local_origin[0], self.local_origin[1])
+            self.utm_origin = (origin_e, origin_n)
+        return self.utm_origin
+    
+    def convert_to_local_3d(self, lat: float, lon: float, alt: float) -> np.ndarray:
+        """Convert GPS coordinates to local 3D coordinates"""
+        return self.convert_to_local_3d_batch([lat], [lon], [alt])[0]
+    
+    def convert_to_local_3d_batch(self, lat, lon, alt) -> np.ndarray:
+        """Array version of convert_to_local_3d: (N,) lat/lon/alt -> (N, 3) local coordinates.
+        Every point is projected in the origin's UTM zone, so the local frame stays
+        continuous for flights that touch a zone boundary.
+        """
+        origin_e, origin_n = self._local_frame()
+        lat = np.asarray(lat, dtype=float).ravel()
+        lon = np.asarray(lon, dtype=float).ravel()
+        alt = np.asarray(alt, dtype=float).ravel()
+        if lat.size == 0:
+            return np.zeros((0, 3))
         
         # Convert to UTM
-        utm_e, utm_n, _, _ = utm.from_latlon(lat, lon)
-        origin_e, origin_n, _, _ = utm.from_latlon(self.local_origin[0], self.local_origin[1])
+        utm_e, utm_n, _, _ = utm.from_latlon(
+            lat, lon, force_zone_number=self.utm_zone, force_zone_letter=self.utm_zone_letter
+        )
         
         # Local coordinates relative to origin
-        x = utm_e - origin_e
-        y = utm_n - origin_n
-        z = alt - self.local_origin[2]
-        
-        return np.array([x, y, z])
+        return np.column_stack([utm_e - origin_e, utm_n - origin_n, alt - self.local_origin[2]])
+    
+    def convert_from_local_3d_batch(self, local_points) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Inverse of convert_to_local_3d_batch: (N, 3) local coordinates -> lat, lon, alt arrays"""
+        origin_e, origin_n = self._local_frame()
+        local_points = np.asarray(local_points, dtype=float).reshape(-1, 3)
+        if len(local_points) == 0:
+            return np.zeros(0), np.zeros(0), np.zeros(0)
+        lat, lon = utm.to_latlon(
+            origin_e + local_points[:, 0], origin_n + local_points[:, 1], self.utm_zone, self.utm_zone_letter,
+            strict=False  # Forced-zone points may sit past the zone edge or the equator
+        )
+        return lat, lon, local_points[:, 2] + self.local_origin[2]
     
     def build_3d_flight_path(self):
         """Build 3D flight path with curved segments and cumulative distances"""
@@ -372,38 +752,33 @@ class Advanced3DPathProcessor:
         self.path_distances = [0.0]  # Cumulative distances
         
         # Convert all waypoints to 3D
-        waypoints_3d = []
-        for _, row in self.flight_data.iterrows():
-            point_3d = self.convert_to_local_3d(
-                row['latitude'], row['longitude'], row['altitude']
-            )
-            waypoints_3d.append(point_3d)
+        waypoints_3d = self.convert_to_local_3d_batch(
+            self.flight_data['latitude'].to_numpy(),
+            self.flight_data['longitude'].to_numpy(),
+            self.flight_data['altitude'].to_numpy()
+        )
+        n_segments = max(len(waypoints_3d) - 1, 0)
+        
+        # Curvature information if available
+        curvature_radii = [None] * n_segments
+        if 'curvature_radius' in self.flight_data.columns:
+            curvature_radii = [
+                None if pd.isna(radius) else radius
+                for radius in self.flight_data['curvature_radius'].iloc[:n_segments]
+            ]
+        
+        # Control points and arc lengths for every segment in one pass
+        control_points = self._generate_all_curve_control_points(waypoints_3d)
+        if control_points is not None:
+            distances = self._calculate_curved_distances(waypoints_3d[:-1], control_points, waypoints_3d[1:])
+        else:
+            distances = np.linalg.norm(np.diff(waypoints_3d, axis=0), axis=1)
         
         # Build segments with curvature support
-        for i in range(len(waypoints_3d) - 1):
+        for i in range(n_segments):
             start = waypoints_3d[i]
             end = waypoints_3d[i + 1]
             
-            # Get curvature information if available
-            curvature_radius = None
-            if 'curvature_radius' in self.flight_data.columns:
-                curvature_radius = self.flight_data.iloc[i]['curvature_radius']
-                if pd.isna(curvature_radius):
-                    curvature_radius = None
-            
-            # Generate control points for curved path
-            control_points = self._generate_curve_control_points(
-                start, end, i, waypoints_3d, curvature_radius
-            )
-            
-            # Calculate segment properties
-            if control_points:
-                # Calculate curved distance using spline
-                distance = self._calculate_curved_distance(start, end, control_points)
-            else:
-                # Linear distance
-                distance = np.linalg.norm(end - start)
-            
             segment_vec = end - start
             heading = math.degrees(math.atan2(segment_vec[1], segment_vec[0]))
             altitude_change = segment_vec[2]
@@ -411,17 +786,17 @@ class Advanced3DPathProcessor:
             segment = FlightSegment(
                 start_point=start,
                 end_point=end,
-                control_points=control_points,
+                control_points=list(control_points[i]) if control_points is not None else [],
                 start_waypoint_idx=i,
                 end_waypoint_idx=i + 1,
-                distance=distance,
+                distance=float(distances[i]),
                 heading=heading,
                 altitude_change=altitude_change,
-                curvature_radius=curvature_radius
+                curvature_radius=curvature_radii[i]
             )
             
             self.flight_segments.append(segment)
-            self.path_distances.append(self.path_distances[-1] + distance)
+            self.path_distances.append(self.path_distances[-1] + segment.distance)
         
         self.total_path_length = self.path_distances[-1]
         
@@ -434,86 +809,93 @@ class Advanced3DPathProcessor:
     # ==========================================
     # TRAJECTORY PROJECTION (EXIF → 3D PATH)
     # ==========================================
+    def _get_trajectory_index(self) -> TrajectoryIndex:
+        """Dense polyline index over the current flight path, rebuilt when the path changes."""
+        index = self.trajectory_index
+        if index is None or index.segments is not self.flight_segments or len(index.segments) != len(self.flight_segments):
+            index = TrajectoryIndex(self.flight_segments, self.path_distances)
+            self.trajectory_index = index
+        return index
+    
     def find_closest_trajectory_point(self, exif_xy: np.ndarray) -> Dict:
         """Find closest point on existing 3D trajectory to given XY in local frame.
         Returns dict with altitude (local z), confidence [0-1], segment_index, parameter_t,
         distance_m, and local_position (np.ndarray 3, local coords).
         """
-        closest_distance = float('inf')
-        closest = None
-        # Sample each segment's spline to approximate closest point
-        for seg_idx, segment in enumerate(self.flight_segments):
-            # Increase sampling for better precision
-            for t in np.linspace(0.0, 1.0, 50):
-                pt = segment.interpolate_point(t)
-                distance = np.linalg.norm(exif_xy - pt[:2])
-                if distance < closest_distance:
-                    closest_distance = distance
-                    closest = {
-                        'altitude_local': float(pt[2]),
-                        'confidence': float(max(0.0, 1.0 - min(distance / 50.0, 1.0))),
-                        'segment_index': int(seg_idx),
-                        'parameter_t': float(t),
-                        'distance_m': float(distance),
-                        'local_position': pt
-                    }
-        return closest if closest is not None else {
-            'altitude_local': 0.0,
-            'confidence': 0.0,
-            'segment_index': -1,
-            'parameter_t': 0.0,
-            'distance_m': float('inf'),
-            'local_position': np.zeros(3, dtype=float)
-        }
+        return self.find_closest_trajectory_points(np.atleast_2d(exif_xy))[0]
+    
+    def find_closest_trajectory_points(self, exif_xy: np.ndarray) -> List[Dict]:
+        """Batched find_closest_trajectory_point for an (N, 2) array of local XY positions."""
+        closest = self._get_trajectory_index().query(exif_xy)
+        results = []
+        for k in range(len(closest['distance_m'])):
+            distance = float(closest['distance_m'][k])
+            results.append({
+                'altitude_local': float(closest['local_position'][k][2]),
+                'confidence': float(max(0.0, 1.0 - min(distance / 50.0, 1.0))),
+                'segment_index': int(closest['segment_index'][k]),
+                'parameter_t': float(closest['parameter_t'][k]),
+                'distance_m': distance,
+                'local_position': closest['local_position'][k]
+            })
+        return results
     
     def project_exif_gps_to_trajectory(self, photo_exif_gps: Dict) -> Dict:
         """Project EXIF GPS lat/lon to 3D trajectory to get precise altitude.
         Keeps original EXIF lat/lon, replaces altitude with trajectory altitude.
         Returns dict suitable for updating photo_positions entry.
         """
+        return self.project_exif_gps_batch([photo_exif_gps])[0]
+    
+    def project_exif_gps_batch(self, photo_exif_gps: List[Dict]) -> List[Dict]:
+        """Batched project_exif_gps_to_trajectory: one trajectory query for all photos."""
+        if not photo_exif_gps:
+            return []
         # Convert EXIF GPS to local XY (alt zero to ignore EXIF altitude)
-        exif_local = self.convert_to_local_3d(
-            photo_exif_gps['latitude'],
-            photo_exif_gps['longitude'],
-            0.0
+        exif_local = self.convert_to_local_3d_batch(
+            [exif['latitude'] for exif in photo_exif_gps],
+            [exif['longitude'] for exif in photo_exif_gps],
+            np.zeros(len(photo_exif_gps))
         )
-        # Find closest trajectory point using XY only
-        closest = self.find_closest_trajectory_point(exif_local[:2])
-        # Build updated info
-        # Convert EXIF lat/lon + trajectory altitude (local z) back to absolute altitude
-        altitude_absolute = closest['altitude_local'] + self.local_origin[2]
-        # Local 3D position uses EXIF XY and trajectory local Z
-        updated_local_pos = np.array([exif_local[0], exif_local[1], closest['altitude_local']], dtype=float)
-        # Heading from the segment
-        heading = self.flight_segments[closest['segment_index']].heading if 0 <= closest['segment_index'] < len(self.flight_segments) else 0.0
+        # Find closest trajectory points using XY only
+        index = self._get_trajectory_index()
+        closest_points = self.find_closest_trajectory_points(exif_local[:, :2])
         # Path distance for continuity checks
-        if 0 <= closest['segment_index'] < len(self.flight_segments):
-            seg_start_dist = self.path_distances[closest['segment_index']]
-            seg_len = self.flight_segments[closest['segment_index']].distance
-            path_distance = seg_start_dist + closest['parameter_t'] * seg_len
-        else:
-            path_distance = 0.0
-        return {
-            'latitude': float(photo_exif_gps['latitude']),
-            'longitude': float(photo_exif_gps['longitude']),
-            'altitude': float(altitude_absolute),
-            'position_3d': updated_local_pos.tolist(),
-            'heading': float(heading),
-            'confidence': float(closest['confidence']),
-            'gps_accuracy': float(self.EXIF_TRAJECTORY_DOP),
-            'mapping_method': 'exif_trajectory_projection',
-            'segment_index': int(closest['segment_index']),
-            'segment_t': float(closest['parameter_t']),
-            'path_distance': float(path_distance),
-            'trajectory_metadata': {
-                'exif_source': 'exif_gps',
-                'source': 'exif_gps_trajectory_projection',
-                'trajectory_confidence': float(closest['confidence']),
-                'projection_distance_m': float(closest['distance_m']),
-                'distance_from_path_m': float(closest['distance_m']),
-                'flight_segment_id': int(closest['segment_index'])
-            }
-        }
+        path_distances = index.path_distance(
+            [c['segment_index'] for c in closest_points],
+            [c['parameter_t'] for c in closest_points]
+        )
+        
+        projected = []
+        for exif, local, closest, path_distance in zip(photo_exif_gps, exif_local, closest_points, path_distances):
+            # Convert EXIF lat/lon + trajectory altitude (local z) back to absolute altitude
+            altitude_absolute = closest['altitude_local'] + self.local_origin[2]
+            # Local 3D position uses EXIF XY and trajectory local Z
+            updated_local_pos = np.array([local[0], local[1], closest['altitude_local']], dtype=float)
+            # Heading from the segment
+            heading = self.flight_segments[closest['segment_index']].heading if 0 <= closest['segment_index'] < len(self.flight_segments) else 0.0
+            projected.append({
+                'latitude': float(exif['latitude']),
+                'longitude': float(exif['longitude']),
+                'altitude': float(altitude_absolute),
+                'position_3d': updated_local_pos.tolist(),
+                'heading': float(heading),
+                'confidence': float(closest['confidence']),
+                'gps_accuracy': float(self.EXIF_TRAJECTORY_DOP),
+                'mapping_method': 'exif_trajectory_projection',
+                'segment_index': int(closest['segment_index']),
+                'segment_t': float(closest['parameter_t']),
+                'path_distance': float(path_distance),
+                'trajectory_metadata': {
+                    'exif_source': 'exif_gps',
+                    'source': 'exif_gps_trajectory_projection',
+                    'trajectory_confidence': float(closest['confidence']),
+                    'projection_distance_m': float(closest['distance_m']),
+                    'distance_from_path_m': float(closest['distance_m']),
+                    'flight_segment_id': int(closest['segment_index'])
+                }
+            })
+        return projected
     
     def _resolve_crossover_with_neighbors(self, i: int, projected: Dict, ordered_keys: List[str], temp_positions: Dict[str, Dict]) -> Dict:
         """Simple sequential continuity resolver for ambiguous projections.
@@ -541,7 +923,7 @@ class Advanced3DPathProcessor:
                     # Clamp inside path
                     desired = min(max(desired, seg_start), seg_start + seg_len)
                     t = (desired - seg_start) / max(seg_len, 1e-6)
-                    pt = self.flight_segments[seg_idx].interpolate_point(t)
+                    pt = self._get_trajectory_index().point_at(seg_idx, t)
                     # Keep EXIF XY, update only Z and segment_t/path_distance
                     current['segment_t'] = float(t)
                     current['path_distance'] = float(desired)
@@ -560,11 +942,18 @@ class Advanced3DPathProcessor:
         # Preserve ordering keys
         ordered_keys = [p[0].name for p in photos]
         temp_positions: Dict[str, Dict] = {}
+        # Warm the EXIF memo in parallel (a no-op when photo ordering already scanned them)
+        scan_photos_exif([p[0] for p in photos])
+        exif_by_photo = {
+            photo_path: self.extract_dji_gps_from_exif(photo_path)
+            for photo_path, _, _ in photos
+        }
+        with_gps = [photo_path for photo_path, exif in exif_by_photo.items() if exif]  # No EXIF GPS → keep previous mapping
+        projections = dict(zip(with_gps, self.project_exif_gps_batch([exif_by_photo[p] for p in with_gps])))
         for i, (photo_path, order_idx, timestamp) in enumerate(photos):
-            exif = self.extract_dji_gps_from_exif(photo_path)
-            if not exif:
-                continue  # No EXIF GPS → keep previous mapping
-            projected = self.project_exif_gps_to_trajectory(exif)
+            projected = projections.get(photo_path)
+            if projected is None:
+                continue
             # Attach order and timestamp
             projected['order_index'] = order_idx
             projected['timestamp'] = timestamp.isoformat() if timestamp else None
@@ -614,7 +1003,7 @@ class Advanced3DPathProcessor:
         
         # Calculate curve tension based on waypoint spacing
         segment_length = np.linalg.norm(end - start)
-        curve_factor = 0.3  # 30% of segment length for curve control
+        curve_factor = self.CURVE_CONTROL_FACTOR  # 30% of segment length for curve control
         
         if prev_point is not None or next_point is not None:
             # Create smooth curve using Catmull-Rom spline approach
@@ -644,38 +1033,49 @@ class Advanced3DPathProcessor:
     def _calculate_curved_distance(self, start: np.ndarray, end: np.ndarray, 
                                  control_points: List[np.ndarray]) -> float:
         """Calculate distance along curved path using numerical integration"""
-        
-        # Create spline path
-        all_points = [start] + control_points + [end]
-        t_values = np.linspace(0, 1, len(all_points))
-        
-        # Create splines
-        x_spline = CubicSpline(t_values, [p[0] for p in all_points])
-        y_spline = CubicSpline(t_values, [p[1] for p in all_points])
-        z_spline = CubicSpline(t_values, [p[2] for p in all_points])
-        
-        # Numerical integration to get arc length
-        def path_derivative(t):
-            return np.array([x_spline(t, 1), y_spline(t, 1), z_spline(t, 1)])
-        
-        # Sample points along curve for integration
-        t_samples = np.linspace(0, 1, 100)
-        distances = []
-        
-        for i in range(len(t_samples) - 1):
-            t1, t2 = t_samples[i], t_samples[i + 1]
-            dt = t2 - t1
-            
-            # Average derivative over interval
-            deriv1 = path_derivative(t1)
-            deriv2 = path_derivative(t2)
-            avg_deriv = (deriv1 + deriv2) / 2
-            
-            # Arc length element
-            ds = np.linalg.norm(avg_deriv) * dt
-            distances.append(ds)
-        
-        return sum(distances)
+        return float(self._calculate_curved_distances(
+            np.asarray(start, dtype=float)[None], np.asarray(control_points, dtype=float)[None],
+            np.asarray(end, dtype=float)[None]
+        )[0])
+    
+    def _generate_all_curve_control_points(self, waypoints: np.ndarray) -> Optional[np.ndarray]:
+        """Batch version of _generate_curve_control_points for every segment of the path.
+        Returns (n_segments, 2, 3) control points, or None when the path is a single
+        straight segment (no neighbouring waypoints to curve towards).
+        """
+        if len(waypoints) < 3:
+            return None
+        
+        starts, ends = waypoints[:-1], waypoints[1:]
+        chords = ends - starts
+        segment_lengths = np.linalg.norm(chords, axis=1)
+        directions = chords / segment_lengths[:, None]
+        # Segment i enters along segment i-1 and leaves along segment i+1; the first and
+        # last segments fall back to their own chord direction
+        n = len(chords)
+        in_direction = directions[np.maximum(np.arange(n) - 1, 0)]
+        out_direction = directions[np.minimum(np.arange(n) + 1, n - 1)]
+        
+        offsets = segment_lengths[:, None] * self.CURVE_CONTROL_FACTOR
+        control_1 = starts + in_direction * offsets
+        control_2 = ends - out_direction * offsets
+        return np.stack([control_1, control_2], axis=1)
+    
+    def _calculate_curved_distances(self, starts: np.ndarray, control_points: np.ndarray,
+                                    ends: np.ndarray) -> np.ndarray:
+        """Batch version of _calculate_curved_distance: arc lengths of many segments at once.
+        All segments share the same spline knots, so one CubicSpline over an
+        (n_points, n_segments, 3) array evaluates every derivative together.
+        """
+        all_points = np.concatenate([starts[None], np.swapaxes(control_points, 0, 1), ends[None]], axis=0)
+        spline = CubicSpline(np.linspace(0, 1, len(all_points)), all_points, axis=0)
+        
+        # Trapezoid-style rule on |dP/dt| over the same samples as the per-segment version
+        t_samples = np.linspace(0, 1, self.ARC_LENGTH_SAMPLES)
+        derivatives = spline(t_samples, 1)
+        avg_derivatives = (derivatives[:-1] + derivatives[1:]) / 2
+        dt = np.diff(t_samples)[:, None]
+        return (np.linalg.norm(avg_derivatives, axis=2) * dt).sum(axis=0)
     
     def get_photo_list_with_validation(self) -> List[Tuple[Path, int, Optional[datetime]]]:
         """
@@ -683,13 +1083,11 @@ class Advanced3DPathProcessor:
         Returns: List of (photo_path, order_index, timestamp)
         """
         photo_extensions = {'.jpg', '.jpeg', '.png', '.JPG', '.JPEG', '.PNG'}
-        photos = []
         
-        # Collect all photos with metadata
-        for file_path in self.images_dir.rglob('*'):
-            if file_path.suffix in photo_extensions:
-                timestamp = self._extract_photo_timestamp(file_path)
-                photos.append((file_path, timestamp))
+        # Collect all photos, then read their metadata once across a worker pool
+        photo_paths = [p for p in self.images_dir.rglob('*') if p.suffix in photo_extensions]
+        scanned = scan_photos_exif(photo_paths)
+        photos = [(file_path, scanned[file_path].timestamp) for file_path in photo_paths]
         
         if not photos:
             logger.warning("⚠️ No photos found!")
@@ -729,29 +1127,8 @@ class Advanced3DPathProcessor:
         return result
     
     def _extract_photo_timestamp(self, photo_path: Path) -> Optional[datetime]:
-        """Extract reliable timestamp from photo EXIF"""
-        try:
-            with open(photo_path, 'rb') as f:
-                tags = exifread.process_file(f, stop_tag='EXIF DateTimeOriginal')
-                
-                # Try multiple timestamp tags
-                timestamp_tags = [
-                    'EXIF DateTimeOriginal',
-                    'EXIF DateTimeDigitized',
-                    'Image DateTime'
-                ]
-                
-                for tag in timestamp_tags:
-                    if tag in tags:
-                        timestamp_str = str(tags[tag])
-                        try:
-                            return datetime.strptime(timestamp_str, '%Y:%m:%d %H:%M:%S')
-                        except:
-                            continue
-        except Exception as e:
-            logger.debug(f"Could not extract timestamp from {photo_path.name}: {e}")
-        
-        return None
+        """Extract reliable timestamp from photo EXIF (DateTimeOriginal, then Digitized, then DateTime)"""
+        return scan_photo_exif(photo_path).timestamp
     
     def _extract_photo_number(self, photo_path: Path) -> Tuple[str, int]:
         """Extract number from filename for sorting"""
@@ -937,43 +1314,44 @@ class Advanced3DPathProcessor:
     
     def _get_segment_at_distance(self, distance: float) -> Tuple[int, float]:
         """Find which segment contains the given distance and position within it"""
-        for i in range(len(self.path_distances) - 1):
-            if self.path_distances[i] <= distance <= self.path_distances[i + 1]:
-                segment_start = self.path_distances[i]
-                segment_length = self.path_distances[i + 1] - segment_start
-                
-                if segment_length > 0:
-                    t = (distance - segment_start) / segment_length
-                else:
-                    t = 0.0
-                
-                return i, t
+        # Binary search over cumulative distance; bisect_left keeps the first segment
+        # that contains the distance when it sits exactly on a boundary
+        i = bisect_left(self.path_distances, distance) - 1
+        if i == -1 and len(self.path_distances) > 1 and distance == self.path_distances[0]:
+            i = 0
+        if 0 <= i < len(self.path_distances) - 1:
+            segment_start = self.path_distances[i]
+            segment_length = self.path_distances[i + 1] - segment_start
+            
+            if segment_length > 0:
+                t = (distance - segment_start) / segment_length
+            else:
+                t = 0.0
+            
+            return i, t
         
         # Beyond path end
         return len(self.flight_segments) - 1, 1.0
     
     def _enhance_photo_positions(self):
         """Add GPS coordinates and additional metadata to photo positions"""
-        for photo_name, data in self.photo_positions.items():
-            # Convert back to GPS
-            x, y, z = data['position_3d']
-            
-            # Convert local to UTM
-            origin_e, origin_n, _, _ = utm.from_latlon(self.local_origin[0], self.local_origin[1])
-            utm_e = origin_e + x
-            utm_n = origin_n + y
-            
-            # Convert UTM to lat/lon
-            lat, lon = utm.to_latlon(utm_e, utm_n, self.utm_zone, self.utm_zone_letter)
-            alt = z + self.local_origin[2]
-            
+        if not self.photo_positions:
+            return
+        # Convert all local positions back to GPS in one pass
+        names = list(self.photo_positions)
+        lats, lons, alts = self.convert_from_local_3d_batch(
+            [self.photo_positions[name]['position_3d'] for name in names]
+        )
+        coordinate_system = f'UTM_{self.utm_zone}{self.utm_zone_letter}'
+        
+        for photo_name, lat, lon, alt in zip(names, lats, lons, alts):
             # Add GPS data
-            data.update({
-                'latitude': lat,
-                'longitude': lon,
-                'altitude': alt,
+            self.photo_positions[photo_name].update({
+                'latitude': float(lat),
+                'longitude': float(lon),
+                'altitude': float(alt),
                 'gps_accuracy': self.DEFAULT_GPS_ACCURACY_M,
-                'coordinate_system': f'UTM_{self.utm_zone}{self.utm_zone_letter}'
+                'coordinate_system': coordinate_system
             })
     
     def generate_opensfm_files(self, output_dir: Path):
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Zero-Copy Image Staging for the SfM Container
+Materializes each input image once and exposes it to every consumer by link
+
+The pipeline needs the same images in several places: the extracted work
+directory, OpenSfM's dataset, the COLMAP dataset and the 3DGS output. Copying
+them each time multiplies disk usage on the SfM volume and spends minutes on
+I/O for large datasets. Images are never modified after extraction, so every
+extra location can share the same bytes:
+
+1. HARDLINK: same filesystem, no data written at all
+2. REFLINK: copy-on-write clone (FICLONE) where the filesystem supports it
+3. COPY: shutil.copy2, only when neither of the above is possible
+
+A method the filesystems cannot do at all (EXDEV across mounts, EOPNOTSUPP, ...)
+is not retried for that device pair; any other failure (EMLINK, EACCES, a racing
+EEXIST) only sends that one file on to the next method.
+
+Input archives are materialized by extract_image_archive, which streams image
+members to disk in bounded chunks on a worker pool.
+
+Environment:
+    SFM_IMAGE_STAGING       'link' (default: hardlink → reflink → copy) or 'copy'
+    SFM_EXTRACT_WORKERS     Parallel archive members being decompressed (default min(8, CPUs))
+"""
+
+import os
+import errno
+import shutil
+import logging
+import threading
+import zipfile
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+FICLONE = 0x40049409  # Linux ioctl: clone a whole file (btrfs, XFS with reflink=1, ...)
+
+STAGING_METHODS = ('hardlink', 'reflink', 'copy')
+
+# Errors meaning the method cannot work between these filesystems at all
+UNSUPPORTED_ERRNOS = frozenset(
+    code for code in (errno.EXDEV, errno.EPERM, errno.EOPNOTSUPP, getattr(errno, 'ENOTSUP', None),
+                      errno.EINVAL, errno.ENOTTY)
+    if code is not None
+)
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+EXTRACT_CHUNK_BYTES = 1024 * 1024
+
+
+def _reflink(src: Path, dst: Path) -> None:
+    """Copy-on-write clone of src at dst; raises OSError when unsupported."""
+    import fcntl
+
+    with open(src, 'rb') as source, open(dst, 'wb') as target:
+        try:
+            fcntl.ioctl(target.fileno(), FICLONE, source.fileno())
+        except OSError:
+            target.close()
+            os.unlink(dst)
+            raise
+    shutil.copystat(src, dst)
+
+
+class ImageStager:
+    """Stage files into consumer directories by hardlink, reflink or copy."""
+
+    def __init__(self, mode: Optional[str] = None):
+        """
+        Args:
+            mode: 'link' to try hardlink/reflink before copying, 'copy' to always copy
+                  (defaults to SFM_IMAGE_STAGING, then 'link')
+        """
+        self.mode = (mode or os.environ.get('SFM_IMAGE_STAGING', 'link')).lower()
+        self.stats: Counter = Counter()
+        self._unsupported: Dict[Tuple[int, int], Set[str]] = {}
+
+    def stage(self, src: Path, dst: Path) -> str:
+        """
+        Make `dst` a view of `src` (replacing any existing file)
+
+        Returns:
+            The method that succeeded: 'hardlink', 'reflink' or 'copy'
+        """
+        src = Path(src)
+        dst = Path(dst)
+        dst.parent.mkdir(parents=True, exist_ok=True)
+        if dst.exists() or dst.is_symlink():
+            if dst.exists() and dst.samefile(src):
+                self.stats['hardlink'] += 1
+                return 'hardlink'
+            dst.unlink()
+
+        if self.mode != 'copy':
+            devices = (src.stat().st_dev, dst.parent.stat().st_dev)
+            unsupported = self._unsupported.setdefault(devices, set())
+            for method, link in (('hardlink', os.link), ('reflink', _reflink)):
+                if method in unsupported:
+                    continue
+                try:
+                    link(src, dst)
+                    self.stats[method] += 1
+                    return method
+                except ImportError as e:
+                    unsupported.add(method)
+                    logger.debug(f"{method} unavailable: {e}")
+                except OSError as e:
+                    if e.errno in UNSUPPORTED_ERRNOS:
+                        unsupported.add(method)
+                        logger.debug(f"{method} unavailable for {src} -> {dst.parent}: {e}")
+                    else:
+                        logger.debug(f"{method} failed for {src.name}, trying the next method: {e}")
+
+        shutil.copy2(src, dst)
+        self.stats['copy'] += 1
+        return 'copy'
+
+    def stage_tree(self, src_dir: Path, dst_dir: Path, names: Optional[Iterable[str]] = None) -> int:
+        """
+        Stage every file under `src_dir` (or only `names`, relative to it) into `dst_dir`
+
+        Returns:
+            Number of files staged
+        """
+        src_dir = Path(src_dir)
+        dst_dir = Path(dst_dir)
+        dst_dir.mkdir(parents=True, exist_ok=True)
+        if names is None:
+            sources = [p for p in sorted(src_dir.rglob('*')) if p.is_file()]
+        else:
+            sources = [src_dir / name for name in names]
+        for src in sources:
+            self.stage(src, dst_dir / src.relative_to(src_dir))
+        return len(sources)
+
+    def summary(self) -> str:
+        """One-line breakdown of how files were staged, for logs."""
+        return ', '.join(f"{self.stats[m]} {m}" for m in STAGING_METHODS if self.stats[m]) or 'nothing staged'
+
+
+def image_members(zf: zipfile.ZipFile) -> List[zipfile.ZipInfo]:
+    """
+    Image members of an archive, one per file name
+
+    Directories, macOS resource forks (__MACOSX/, ._*) and non-images are dropped
+    before anything is decompressed. Members are flattened to their base name, so
+    when two share a name the later one wins, as with sequential extraction.
+    """
+    by_name: Dict[str, zipfile.ZipInfo] = {}
+    for info in zf.infolist():
+        name = Path(info.filename).name
+        if info.is_dir() or not name.lower().endswith(IMAGE_EXTENSIONS):
+            continue
+        if name.startswith('._') or '__MACOSX' in Path(info.filename).parts:
+            continue
+        by_name.pop(name, None)
+        by_name[name] = info
+    return list(by_name.values())
+
+
+def extract_image_archive(zip_path: Path, dest_dir: Path, max_workers: Optional[int] = None,
+                          on_image: Optional[Callable[[Path], object]] = None,
+                          chunk_bytes: int = EXTRACT_CHUNK_BYTES) -> List[Path]:
+    """
+    Stream the image members of a ZIP archive into `dest_dir`
+
+    Members are copied in `chunk_bytes` chunks, so peak memory does not depend on
+    image size, and independent members decompress in parallel (each worker has
+    its own ZipFile handle). `on_image` is called with each extracted path as
+    soon as it lands, e.g. to start EXIF scanning while extraction continues.
+
+    Returns:
+        Extracted image paths, in archive order
+    """
+    dest_dir = Path(dest_dir)
+    dest_dir.mkdir(parents=True, exist_ok=True)
+    if max_workers is None:
+        max_workers = int(os.environ.get('SFM_EXTRACT_WORKERS', min(8, os.cpu_count() or 1)))
+
+    with zipfile.ZipFile(zip_path, 'r') as zf:
+        members = image_members(zf)
+
+    local = threading.local()
+    handles: List[zipfile.ZipFile] = []
+    handles_lock = threading.Lock()
+
+    def extract(info: zipfile.ZipInfo) -> Path:
+        zf = getattr(local, 'zf', None)
+        if zf is None:
+            zf = local.zf = zipfile.ZipFile(zip_path, 'r')
+            with handles_lock:
+                handles.append(zf)
+        target_path = dest_dir / Path(info.filename).name
+        with zf.open(info) as source, open(target_path, 'wb') as target:
+            shutil.copyfileobj(source, target, chunk_bytes)
+        if on_image is not None:
+            try:
+                on_image(target_path)
+            except Exception as e:
+                logger.debug(f"on_image hook failed for {target_path.name}: {e}")
+        return target_path
+
+    try:
+        if max_workers <= 1 or len(members) <= 1:
+            return [extract(info) for info in members]
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(members))) as pool:
+            return list(pool.map(extract, members))
+    finally:
+        for zf in handles:
+            zf.close()
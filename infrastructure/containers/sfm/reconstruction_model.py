@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+Parse-Once Columnar Model of OpenSfM reconstruction.json
+Loaded a single time per job and shared by validation, metadata and COLMAP conversion
+
+A dense reconstruction.json is hundreds of MB, and as nested Python dicts
+(one dict + list + floats per point) it costs several times that in memory.
+This model parses the file once and keeps each reconstruction as:
+
+- cameras: the small per-camera dicts, unchanged
+- shots: names, camera keys, rotation (N, 3) and translation (N, 3) arrays
+- points: ids, coordinates (P, 3) float64 and colors (P, 3) uint8 arrays
+- observations (when points carry them): flat point / shot index and xy arrays
+
+With ijson installed the file is streamed one reconstruction at a time, so
+the full dict graph of every reconstruction never exists at once; otherwise
+json.load is used.
+
+TrackTable turns OpenSfM's tracks.csv (or a tracks.json, or those observations)
+into the 2D-3D correspondence table used for COLMAP export.
+"""
+
+import json
+import logging
+from array import array
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    import ijson
+except ImportError:  # Optional: streaming parser
+    ijson = None
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class SfMReconstruction:
+    """One OpenSfM reconstruction in columnar form"""
+    cameras: Dict[str, Dict]
+    shot_names: List[str]  # Registered shots first, then names only seen in observations
+    num_shots: int  # Registered shots (shot_names[:num_shots])
+    shot_cameras: List[Optional[str]]  # Camera key per registered shot (None if missing)
+    shot_rotations: np.ndarray  # (num_shots, 3) axis-angle
+    shot_translations: np.ndarray  # (num_shots, 3)
+    point_ids: List[str]
+    point_coordinates: np.ndarray  # (P, 3) float64
+    point_colors: np.ndarray  # (P, 3) uint8
+    observation_points: np.ndarray  # (M,) index into point_ids
+    observation_shots: np.ndarray  # (M,) index into shot_names
+    observation_xy: np.ndarray  # (M, 2) normalized image coordinates
+    _shot_index: Dict[str, int] = field(default=None, init=False, repr=False)
+
+    @property
+    def num_points(self) -> int:
+        return len(self.point_ids)
+
+    @property
+    def registered_shots(self) -> List[str]:
+        return self.shot_names[:self.num_shots]
+
+    def shot_index(self, name: str) -> int:
+        """Position of a registered shot, or -1"""
+        if self._shot_index is None:
+            self._shot_index = {n: i for i, n in enumerate(self.registered_shots)}
+        return self._shot_index.get(name, -1)
+
+    @classmethod
+    def from_dict(cls, recon: Dict) -> 'SfMReconstruction':
+        """Columnarize one reconstruction dict as found in reconstruction.json"""
+        shots = recon.get('shots', {}) or {}
+        points = recon.get('points', {}) or {}
+
+        shot_names = list(shots)
+        shot_cameras = [shot.get('camera') for shot in shots.values()]
+        shot_rotations = np.array([shot.get('rotation', [0.0, 0.0, 0.0]) for shot in shots.values()],
+                                  dtype=np.float64).reshape(-1, 3)
+        shot_translations = np.array([shot.get('translation', [0.0, 0.0, 0.0]) for shot in shots.values()],
+                                     dtype=np.float64).reshape(-1, 3)
+
+        point_ids = list(points)
+        point_coordinates = np.array([p.get('coordinates', [0.0, 0.0, 0.0]) for p in points.values()],
+                                     dtype=np.float64).reshape(-1, 3)
+        colors = np.array([p.get('color', [255, 255, 255]) for p in points.values()],
+                          dtype=np.float64).reshape(-1, 3)
+        point_colors = np.clip(np.trunc(colors), 0, 255).astype(np.uint8)
+
+        # Observations are optional in reconstruction.json (tracks usually live in tracks.csv)
+        # (typed arrays keep the per-observation overhead at 16 bytes instead of Python objects)
+        shot_lookup = {name: i for i, name in enumerate(shot_names)}
+        obs_points = array('i')
+        obs_shots = array('i')
+        obs_xy = array('d')
+        for p_idx, point in enumerate(points.values()):
+            for shot_id, obs in (point.get('observations') or {}).items():
+                if not (isinstance(obs, list) and len(obs) >= 2):
+                    continue
+                s_idx = shot_lookup.get(shot_id)
+                if s_idx is None:
+                    s_idx = shot_lookup[shot_id] = len(shot_names)
+                    shot_names.append(shot_id)
+                obs_points.append(p_idx)
+                obs_shots.append(s_idx)
+                obs_xy.append(obs[0])
+                obs_xy.append(obs[1])
+
+        return cls(
+            cameras=dict(recon.get('cameras', {}) or {}),
+            shot_names=shot_names,
+            num_shots=len(shots),
+            shot_cameras=shot_cameras,
+            shot_rotations=shot_rotations,
+            shot_translations=shot_translations,
+            point_ids=point_ids,
+            point_coordinates=point_coordinates,
+            point_colors=point_colors,
+            observation_points=np.frombuffer(obs_points, dtype=np.intc).astype(np.int32),
+            observation_shots=np.frombuffer(obs_shots, dtype=np.intc).astype(np.int32),
+            observation_xy=np.frombuffer(obs_xy, dtype=np.float64).reshape(-1, 2).copy(),
+        )
+
+
+@dataclass
+class TrackTable:
+    """
+    2D-3D correspondences of one reconstruction, one row per observation
+
+    Rows are sorted by shot (stable, so each image keeps the observation order),
+    which makes every image's 2D points a contiguous run: `point2d_idx` is a row's
+    position in its run and is the same index the per-point tracks refer to.
+    """
+    shot_index: np.ndarray  # (M,) index into registered shots, ascending
+    feature_index: np.ndarray  # (M,) OpenSfM feature id, -1 when unknown
+    point_index: np.ndarray  # (M,) index into SfMReconstruction.point_ids
+    xy: np.ndarray  # (M, 2) normalized OpenSfM image coordinates
+    shot_offsets: np.ndarray  # (num_shots + 1,) rows of shot s: shot_offsets[s]:shot_offsets[s + 1]
+    point2d_idx: np.ndarray  # (M,) position within the shot's run
+    point_order: np.ndarray  # (M,) rows grouped by point (stable)
+    point_offsets: np.ndarray  # (num_points + 1,) entries of point p: point_order[point_offsets[p]:point_offsets[p + 1]]
+
+    def __len__(self) -> int:
+        return len(self.shot_index)
+
+    @property
+    def track_lengths(self) -> np.ndarray:
+        return np.diff(self.point_offsets)
+
+    def point_tracks(self) -> Tuple[np.ndarray, np.ndarray]:
+        """(shot index, point2d_idx) of every observation, grouped by point (CSR by point_offsets)"""
+        return self.shot_index[self.point_order], self.point2d_idx[self.point_order]
+
+    @classmethod
+    def build(cls, shot_index: np.ndarray, point_index: np.ndarray, xy: np.ndarray,
+              feature_index: Optional[np.ndarray], num_shots: int, num_points: int) -> 'TrackTable':
+        """
+        Sort observations by shot and index them both ways
+
+        Observations of unregistered shots (index < 0 or >= num_shots) or of points
+        outside the reconstruction are dropped.
+        """
+        shot_index = np.asarray(shot_index, dtype=np.int64)
+        point_index = np.asarray(point_index, dtype=np.int64)
+        xy = np.asarray(xy, dtype=np.float64).reshape(-1, 2)
+        if feature_index is None:
+            feature_index = np.full(len(shot_index), -1, dtype=np.int64)
+        feature_index = np.asarray(feature_index, dtype=np.int64)
+
+        keep = (shot_index >= 0) & (shot_index < num_shots) & (point_index >= 0) & (point_index < num_points)
+        order = np.argsort(shot_index[keep], kind='stable')
+        shot_index = shot_index[keep][order].astype(np.int32)
+        point_index = point_index[keep][order].astype(np.int32)
+        feature_index = feature_index[keep][order].astype(np.int32)
+        xy = xy[keep][order]
+
+        shot_offsets = np.zeros(num_shots + 1, dtype=np.int64)
+        np.cumsum(np.bincount(shot_index, minlength=num_shots), out=shot_offsets[1:])
+        point2d_idx = (np.arange(len(shot_index)) - shot_offsets[shot_index]).astype(np.int32)
+
+        point_offsets = np.zeros(num_points + 1, dtype=np.int64)
+        np.cumsum(np.bincount(point_index, minlength=num_points), out=point_offsets[1:])
+        point_order = np.argsort(point_index, kind='stable')
+
+        return cls(shot_index=shot_index, feature_index=feature_index, point_index=point_index, xy=xy,
+                   shot_offsets=shot_offsets, point2d_idx=point2d_idx, point_order=point_order,
+                   point_offsets=point_offsets)
+
+    @classmethod
+    def from_reconstruction(cls, recon: SfMReconstruction) -> 'TrackTable':
+        """Track table from the observations stored with the reconstruction's points"""
+        return cls.build(recon.observation_shots, recon.observation_points, recon.observation_xy, None,
+                         recon.num_shots, recon.num_points)
+
+    @classmethod
+    def from_tracks(cls, tracks: Dict, recon: SfMReconstruction) -> 'TrackTable':
+        """
+        Track table from a tracks.json style mapping
+        {track_id: [{'shot_id': ..., 'feature': [x, y], 'feature_id': ...}, ...]}
+
+        Track ids are OpenSfM point ids; tracks without a reconstructed point are dropped.
+        """
+        point_lookup = {point_id: i for i, point_id in enumerate(recon.point_ids)}
+        shots = array('i')
+        points = array('i')
+        features = array('i')
+        xy = array('d')
+        for track_id, observations in tracks.items():
+            p_idx = point_lookup.get(str(track_id), -1)
+            if p_idx < 0 or not isinstance(observations, list):
+                continue
+            for obs in observations:
+                if not isinstance(obs, dict):
+                    continue
+                feature = obs.get('feature', [])
+                s_idx = recon.shot_index(obs.get('shot_id'))
+                if s_idx < 0 or len(feature) < 2:
+                    continue
+                shots.append(s_idx)
+                points.append(p_idx)
+                features.append(int(obs.get('feature_id', -1)))
+                xy.append(feature[0])
+                xy.append(feature[1])
+        return cls.build(np.frombuffer(shots, dtype=np.intc), np.frombuffer(points, dtype=np.intc),
+                         np.frombuffer(xy, dtype=np.float64), np.frombuffer(features, dtype=np.intc),
+                         recon.num_shots, recon.num_points)
+
+    @classmethod
+    def from_tracks_csv(cls, path: Path, recon: SfMReconstruction) -> 'TrackTable':
+        """
+        Track table from the tracks.csv written by `opensfm create_tracks`
+
+        Tab-separated rows of image, track_id, feature_id, x, y (normalized), then
+        size, color and (v3) segmentation columns, after an optional
+        OPENSFM_TRACKS_VERSION header line. Only observations of reconstructed
+        points in registered shots are kept.
+        """
+        point_lookup = {point_id: i for i, point_id in enumerate(recon.point_ids)}
+        shots = array('i')
+        points = array('i')
+        features = array('i')
+        xy = array('d')
+        with open(path, 'r') as f:
+            for line in f:
+                if line.startswith('OPENSFM_TRACKS_VERSION'):
+                    continue
+                fields = line.rstrip('\n').split('\t')
+                if len(fields) < 5:
+                    continue
+                p_idx = point_lookup.get(fields[1], -1)
+                if p_idx < 0:
+                    continue
+                s_idx = recon.shot_index(fields[0])
+                if s_idx < 0:
+                    continue
+                shots.append(s_idx)
+                points.append(p_idx)
+                features.append(int(fields[2]))
+                xy.append(float(fields[3]))
+                xy.append(float(fields[4]))
+        return cls.build(np.frombuffer(shots, dtype=np.intc), np.frombuffer(points, dtype=np.intc),
+                         np.frombuffer(xy, dtype=np.float64), np.frombuffer(features, dtype=np.intc),
+                         recon.num_shots, recon.num_points)
+
+
+class ReconstructionModel:
+    """All reconstructions of one reconstruction.json, parsed once"""
+
+    def __init__(self, reconstructions: List[SfMReconstruction], source: Optional[Path] = None):
+        self.reconstructions = reconstructions
+        self.source = source
+
+    def __len__(self) -> int:
+        return len(self.reconstructions)
+
+    @property
+    def first(self) -> Optional[SfMReconstruction]:
+        """OpenSfM writes the largest reconstruction first"""
+        return self.reconstructions[0] if self.reconstructions else None
+
+    @property
+    def largest(self) -> Optional[SfMReconstruction]:
+        """Reconstruction with the most 3D points"""
+        return max(self.reconstructions, key=lambda r: r.num_points) if self.reconstructions else None
+
+    @classmethod
+    def load(cls, path: Path, stream: Optional[bool] = None) -> 'ReconstructionModel':
+        """
+        Parse reconstruction.json into columnar reconstructions
+
+        Args:
+            path: reconstruction.json
+            stream: Stream one reconstruction at a time with ijson (default: when available)
+        """
+        path = Path(path)
+        if stream is None:
+            stream = ijson is not None
+        with open(path, 'rb') as f:
+            if stream and ijson is not None:
+                items = ijson.items(f, 'item', use_float=True)
+                reconstructions = [SfMReconstruction.from_dict(recon) for recon in items]
+            else:
+                # Drop each reconstruction's dict graph as soon as it is columnarized
+                parsed = json.load(f)
+                parsed.reverse()
+                reconstructions = []
+                while parsed:
+                    reconstructions.append(SfMReconstruction.from_dict(parsed.pop()))
+        logger.info(f"📖 Parsed {path.name}: {len(reconstructions)} reconstruction(s), "
+                    f"{sum(r.num_shots for r in reconstructions)} shots, "
+                    f"{sum(r.num_points for r in reconstructions)} points"
+                    f"{' (streamed)' if stream and ijson is not None else ''}")
+        return cls(reconstructions, source=path)
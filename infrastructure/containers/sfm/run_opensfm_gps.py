@@ -13,7 +13,6 @@ import tempfile
 from pathlib import Path
 from typing import Dict, List, Tuple
 import logging
-import zipfile
 import yaml
 import time
 
@@ -26,8 +25,11 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 # Import our GPS processors
 from gps_processor import DroneFlightPathProcessor
-from gps_processor_3d import Advanced3DPathProcessor
+from gps_processor_3d import Advanced3DPathProcessor, scan_photo_exif
 from colmap_converter import OpenSfMToCOLMAPConverter
+from image_staging import ImageStager, extract_image_archive
+from reconstruction_model import ReconstructionModel
+from stage_runner import OpenSfMStage, StageRunner
 
 
 def log_memory_usage(stage: str) -> None:
@@ -76,6 +78,9 @@ def log_memory_usage(stage: str) -> None:
 class OpenSfMGPSPipeline:
     """Main pipeline for GPS-enhanced OpenSfM processing"""
     
+    # Stock match_features only runs after a failed two-tier attempt if this much of the budget is left
+    MIN_MATCH_FALLBACK_SECONDS = 300
+    
     def __init__(self, input_dir: Path, output_dir: Path, gps_csv_path: Path = None):
         """
         Initialize OpenSfM GPS pipeline
@@ -94,6 +99,12 @@ class OpenSfMGPSPipeline:
         self.has_gps_priors = False
         self.image_count = 0
         self.feature_stats = {}
+        # Images are materialized once; other consumers get hardlinks/reflinks
+        self.stager = ImageStager()
+        # reconstruction.json parsed once, shared by validation, metadata and conversion
+        self.reconstruction_model = None
+        # Completed OpenSfM stages are recorded (and optionally checkpointed) for resume
+        self.stage_runner = None
 
         # Ensure output directory exists
         self.output_dir.mkdir(parents=True, exist_ok=True)
@@ -122,19 +133,15 @@ class OpenSfMGPSPipeline:
             zip_path = zip_files[0]
             logger.info(f"📦 Extracting ZIP: {zip_path}")
             
-            with zipfile.ZipFile(zip_path, 'r') as zf:
-                for member in zf.namelist():
-                    if member.lower().endswith(('.jpg', '.jpeg', '.png')):
-                        # Extract to images directory
-                        target_path = self.images_dir / Path(member).name
-                        with zf.open(member) as source, open(target_path, 'wb') as target:
-                            target.write(source.read())
-                        image_count += 1
+            # Stream members to disk in parallel; warm the EXIF memo as each image lands
+            on_image = scan_photo_exif if os.environ.get("SFM_EARLY_EXIF_SCAN", "1") != "0" else None
+            extracted = extract_image_archive(zip_path, self.images_dir, on_image=on_image)
+            image_count = len(extracted)
         else:
             # Copy images from input directory
             for img_path in self.input_dir.rglob('*'):
                 if img_path.suffix.lower() in ['.jpg', '.jpeg', '.png']:
-                    shutil.copy2(img_path, self.images_dir / img_path.name)
+                    self.stager.stage(img_path, self.images_dir / img_path.name)
                     image_count += 1
         
         logger.info(f"📷 Extracted {image_count} images")
@@ -271,79 +278,118 @@ class OpenSfMGPSPipeline:
             pass
     
     def copy_images_to_opensfm(self) -> None:
-        """Copy images to OpenSfM directory structure"""
+        """Stage images into the OpenSfM directory structure (hardlink/reflink, copy as fallback)"""
         opensfm_images = self.opensfm_dir / "images"
         if opensfm_images.exists():
             shutil.rmtree(opensfm_images)
-        shutil.copytree(self.images_dir, opensfm_images)
-        logger.info(f"✅ Copied {len(list(opensfm_images.iterdir()))} images to OpenSfM")
+        staged = self.stager.stage_tree(self.images_dir, opensfm_images)
+        logger.info(f"✅ Staged {staged} images to OpenSfM ({self.stager.summary()})")
     
     def run_opensfm_commands(self) -> bool:
-        """Run OpenSfM reconstruction pipeline"""
-        commands = [
-            ("extract_metadata", "Extract image metadata"),
-            ("detect_features", "Detect features"),
-            ("match_features", "Match features"),
-            ("create_tracks", "Create tracks"),
-            ("reconstruct", "Reconstruct 3D structure"),
-            ("export_colmap", "Export tracks to COLMAP format"),
-        ]
-        
-        for cmd, description in commands:
-            logger.info(f"🔧 {description}...")
-            log_memory_usage(f"before_{cmd}")
-            
-            try:
-                if cmd in {"match_features", "reconstruct"}:
-                    # Stream output and enforce a max duration for reconstruct to detect hangs
-                    max_seconds = 7200 if cmd == "reconstruct" else 2400  # reconstruct up to 120m, match up to 40m
-                    proc = subprocess.Popen(
-                        ["opensfm", cmd, str(self.opensfm_dir)],
-                        stdout=subprocess.PIPE,
-                        stderr=subprocess.STDOUT,
-                        text=True,
-                    )
-                    start = time.time()
-                    last_log = start
-                    while True:
-                        line = proc.stdout.readline()
-                        if line:
-                            line = line.rstrip()
-                            tag = "RECONSTRUCT" if cmd == "reconstruct" else "MATCH"
-                            print(f"OPENSFM_{tag}: {line}", flush=True)
-                        now = time.time()
-                        if now - last_log > 300:  # heartbeat every 5 minutes
-                            log_memory_usage(f"{cmd}_heartbeat_{int(now-start)}s")
-                            last_log = now
-                        if now - start > max_seconds:
-                            proc.kill()
-                            logger.error(f"❌ OpenSfM {cmd} timed out")
-                            return False
-                        if line == '' and proc.poll() is not None:
-                            break
-                    ret = proc.wait()
-                    if ret != 0:
-                        logger.error(f"❌ OpenSfM {cmd} failed with code {ret}")
-                        return False
-                else:
-                    subprocess.run(
-                        ["opensfm", cmd, str(self.opensfm_dir)],
-                        check=True,
-                        stdout=subprocess.PIPE,
-                        stderr=subprocess.PIPE,
-                        text=True,
-                    )
+        """Run OpenSfM reconstruction pipeline (stages completed earlier with the same inputs are skipped)"""
+        self.stage_runner = StageRunner(self.opensfm_dir)
+        if self.stage_runner.checkpoint_dir:
+            logger.info(f"📒 Checkpointing OpenSfM stages to {self.stage_runner.checkpoint_dir}")
+        if self.stage_runner.restore_dir:
+            logger.info(f"📒 Restoring OpenSfM stages from {self.stage_runner.restore_dir}")
+        return self.stage_runner.run(self._run_opensfm_stage)
+    
+    def _run_opensfm_stage(self, stage: OpenSfMStage) -> bool:
+        """Run one OpenSfM command"""
+        cmd, description = stage.name, stage.description
+        two_tier_enabled = os.environ.get("SFM_TWO_TIER_MATCHING", "1") != "0"
 
-                logger.info(f"✅ {description} completed")
-                log_memory_usage(f"after_{cmd}")
-                
-            except subprocess.CalledProcessError as e:
-                logger.error(f"❌ OpenSfM {cmd} failed:")
-                logger.error(f"   stdout: {e.stdout}")
-                logger.error(f"   stderr: {e.stderr}")
-                return False
+        logger.info(f"🔧 {description}...")
+        log_memory_usage(f"before_{cmd}")
         
-        return True
+        try:
+            if cmd in {"match_features", "reconstruct"}:
+                # Stream output and enforce a max duration for reconstruct to detect hangs
+                max_seconds = 7200 if cmd == "reconstruct" else 2400  # reconstruct up to 120m, match up to 40m
+                argv = ["opensfm", cmd, str(self.opensfm_dir)]
+                if cmd == "match_features" and two_tier_enabled:
+                    # Coarse pair gate first; full-density matching only for survivors
+                    two_tier_argv = [sys.executable, str(Path(__file__).with_name("two_tier_matching.py")),
+                                     str(self.opensfm_dir)]
+                    two_tier_start = time.time()
+                    ret = self._stream_command(two_tier_argv, cmd, max_seconds)
+                    if ret is None:
+                        return False
+                    if ret == 0:
+                        logger.info(f"✅ {description} completed (two-tier)")
+                        log_memory_usage(f"after_{cmd}")
+                        return True
+                    # The fallback shares the stage's time limit with the failed two-tier attempt
+                    max_seconds -= int(time.time() - two_tier_start)
+                    if max_seconds < self.MIN_MATCH_FALLBACK_SECONDS:
+                        logger.error(f"❌ Two-tier matching failed (code {ret}) with only {max(max_seconds, 0)}s "
+                                     f"of the {cmd} time limit left; not falling back to opensfm {cmd}")
+                        return False
+                    logger.warning(f"⚠️ Two-tier matching failed (code {ret}); falling back to opensfm {cmd} "
+                                   f"with the remaining {max_seconds}s")
+                ret = self._stream_command(argv, cmd, max_seconds)
+                if ret is None:
+                    return False
+                if ret != 0:
+                    logger.error(f"❌ OpenSfM {cmd} failed with code {ret}")
+                    return False
+            else:
+                subprocess.run(
+                    ["opensfm", cmd, str(self.opensfm_dir)],
+                    check=True,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.PIPE,
+                    text=True,
+                )
+
+            logger.info(f"✅ {description} completed")
+            log_memory_usage(f"after_{cmd}")
+            return True
+            
+        except subprocess.CalledProcessError as e:
+            logger.error(f"❌ OpenSfM {cmd} failed:")
+            logger.error(f"   stdout: {e.stdout}")
+            logger.error(f"   stderr: {e.stderr}")
+            return False
+    
+    def _stream_command(self, argv: List[str], cmd: str, max_seconds: int):
+        """
+        Run a long OpenSfM stage, streaming its output with memory heartbeats
+
+        Returns:
+            Process exit code, or None if the stage timed out and was killed
+        """
+        proc = subprocess.Popen(
+            argv,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+        )
+        start = time.time()
+        last_log = start
+        while True:
+            line = proc.stdout.readline()
+            if line:
+                line = line.rstrip()
+                tag = "RECONSTRUCT" if cmd == "reconstruct" else "MATCH"
+                print(f"OPENSFM_{tag}: {line}", flush=True)
+            now = time.time()
+            if now - last_log > 300:  # heartbeat every 5 minutes
+                log_memory_usage(f"{cmd}_heartbeat_{int(now-start)}s")
+                last_log = now
+            if now - start > max_seconds:
+                proc.kill()
+                logger.error(f"❌ OpenSfM {cmd} timed out")
+                return None
+            if line == '' and proc.poll() is not None:
+                break
+        return proc.wait()
+    
+    def load_reconstruction_model(self) -> ReconstructionModel:
+        """Parse reconstruction.json once; later callers get the same model"""
+        if self.reconstruction_model is None:
+            self.reconstruction_model = ReconstructionModel.load(self.opensfm_dir / "reconstruction.json")
+        return self.reconstruction_model
     
     def validate_reconstruction(self) -> bool:
         """Validate OpenSfM reconstruction quality"""
@@ -353,26 +399,24 @@ class OpenSfMGPSPipeline:
             logger.error("❌ No reconstruction file found")
             return False
         
-        with open(reconstruction_file, 'r') as f:
-            reconstructions = json.load(f)
+        model = self.load_reconstruction_model()
         
-        if not reconstructions:
+        if not len(model):
             logger.error("❌ Empty reconstruction")
             return False
         
         # Get the largest reconstruction
-        recon = max(reconstructions, key=lambda r: len(r.get('points', {})))
+        recon = model.largest
         
-        shots_dict = recon.get('shots', {})
-        num_cameras = len(shots_dict)
-        num_points = len(recon.get('points', {}))
+        num_cameras = recon.num_shots
+        num_points = recon.num_points
         
         logger.info(f"📊 Reconstruction statistics:")
         logger.info(f"   Cameras: {num_cameras}")
         logger.info(f"   3D points: {num_points}")
         
         # Log which images were registered (first 20 for brevity)
-        registered_images = list(shots_dict.keys())
+        registered_images = recon.registered_shots
         logger.info(f"   Registered images (showing up to 20): {registered_images[:20]}")
         
         # Determine unregistered images for debugging
@@ -541,7 +585,8 @@ class OpenSfMGPSPipeline:
             
             # Fallback to custom converter
             logger.info("🔄 Using custom OpenSfM to COLMAP converter")
-            converter = OpenSfMToCOLMAPConverter(self.opensfm_dir, self.output_dir)
+            model = self.load_reconstruction_model() if (self.opensfm_dir / "reconstruction.json").exists() else None
+            converter = OpenSfMToCOLMAPConverter(self.opensfm_dir, self.output_dir, stager=self.stager, model=model)
             validation_results = converter.convert()
             
             # Log conversion results
@@ -558,17 +603,16 @@ class OpenSfMGPSPipeline:
             return False
     
     def copy_images_for_3dgs(self) -> None:
-        """Copy images to output directory for 3DGS training"""
+        """Stage images into the output directory for 3DGS training"""
         output_images_dir = self.output_dir / "images"
         
         if output_images_dir.exists():
             shutil.rmtree(output_images_dir)
         
-        # Copy images from extracted directory
-        shutil.copytree(self.images_dir, output_images_dir)
-        
-        image_count = len(list(output_images_dir.iterdir()))
-        logger.info(f"✅ Copied {image_count} images to output directory for 3DGS training")
+        # Link images from extracted directory (copy only across filesystems without reflink)
+        image_count = self.stager.stage_tree(self.images_dir, output_images_dir)
+        logger.info(f"✅ Staged {image_count} images to output directory for 3DGS training")
+        logger.info(f"   Image staging totals: {self.stager.summary()}")
     
     def generate_metadata_json(self) -> None:
         """Generate metadata JSON file with processing statistics"""
@@ -579,19 +623,17 @@ class OpenSfMGPSPipeline:
             logger.warning("⚠️ No reconstruction file found for metadata generation")
             return
         
-        with open(reconstruction_file, 'r') as f:
-            reconstructions = json.load(f)
+        model = self.load_reconstruction_model()
         
-        if not reconstructions:
+        if not len(model):
             logger.warning("⚠️ Empty reconstruction for metadata generation")
             return
         
         # Get the largest reconstruction
-        recon = max(reconstructions, key=lambda r: len(r.get('points', {})))
+        recon = model.largest
         
-        shots_dict = recon.get('shots', {})
-        num_cameras = len(shots_dict)
-        num_points = len(recon.get('points', {}))
+        num_cameras = recon.num_shots
+        num_points = recon.num_points
         
         # Calculate processing time (approximate)
         processing_time = time.time() - getattr(self, '_start_time', time.time())
@@ -606,6 +648,8 @@ class OpenSfMGPSPipeline:
             'gps_enhanced': hasattr(self, 'gps_csv_path') and self.gps_csv_path is not None,
             'quality_check_passed': num_points >= 1000,
             'colmap_format': True,
+            'opensfm_stages_run': self.stage_runner.executed if self.stage_runner else [],
+            'opensfm_stages_reused': self.stage_runner.skipped if self.stage_runner else [],
             'timestamp': time.strftime('%Y-%m-%d %H:%M:%S UTC', time.gmtime())
         }
         
@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Checkpointed, Resumable OpenSfM Stage Runner
+Records every completed OpenSfM stage and skips it on restart when its inputs are unchanged
+
+OpenSfM runs as a chain of commands (extract_metadata → detect_features →
+match_features → create_tracks → reconstruct → export_colmap), each reading the
+previous stages' artifacts from the dataset directory. A timeout or spot
+interruption late in the chain used to throw away hours of feature extraction
+and matching. This runner:
+
+1. Hashes each stage's inputs: the previous stage's hash, the dataset files the
+   stage reads (images, config.yaml, GPS overrides, ...) and the environment
+   knobs that change its output. Hashes are computed once, before anything runs.
+2. Writes stage_manifest.json in the dataset after every completed stage
+   (input hash, duration, output artifacts).
+3. Mirrors each stage's artifacts and the manifest to a checkpoint directory,
+   and restores them from there (or from a read-only restore directory) on restart.
+4. Skips a stage whose recorded hash matches and whose outputs are present (or
+   restorable); once any stage runs, every later stage runs too.
+
+Images are fingerprinted by name, size and the first IMAGE_FINGERPRINT_BYTES of
+content (which include the EXIF block), so a restarted job that re-extracts the
+same upload gets the same hashes.
+
+In the SageMaker job the checkpoint directory is a processing output uploaded
+continuously to an S3 prefix keyed by the upload, so it survives the container.
+A restarted job for the same upload gets that prefix back as a processing input
+mounted at the restore directory (start_ml_job only adds the input once the
+prefix has objects).
+
+Environment:
+    SFM_CHECKPOINT_DIR           Directory to mirror stage artifacts to and restore from
+                                 (default: /opt/ml/processing/checkpoint when the job mounts it)
+    SFM_CHECKPOINT_RESTORE_DIR   Read-only artifacts of an earlier run to restore from
+                                 (default: /opt/ml/processing/checkpoint_restore when mounted)
+    SFM_RESUME                   '0' to ignore the manifest and run every stage
+"""
+
+import os
+import json
+import shutil
+import hashlib
+import logging
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "stage_manifest.json"
+MANIFEST_VERSION = 1
+IMAGE_FINGERPRINT_BYTES = 64 * 1024
+DEFAULT_CHECKPOINT_DIR = Path("/opt/ml/processing/checkpoint")
+DEFAULT_RESTORE_DIR = Path("/opt/ml/processing/checkpoint_restore")
+
+
+@dataclass(frozen=True)
+class OpenSfMStage:
+    """One OpenSfM command and the dataset paths it reads and writes"""
+    name: str
+    description: str
+    outputs: Tuple[str, ...]  # Dataset-relative files/directories the stage produces
+    inputs: Tuple[str, ...] = ()  # Dataset-relative files/directories read besides earlier outputs
+    env: Tuple[str, ...] = ()  # Environment variables that change the stage's output
+
+
+OPENSFM_STAGES = (
+    OpenSfMStage("extract_metadata", "Extract image metadata", outputs=("exif", "camera_models.json"),
+                 inputs=("images", "config.yaml", "exif_overrides.json", "camera_models_overrides.json",
+                         "gps_list.txt", "gps_priors.json", "reference_lla.json", "reference.txt")),
+    OpenSfMStage("detect_features", "Detect features", outputs=("features",)),
+    OpenSfMStage("match_features", "Match features", outputs=("matches",),
+                 env=("SFM_TWO_TIER_MATCHING", "SFM_COARSE_FEATURES", "SFM_COARSE_MIN_INLIERS",
+                      "SFM_COARSE_MIN_PAIRS")),
+    OpenSfMStage("create_tracks", "Create tracks", outputs=("tracks.csv",)),
+    OpenSfMStage("reconstruct", "Reconstruct 3D structure", outputs=("reconstruction.json",)),
+    OpenSfMStage("export_colmap", "Export tracks to COLMAP format", outputs=("colmap_export",)),
+)
+
+
+def _hash_file(digest, path: Path, limit: Optional[int] = None) -> None:
+    """Feed a file's size and (up to `limit` bytes of) content into `digest`"""
+    digest.update(str(path.stat().st_size).encode())
+    with open(path, 'rb') as f:
+        if limit is not None:
+            digest.update(f.read(limit))
+            return
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+
+
+def fingerprint_path(path: Path, limit: Optional[int] = None) -> str:
+    """
+    Content fingerprint of a file or directory tree ('' if it does not exist)
+
+    Args:
+        limit: Only hash the first `limit` bytes of each file (sizes are always included)
+    """
+    path = Path(path)
+    if not path.exists():
+        return ''
+    digest = hashlib.sha256()
+    if path.is_file():
+        _hash_file(digest, path, limit)
+        return digest.hexdigest()
+    for file in sorted(p for p in path.rglob('*') if p.is_file()):
+        digest.update(file.relative_to(path).as_posix().encode() + b'\0')
+        _hash_file(digest, file, limit)
+    return digest.hexdigest()
+
+
+def _copy_path(src: Path, dst: Path) -> None:
+    """Copy a file or directory tree over `dst`"""
+    if src.is_dir():
+        shutil.copytree(src, dst, dirs_exist_ok=True)
+    else:
+        dst.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copy2(src, dst)
+
+
+def _default_dir(env_var: str, mounted: Path) -> Optional[Path]:
+    """Directory named by `env_var`, else `mounted` when the processing job provides it"""
+    if os.environ.get(env_var):
+        return Path(os.environ[env_var])
+    return mounted if mounted.is_dir() else None
+
+
+class StageRunner:
+    """Run OpenSfM stages in order, skipping those already completed with the same inputs"""
+
+    def __init__(self, dataset_dir: Path, stages: Iterable[OpenSfMStage] = OPENSFM_STAGES,
+                 checkpoint_dir: Optional[Path] = None, restore_dir: Optional[Path] = None,
+                 resume: Optional[bool] = None):
+        """
+        Args:
+            dataset_dir: OpenSfM dataset directory
+            stages: Stages in execution order
+            checkpoint_dir: Where artifacts are mirrored/restored (defaults to SFM_CHECKPOINT_DIR,
+                then DEFAULT_CHECKPOINT_DIR if it exists)
+            restore_dir: Extra read-only source of artifacts (defaults to SFM_CHECKPOINT_RESTORE_DIR,
+                then DEFAULT_RESTORE_DIR if it exists)
+            resume: Skip unchanged stages (defaults to SFM_RESUME != '0')
+        """
+        self.dataset_dir = Path(dataset_dir)
+        self.stages = tuple(stages)
+        if checkpoint_dir is None:
+            checkpoint_dir = _default_dir('SFM_CHECKPOINT_DIR', DEFAULT_CHECKPOINT_DIR)
+        if restore_dir is None:
+            restore_dir = _default_dir('SFM_CHECKPOINT_RESTORE_DIR', DEFAULT_RESTORE_DIR)
+        self.checkpoint_dir = Path(checkpoint_dir) if checkpoint_dir else None
+        self.restore_dir = Path(restore_dir) if restore_dir else None
+        self.resume = os.environ.get('SFM_RESUME', '1') != '0' if resume is None else resume
+        self.manifest: Dict = {'version': MANIFEST_VERSION, 'stages': {}}
+        self.skipped = []
+        self.executed = []
+
+    @property
+    def manifest_path(self) -> Path:
+        return self.dataset_dir / MANIFEST_NAME
+
+    @property
+    def restore_sources(self) -> Tuple[Path, ...]:
+        """Directories stage outputs can be restored from, most recent first"""
+        return tuple(d for d in (self.checkpoint_dir, self.restore_dir) if d is not None)
+
+    def compute_input_hashes(self) -> Dict[str, str]:
+        """Chained input hash per stage, from the dataset as it is before any stage runs"""
+        hashes = {}
+        previous = ''
+        for stage in self.stages:
+            digest = hashlib.sha256(f"{MANIFEST_VERSION}:{stage.name}:{previous}".encode())
+            for rel in stage.inputs:
+                limit = IMAGE_FINGERPRINT_BYTES if rel == 'images' else None
+                digest.update(f"{rel}={fingerprint_path(self.dataset_dir / rel, limit)}\n".encode())
+            for var in stage.env:
+                digest.update(f"{var}={os.environ.get(var, '')}\n".encode())
+            previous = hashes[stage.name] = digest.hexdigest()
+        return hashes
+
+    def load_manifest(self) -> Dict:
+        """Completed-stage records from the dataset, else from the checkpoint/restore directories"""
+        for path in (self.manifest_path, *(d / MANIFEST_NAME for d in self.restore_sources)):
+            if path.exists():
+                try:
+                    with open(path) as f:
+                        manifest = json.load(f)
+                    if manifest.get('version') == MANIFEST_VERSION:
+                        logger.info(f"📒 Loaded stage manifest from {path}")
+                        return manifest
+                    logger.warning(f"⚠️ Ignoring stage manifest {path} (version {manifest.get('version')})")
+                except (OSError, ValueError) as e:
+                    logger.warning(f"⚠️ Unreadable stage manifest {path}: {e}")
+        return {'version': MANIFEST_VERSION, 'stages': {}}
+
+    def save_manifest(self) -> None:
+        """Write the manifest to the dataset (and the checkpoint directory)"""
+        tmp_path = self.manifest_path.with_suffix('.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(self.manifest, f, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+        if self.checkpoint_dir is not None:
+            self.checkpoint_dir.mkdir(parents=True, exist_ok=True)
+            shutil.copy2(self.manifest_path, self.checkpoint_dir / MANIFEST_NAME)
+
+    def _outputs_available(self, stage: OpenSfMStage) -> bool:
+        """Make the stage's outputs present in the dataset, restoring from the checkpoint if needed"""
+        missing = [rel for rel in stage.outputs if not (self.dataset_dir / rel).exists()]
+        if not missing:
+            return True
+        for source in self.restore_sources:
+            if all((source / rel).exists() for rel in missing):
+                for rel in missing:
+                    _copy_path(source / rel, self.dataset_dir / rel)
+                logger.info(f"♻️ Restored {', '.join(missing)} from checkpoint {source}")
+                return True
+        return False
+
+    def _checkpoint_outputs(self, stage: OpenSfMStage) -> None:
+        """Mirror the stage's outputs to the checkpoint directory"""
+        if self.checkpoint_dir is None:
+            return
+        for rel in stage.outputs:
+            src = self.dataset_dir / rel
+            if not src.exists():
+                continue
+            dst = self.checkpoint_dir / rel
+            if dst.is_dir():
+                shutil.rmtree(dst)  # Drop artifacts of an earlier run with other inputs
+            _copy_path(src, dst)
+
+    def run(self, run_stage: Callable[[OpenSfMStage], bool]) -> bool:
+        """
+        Run every stage that is not already complete
+
+        Args:
+            run_stage: Executes one stage, returns True on success
+
+        Returns:
+            True when every stage completed (run now or earlier)
+        """
+        hashes = self.compute_input_hashes()
+        previous = self.load_manifest() if self.resume else {'stages': {}}
+        self.manifest = {'version': MANIFEST_VERSION, 'stages': {}}
+        rerun_rest = False
+
+        for stage in self.stages:
+            record = previous['stages'].get(stage.name)
+            if (not rerun_rest and record and record.get('input_hash') == hashes[stage.name]
+                    and self._outputs_available(stage)):
+                logger.info(f"⏭️ {stage.description}: unchanged inputs, reusing outputs "
+                            f"(completed in {record.get('duration_s', 0):.0f}s)")
+                self.manifest['stages'][stage.name] = record
+                self.skipped.append(stage.name)
+                continue
+
+            # Later stages consumed this stage's old outputs, so they run again too
+            rerun_rest = True
+            self.save_manifest()
+            start = time.time()
+            if not run_stage(stage):
+                return False
+            self._checkpoint_outputs(stage)
+            self.manifest['stages'][stage.name] = {
+                'input_hash': hashes[stage.name],
+                'completed_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+                'duration_s': round(time.time() - start, 1),
+                'outputs': [rel for rel in stage.outputs if (self.dataset_dir / rel).exists()],
+            }
+            self.executed.append(stage.name)
+            self.save_manifest()
+
+        logger.info(f"📒 OpenSfM stages: {len(self.executed)} run, {len(self.skipped)} reused "
+                    f"({', '.join(self.skipped) or 'none'})")
+        return True
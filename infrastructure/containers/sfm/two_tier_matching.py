@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Two-Tier Coarse-to-Fine Feature Matching for OpenSfM
+Drop-in replacement for `opensfm match_features` that rejects weak pairs early
+
+Most GPS-neighbor candidate pairs end up with too few inliers to matter, yet
+`match_features` matches every one of them at full feature density. This
+runner matches in two tiers:
+
+1. COARSE: each candidate pair is tested with only the strongest features per
+   image (largest SIFT scale), a ratio test and a RANSAC fundamental-matrix check
+2. FINE: OpenSfM's full-density matcher runs only on pairs that passed
+
+Matches are saved through OpenSfM's own API, so create_tracks and reconstruct
+see exactly the same on-disk layout as after `opensfm match_features`.
+
+Usage:
+    python3 two_tier_matching.py <opensfm_dataset_dir>
+
+Environment:
+    SFM_COARSE_FEATURES       Strongest features per image for the coarse tier (default 512)
+    SFM_COARSE_MIN_INLIERS    RANSAC inliers needed to pass the coarse tier (default 15)
+    SFM_COARSE_MIN_PAIRS      Best pairs every image keeps regardless of the gate (default 2)
+"""
+
+import os
+import sys
+import json
+import logging
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CoarseFeatures:
+    """Strongest features of one image (normalized image coordinates)"""
+    points: np.ndarray       # (n, 2) float32
+    descriptors: np.ndarray  # (n, d) float32
+
+
+@dataclass
+class CoarseResult:
+    """Outcome of the coarse tier for one candidate pair"""
+    pair: Tuple[str, str]
+    passed: bool
+    ratio_matches: int
+    inliers: int
+
+
+def select_strongest(points: np.ndarray, descriptors: np.ndarray, count: int) -> CoarseFeatures:
+    """
+    Keep the `count` strongest features, ranked by detection scale.
+
+    OpenSfM stores features as (x, y, size, angle) rows. Large-scale SIFT
+    keypoints are the most repeatable across viewpoints, which makes them
+    the best cheap predictors of whether a pair will match at all.
+    """
+    points = np.asarray(points)
+    descriptors = np.asarray(descriptors, dtype=np.float32)
+    if len(points) > count:
+        order = np.argsort(-points[:, 2], kind='stable')[:count]
+        points, descriptors = points[order], descriptors[order]
+    return CoarseFeatures(
+        points=np.ascontiguousarray(points[:, :2], dtype=np.float32),
+        descriptors=np.ascontiguousarray(descriptors),
+    )
+
+
+def coarse_pair_check(f1: CoarseFeatures, f2: CoarseFeatures, min_inliers: int,
+                      ratio: float = 0.8, ransac_threshold: float = 0.006) -> Tuple[bool, int, int]:
+    """
+    Cheap geometric verification on the coarse feature subsets.
+
+    Args:
+        f1, f2: Coarse features of the two images
+        min_inliers: Fundamental-matrix inliers required to pass
+        ratio: Lowe ratio-test threshold
+        ransac_threshold: RANSAC epipolar distance (normalized image units)
+
+    Returns:
+        (passed, ratio-test matches, RANSAC inliers)
+    """
+    import cv2
+
+    if len(f1.descriptors) < 2 or len(f2.descriptors) < 2:
+        return False, 0, 0
+
+    matcher = cv2.BFMatcher(cv2.NORM_L2)
+    knn = matcher.knnMatch(f1.descriptors, f2.descriptors, k=2)
+    good = [m for m, n in (pair for pair in knn if len(pair) == 2) if m.distance < ratio * n.distance]
+    if len(good) < max(min_inliers, 8):  # 8-point minimum for a fundamental matrix
+        return False, len(good), 0
+
+    p1 = f1.points[[m.queryIdx for m in good]]
+    p2 = f2.points[[m.trainIdx for m in good]]
+    _, mask = cv2.findFundamentalMat(p1, p2, cv2.FM_RANSAC, ransac_threshold, 0.99)
+    inliers = int(mask.sum()) if mask is not None else 0
+    return inliers >= min_inliers, len(good), inliers
+
+
+def rescue_isolated_images(results: List[CoarseResult], min_pairs: int) -> int:
+    """
+    Ensure every image keeps at least `min_pairs` candidate pairs.
+
+    A strict gate can orphan an image whose pairs are all individually weak;
+    such images keep their best-scoring pairs so the fine tier can still try.
+
+    Returns:
+        Number of rejected pairs restored
+    """
+    kept = defaultdict(int)
+    for result in results:
+        if result.passed:
+            for image in result.pair:
+                kept[image] += 1
+
+    restored = 0
+    for result in sorted(results, key=lambda r: (r.inliers, r.ratio_matches), reverse=True):
+        if result.passed:
+            continue
+        if any(kept[image] < min_pairs for image in result.pair):
+            result.passed = True
+            restored += 1
+            for image in result.pair:
+                kept[image] += 1
+    return restored
+
+
+class TwoTierMatcher:
+    """Coarse pair gate in front of OpenSfM's full-density matcher"""
+
+    def __init__(self, dataset_dir: Path, coarse_features: int = 512, min_inliers: int = 15,
+                 min_pairs_per_image: int = 2):
+        """
+        Initialize two-tier matcher
+
+        Args:
+            dataset_dir: OpenSfM dataset directory (config.yaml, features/)
+            coarse_features: Strongest features per image used by the coarse tier
+            min_inliers: RANSAC inliers needed to pass the coarse tier
+            min_pairs_per_image: Best pairs each image keeps regardless of the gate
+        """
+        from opensfm import dataset
+
+        self.data = dataset.DataSet(str(dataset_dir))
+        self.coarse_features = coarse_features
+        self.min_inliers = min_inliers
+        self.min_pairs_per_image = min_pairs_per_image
+        self.processes = max(1, int(self.data.config.get('processes', 1)))
+
+    def _load_coarse(self, image: str) -> Optional[CoarseFeatures]:
+        features = self.data.load_features(image)
+        if features is None:
+            return None
+        if isinstance(features, tuple):  # Older OpenSfM: (points, descriptors, colors, ...)
+            points, descriptors = features[0], features[1]
+        else:
+            points, descriptors = features.points, features.descriptors
+        if points is None or descriptors is None or len(points) == 0:
+            return None
+        return select_strongest(points, descriptors, self.coarse_features)
+
+    def coarse_filter(self, pairs: List[Tuple[str, str]]) -> List[CoarseResult]:
+        """Run the coarse tier over all candidate pairs."""
+        images = sorted({image for pair in pairs for image in pair})
+        with ThreadPoolExecutor(max_workers=self.processes) as pool:
+            coarse = dict(zip(images, pool.map(self._load_coarse, images)))
+
+        def check(pair: Tuple[str, str]) -> CoarseResult:
+            f1, f2 = coarse.get(pair[0]), coarse.get(pair[1])
+            if f1 is None or f2 is None:
+                # No features to judge by: let the full matcher decide
+                return CoarseResult(pair, True, 0, 0)
+            passed, ratio_matches, inliers = coarse_pair_check(f1, f2, self.min_inliers)
+            return CoarseResult(pair, passed, ratio_matches, inliers)
+
+        # OpenCV releases the GIL, so threads scale across cores
+        with ThreadPoolExecutor(max_workers=self.processes) as pool:
+            return list(pool.map(check, pairs))
+
+    def run(self) -> Dict:
+        """Select candidates, gate them coarsely, match survivors and save matches."""
+        from opensfm import matching, pairs_selection
+
+        start = time.time()
+        images = self.data.images()
+        exifs = {image: self.data.load_exif(image) for image in images}
+        candidates, candidates_report = pairs_selection.match_candidates_from_metadata(
+            images, images, exifs, self.data, {}
+        )
+        candidate_pairs = list(candidates.keys()) if isinstance(candidates, dict) else list(candidates)
+        logger.info(f"🔎 {len(candidate_pairs)} candidate pairs for {len(images)} images")
+
+        coarse_start = time.time()
+        results = self.coarse_filter(candidate_pairs)
+        restored = rescue_isolated_images(results, self.min_pairs_per_image)
+        coarse_time = time.time() - coarse_start
+
+        passed = [r.pair for r in results if r.passed]
+        rejected = len(candidate_pairs) - len(passed)
+        if isinstance(candidates, dict):
+            fine_candidates = {pair: candidates[pair] for pair in passed}
+        else:
+            fine_candidates = passed
+
+        fine_start = time.time()
+        pairs_matches = matching.match_images_with_pairs(self.data, {}, exifs, fine_candidates)
+        fine_time = time.time() - fine_start
+        matching.save_matches(self.data, images, pairs_matches)
+
+        # Time saved: rejected pairs at the measured full-density cost, minus the coarse tier
+        per_pair_fine = fine_time / len(passed) if passed else 0.0
+        time_saved = rejected * per_pair_fine - coarse_time
+        rejection_rate = rejected / len(candidate_pairs) if candidate_pairs else 0.0
+
+        report = {
+            'wall_time': time.time() - start,
+            'num_pairs': len(passed),
+            'pairs': candidates_report,
+            'two_tier': {
+                'candidate_pairs': len(candidate_pairs),
+                'passed_pairs': len(passed),
+                'rejected_pairs': rejected,
+                'restored_pairs': restored,
+                'rejection_rate': round(rejection_rate, 4),
+                'coarse_features': self.coarse_features,
+                'min_inliers': self.min_inliers,
+                'coarse_time_s': round(coarse_time, 2),
+                'fine_time_s': round(fine_time, 2),
+                'estimated_time_saved_s': round(time_saved, 2),
+            },
+        }
+        self.data.save_report(json.dumps(report, indent=2), "matches.json")
+
+        logger.info(f"✅ Two-tier matching: {len(passed)}/{len(candidate_pairs)} pairs passed "
+                    f"({rejection_rate * 100:.1f}% rejected, {restored} restored for connectivity)")
+        logger.info(f"⏱️ Coarse {coarse_time:.1f}s + fine {fine_time:.1f}s, "
+                    f"≈{time_saved:.1f}s saved vs full-density matching of every pair")
+        print(f"TWO_TIER_MATCHING candidates={len(candidate_pairs)} passed={len(passed)} "
+              f"rejection_rate={rejection_rate:.3f} coarse_s={coarse_time:.1f} fine_s={fine_time:.1f} "
+              f"saved_s={time_saved:.1f}", flush=True)
+        return report
+
+
+def main():
+    if len(sys.argv) != 2:
+        print("Usage: python3 two_tier_matching.py <opensfm_dataset_dir>")
+        sys.exit(2)
+
+    matcher = TwoTierMatcher(
+        Path(sys.argv[1]),
+        coarse_features=int(os.environ.get('SFM_COARSE_FEATURES', 512)),
+        min_inliers=int(os.environ.get('SFM_COARSE_MIN_INLIERS', 15)),
+        min_pairs_per_image=int(os.environ.get('SFM_COARSE_MIN_PAIRS', 2)),
+    )
+    matcher.run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,497 @@
+"""
+Terrain elevation layer for the drone path Lambda.
+
+Caches (DEM tile grid, proximity index), the pooled HTTP session and the
+pluggable elevation providers live here, apart from the planning engine.
+
+COLD START:
+    Nothing heavy is imported at module load. `requests` is imported when the
+    first HTTP session is built, `concurrent.futures` when a lookup spans more
+    than one batch, and numpy only by the synthetic provider.
+"""
+
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    import numpy as np
+
+
+class TerrainTileCache:
+    """
+    Process-wide terrain cache backed by a quantized DEM tile grid.
+
+    WHY PROCESS-WIDE:
+    =================
+    lambda_handler builds a fresh SpiralDesigner for every request, so any cache
+    stored on the designer dies with the request. A typical planning session
+    (optimize → CSV → battery 1..N) hits the same terrain around the same
+    project center again and again. This cache lives at module level and
+    therefore survives for the lifetime of a warm Lambda container.
+
+    GRID LAYOUT:
+    ============
+    - Terrain is sampled at grid NODES spaced ~CELL_M meters apart
+    - Latitude spacing is constant: CELL_M / 111,320 m per degree
+    - Longitude spacing is fixed per latitude BAND (TILE_CELLS rows of cells),
+      scaled by cos(band center latitude) so cells stay roughly square
+    - Nodes are grouped into TILES of TILE_CELLS × TILE_CELLS cells; tiles are
+      the unit of LRU/TTL eviction
+
+    INTERPOLATION:
+    ==============
+    Any point inside a cell whose four corner nodes are known is served by
+    bilinear interpolation, so nearby waypoints, terrain samples and ridge
+    samples never need their own API call once the surrounding nodes exist.
+
+    EVICTION:
+    =========
+    - LRU: least recently used tile is dropped once MAX_TILES is exceeded
+    - TTL: tiles older than TTL_SECONDS are discarded on access
+    """
+
+    CELL_M = 30.0               # ~30m node spacing (SRTM-class resolution)
+    TILE_CELLS = 32             # 32×32 cells per tile (~1km square)
+    MAX_TILES = 512             # LRU bound on resident tiles
+    TTL_SECONDS = 6 * 3600      # Terrain is static; TTL only bounds staleness
+    METERS_PER_DEG_LAT = 111320.0
+
+    def __init__(self, cell_m: float = CELL_M, tile_cells: int = TILE_CELLS,
+                 max_tiles: int = MAX_TILES, ttl_seconds: float = TTL_SECONDS):
+        self.cell_m = cell_m
+        self.tile_cells = tile_cells
+        self.max_tiles = max_tiles
+        self.ttl_seconds = ttl_seconds
+        self.dlat = cell_m / self.METERS_PER_DEG_LAT
+        self._tiles: "OrderedDict[Tuple[int, int], Dict]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def _band_dlon(self, band: int) -> float:
+        """Longitude spacing (degrees) for all cells in a latitude band."""
+        band_center_lat = (band * self.tile_cells + self.tile_cells / 2) * self.dlat
+        cos_lat = max(0.01, math.cos(math.radians(band_center_lat)))
+        return self.dlat / cos_lat
+
+    def locate(self, lat: float, lon: float) -> Dict:
+        """
+        Locate the grid cell containing a coordinate.
+
+        Returns:
+            Dict with 'band', 'dlon', the four corner 'nodes' as (gi, gj) pairs
+            (SW, SE, NW, NE) and the fractional position 'fx', 'fy' in the cell
+        """
+        fi = lat / self.dlat
+        gi = math.floor(fi)
+        band = gi // self.tile_cells
+        dlon = self._band_dlon(band)
+        fj = lon / dlon
+        gj = math.floor(fj)
+        return {
+            'band': band,
+            'dlon': dlon,
+            'nodes': [(gi, gj), (gi, gj + 1), (gi + 1, gj), (gi + 1, gj + 1)],
+            'fx': fj - gj,
+            'fy': fi - gi,
+        }
+
+    def node_lat_lon(self, cell: Dict, node: Tuple[int, int]) -> Tuple[float, float]:
+        """GPS coordinates of a grid node within the located cell's band."""
+        return node[0] * self.dlat, node[1] * cell['dlon']
+
+    def _tile(self, band: int, gj: int, create: bool = False) -> Optional[Dict]:
+        key = (band, gj // self.tile_cells)
+        tile = self._tiles.get(key)
+        now = time.time()
+
+        if tile is not None and now - tile['created'] > self.ttl_seconds:
+            del self._tiles[key]
+            tile = None
+
+        if tile is None:
+            if not create:
+                return None
+            tile = {'created': now, 'nodes': {}}
+            self._tiles[key] = tile
+            while len(self._tiles) > self.max_tiles:
+                self._tiles.popitem(last=False)
+        else:
+            self._tiles.move_to_end(key)
+
+        return tile
+
+    def get_node(self, band: int, node: Tuple[int, int]) -> Optional[float]:
+        tile = self._tile(band, node[1])
+        if tile is None:
+            return None
+        return tile['nodes'].get(node)
+
+    def put_node(self, band: int, node: Tuple[int, int], elevation_feet: float) -> None:
+        self._tile(band, node[1], create=True)['nodes'][node] = elevation_feet
+
+    def missing_nodes(self, cell: Dict) -> List[Tuple[int, int]]:
+        """Corner nodes of a located cell that are not cached yet."""
+        return [node for node in cell['nodes'] if self.get_node(cell['band'], node) is None]
+
+    def interpolate(self, cell: Dict) -> Optional[float]:
+        """Bilinear interpolation inside a located cell, or None if a corner is missing."""
+        corners = [self.get_node(cell['band'], node) for node in cell['nodes']]
+        if any(c is None for c in corners):
+            return None
+        sw, se, nw, ne = corners
+        fx, fy = cell['fx'], cell['fy']
+        south = sw + (se - sw) * fx
+        north = nw + (ne - nw) * fx
+        return south + (north - south) * fy
+
+    def clear(self) -> None:
+        self._tiles.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._tiles)
+
+
+# Module-level instance: shared by every SpiralDesigner in a warm container
+TERRAIN_TILE_CACHE = TerrainTileCache()
+
+class ProximityElevationIndex:
+    """
+    Uniform-grid spatial index for "nearest cached elevation within radius".
+
+    Points are projected to local meters (equirectangular around the first
+    inserted point) and bucketed into square cells one radius wide, so a query
+    only inspects the 3×3 neighbouring buckets instead of every earlier point.
+    At the 15ft reuse radius the projection error is far below a millimeter.
+
+    Entries hold a mutable slot ([elevation]) so points that reuse an anchor
+    within the same batch can be registered before the anchor is fetched.
+    """
+
+    EARTH_R = 6371000.0  # Matches haversine_distance
+
+    def __init__(self, radius_ft: float):
+        self.radius_m = radius_ft * 0.3048
+        self._origin = None
+        self._cos_lat0 = 1.0
+        self._buckets: Dict[Tuple[int, int], List[Tuple[float, float, List]]] = {}
+        self._size = 0
+
+    def _project(self, lat: float, lon: float) -> Tuple[float, float]:
+        if self._origin is None:
+            self._origin = (lat, lon)
+            self._cos_lat0 = math.cos(math.radians(lat))
+        lat0, lon0 = self._origin
+        x = math.radians(lon - lon0) * self.EARTH_R * self._cos_lat0
+        y = math.radians(lat - lat0) * self.EARTH_R
+        return x, y
+
+    def nearest(self, lat: float, lon: float) -> Optional[List]:
+        """Slot of the closest indexed point within the radius, or None."""
+        if not self._size:
+            return None
+        x, y = self._project(lat, lon)
+        bx, by = math.floor(x / self.radius_m), math.floor(y / self.radius_m)
+        best_slot = None
+        best_dist_sq = self.radius_m ** 2
+
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                for px, py, slot in self._buckets.get((bx + dx, by + dy), ()):
+                    dist_sq = (px - x) ** 2 + (py - y) ** 2
+                    if dist_sq <= best_dist_sq:
+                        best_dist_sq = dist_sq
+                        best_slot = slot
+
+        return best_slot
+
+    def insert(self, lat: float, lon: float, slot: List) -> None:
+        x, y = self._project(lat, lon)
+        key = (math.floor(x / self.radius_m), math.floor(y / self.radius_m))
+        self._buckets.setdefault(key, []).append((x, y, slot))
+        self._size += 1
+
+    def __len__(self) -> int:
+        return self._size
+
+
+_HTTP_SESSION = None
+
+
+def _http_session():
+    """
+    Pooled keep-alive HTTP session shared across warm invocations.
+
+    Reusing one session keeps TLS connections to the Elevation API open between
+    batches and between requests, so only the first call pays the handshake.
+    """
+    global _HTTP_SESSION
+    if _HTTP_SESSION is None:
+        import requests  # Deferred: routes that never hit the network skip ~60ms of import
+
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=GoogleElevationProvider.MAX_WORKERS,
+            pool_maxsize=GoogleElevationProvider.MAX_WORKERS
+        )
+        session.mount("https://", adapter)
+        _HTTP_SESSION = session
+    return _HTTP_SESSION
+
+
+class ElevationProvider:
+    """
+    Interface for terrain elevation sources used by SpiralDesigner.
+
+    Providers resolve raw (lat, lon) locations to meters. All caching (exact,
+    proximity, DEM tiles) happens above this layer, so a provider only needs to
+    answer the locations it is asked for and count the requests it makes.
+
+    NOTE: TERRAIN_TILE_CACHE is process-wide and does not record which provider
+    filled it. Clear it when switching providers inside one process.
+    """
+
+    name = "base"
+
+    def __init__(self):
+        self.request_count = 0  # Upstream requests (HTTP calls, simulated calls)
+        self._count_lock = threading.Lock()
+
+    def count_requests(self, count: int = 1) -> None:
+        """Add to request_count (safe from the batch thread pool)."""
+        with self._count_lock:
+            self.request_count += count
+
+    @property
+    def configured(self) -> bool:
+        """False when the provider cannot serve data (e.g. missing API key)."""
+        return True
+
+    def fetch_elevations_m(self, locations: List[Tuple[float, float]]) -> List[Optional[float]]:
+        """
+        Fetch elevations (meters) for locations.
+
+        Returns:
+            List aligned with locations; None where the lookup failed
+        """
+        raise NotImplementedError
+
+
+class GoogleElevationProvider(ElevationProvider):
+    """
+    Batched client for the Google Maps Elevation API.
+
+    BATCHING:
+    - The API accepts many pipe-separated locations per call (max 512)
+    - Locations are packed into as few calls as the location and URL length
+      limits allow, preserving input order
+
+    CONCURRENCY & RETRY:
+    - Independent batches run concurrently on a small thread pool
+    - Each batch retries transient failures (network, 5xx, rate limiting) with
+      exponential backoff before giving up
+    - A batch that still fails yields None for its locations so callers can
+      apply their usual fallback elevation
+    """
+
+    API_URL = "https://maps.googleapis.com/maps/api/elevation/json"
+    MAX_LOCATIONS_PER_REQUEST = 512  # Google hard limit
+    MAX_URL_LENGTH = 15000           # Headroom under Google's 16,384 char limit
+    MAX_WORKERS = 4                  # Concurrent batches per request
+    MAX_RETRIES = 2                  # Retries per batch after the first attempt
+    RETRY_BACKOFF_S = 0.25
+    TIMEOUT_S = 10
+    RETRYABLE_STATUSES = {"OVER_QUERY_LIMIT", "UNKNOWN_ERROR"}
+
+    name = "google"
+
+    def __init__(self, api_key: str):
+        super().__init__()
+        self.api_key = api_key
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.api_key)
+
+    def _base_url_length(self) -> int:
+        return len(f"{self.API_URL}?locations=&key={self.api_key}")
+
+    def make_batches(self, locations: List[Tuple[float, float]]) -> List[List[Tuple[float, float]]]:
+        """Split locations into order-preserving batches within API limits."""
+        batches = []
+        current = []
+        current_length = self._base_url_length()
+
+        for lat, lon in locations:
+            encoded_length = len(f"{lat:.6f},{lon:.6f}") + 1  # +1 for the '|' separator
+            if current and (
+                len(current) >= self.MAX_LOCATIONS_PER_REQUEST
+                or current_length + encoded_length > self.MAX_URL_LENGTH
+            ):
+                batches.append(current)
+                current = []
+                current_length = self._base_url_length()
+            current.append((lat, lon))
+            current_length += encoded_length
+
+        if current:
+            batches.append(current)
+        return batches
+
+    def _fetch_batch(self, batch: List[Tuple[float, float]]) -> List[Optional[float]]:
+        locations_param = "|".join(f"{lat:.6f},{lon:.6f}" for lat, lon in batch)
+        url = f"{self.API_URL}?locations={locations_param}&key={self.api_key}"
+
+        for attempt in range(self.MAX_RETRIES + 1):
+            retryable = True
+            try:
+                self.count_requests()
+                response = _http_session().get(url, timeout=self.TIMEOUT_S)
+
+                if response.status_code != 200:
+                    retryable = response.status_code >= 500 or response.status_code == 429
+                    raise ValueError(f"Elevation HTTP error {response.status_code}")
+
+                data = response.json()
+                status = data.get("status", "Unknown error")
+                results = data.get("results") or []
+                if status != "OK" or len(results) != len(batch):
+                    retryable = status in self.RETRYABLE_STATUSES
+                    raise ValueError(f"Google Elevation API error: {status}")
+
+                return [result["elevation"] for result in results]
+
+            except Exception as e:
+                if not retryable or attempt == self.MAX_RETRIES:
+                    print(f"Elevation batch of {len(batch)} failed after {attempt + 1} attempt(s): {str(e)}")
+                    break
+                time.sleep(self.RETRY_BACKOFF_S * (2 ** attempt))
+
+        return [None] * len(batch)
+
+    def fetch_elevations_m(self, locations: List[Tuple[float, float]]) -> List[Optional[float]]:
+        """
+        Fetch elevations (meters) for all locations in as few calls as possible.
+
+        Returns:
+            List aligned with locations; None where the batch failed
+        """
+        if not locations:
+            return []
+
+        batches = self.make_batches(locations)
+        if len(batches) == 1:
+            batch_results = [self._fetch_batch(batches[0])]
+        else:
+            from concurrent.futures import ThreadPoolExecutor
+
+            with ThreadPoolExecutor(max_workers=min(self.MAX_WORKERS, len(batches))) as pool:
+                batch_results = list(pool.map(self._fetch_batch, batches))
+
+        elevations = []
+        for result in batch_results:
+            elevations.extend(result)
+        return elevations
+
+
+class SyntheticTerrainProvider(ElevationProvider):
+    """
+    Offline analytic DEM for benchmarks and tests (no network access).
+
+    TERRAIN MODEL (meters, defined everywhere on Earth):
+    - Rolling hills: product of sines over local east/north meters
+    - Ridges: Gaussian ridgelines on a family of parallel lines (1.5km spacing)
+    - Cliffs: sharp tanh steps on a second, crossing family of lines
+
+    Features are dense enough that every spiral crosses hills, ridges and cliffs,
+    which exercises adaptive terrain sampling the way real mountain sites do.
+
+    LATENCY INJECTION:
+    Each simulated request sleeps latency_s, with requests split into batches of
+    batch_size locations like the Google client, so request counts and wall time
+    behave like the live API.
+    """
+
+    name = "synthetic"
+
+    BASE_ELEVATION_M = 1500.0
+    HILL_AMPLITUDE_M = 35.0
+    RIDGE_HEIGHT_M = 55.0
+    RIDGE_SPACING_M = 1500.0
+    RIDGE_WIDTH_M = 40.0
+    CLIFF_HEIGHT_M = 30.0
+    CLIFF_SPACING_M = 2300.0
+    CLIFF_SHARPNESS_M = 6.0
+
+    def __init__(self, latency_s: float = 0.0, batch_size: int = 512):
+        super().__init__()
+        self.latency_s = latency_s
+        self.batch_size = batch_size
+        self.location_count = 0
+
+    def elevation_m(self, lat, lon) -> "np.ndarray":
+        """Analytic terrain height (meters) for scalar or array coordinates."""
+        import numpy as np
+
+        lat = np.asarray(lat, dtype=float)
+        lon = np.asarray(lon, dtype=float)
+        north = lat * 110540.0
+        east = lon * 111320.0 * np.cos(np.radians(lat))
+
+        hills = self.HILL_AMPLITUDE_M * np.sin(east / 420.0) * np.cos(north / 380.0)
+
+        u = east * math.cos(math.radians(30)) + north * math.sin(math.radians(30))
+        ridge_offset = np.mod(u + self.RIDGE_SPACING_M / 2, self.RIDGE_SPACING_M) - self.RIDGE_SPACING_M / 2
+        ridges = self.RIDGE_HEIGHT_M * np.exp(-(ridge_offset ** 2) / (2 * self.RIDGE_WIDTH_M ** 2))
+
+        w = east * math.cos(math.radians(-50)) + north * math.sin(math.radians(-50))
+        cliff_offset = np.mod(w + self.CLIFF_SPACING_M / 2, self.CLIFF_SPACING_M) - self.CLIFF_SPACING_M / 2
+        cliffs = self.CLIFF_HEIGHT_M * np.tanh(cliff_offset / self.CLIFF_SHARPNESS_M)
+
+        return self.BASE_ELEVATION_M + hills + ridges + cliffs
+
+    def fetch_elevations_m(self, locations: List[Tuple[float, float]]) -> List[Optional[float]]:
+        if not locations:
+            return []
+
+        requests_made = -(-len(locations) // self.batch_size)  # Ceiling division
+        self.count_requests(requests_made)
+        self.location_count += len(locations)
+        if self.latency_s > 0:
+            time.sleep(self.latency_s * requests_made)
+
+        lat, lon = zip(*locations)
+        return self.elevation_m(lat, lon).tolist()
+
+
+def make_elevation_provider(api_key: Optional[str]) -> ElevationProvider:
+    """
+    Build the elevation provider selected by the environment.
+
+    ENVIRONMENT:
+    - ELEVATION_PROVIDER: "google" (default) or "synthetic"
+    - ALLOW_SYNTHETIC_TERRAIN: Must be "1" for "synthetic" (benchmarks and tests)
+    - SYNTHETIC_ELEVATION_LATENCY_MS: Injected per-request latency for "synthetic"
+
+    SAFETY:
+    Synthetic terrain yields real flight CSVs with made-up ground clearance,
+    so it is refused inside a Lambda (AWS_LAMBDA_FUNCTION_NAME set) and
+    without the explicit opt-in, rather than silently planning on fake terrain.
+
+    Raises:
+        ValueError: If "synthetic" is requested where it is not allowed
+    """
+    provider_name = os.environ.get("ELEVATION_PROVIDER", "google").strip().lower()
+    if provider_name == "synthetic":
+        if os.environ.get("ALLOW_SYNTHETIC_TERRAIN") != "1" or os.environ.get("AWS_LAMBDA_FUNCTION_NAME"):
+            raise ValueError("Synthetic terrain is for benchmarks and tests only "
+                             "(set ALLOW_SYNTHETIC_TERRAIN=1 outside Lambda)")
+        print("⚠️ Using SYNTHETIC terrain: flight plans do not reflect real ground clearance")
+        latency_ms = float(os.environ.get("SYNTHETIC_ELEVATION_LATENCY_MS", "0") or 0)
+        return SyntheticTerrainProvider(latency_s=latency_ms / 1000.0)
+    return GoogleElevationProvider(api_key)
@@ -1,5 +1,6 @@
 import json
 import boto3
+import hashlib
 import os
 import re
 import uuid
@@ -185,6 +186,29 @@ def lambda_handler(event, context):
             }
         }]
         
+        # Resume from OpenSfM stage checkpoints of an earlier run on the same upload
+        upload_key = hashlib.sha256(f"s3://{bucket_name}/{object_key}".encode()).hexdigest()[:16]
+        sfm_checkpoint_prefix = f"checkpoints/sfm/{upload_key}/"
+        sfm_checkpoint_uri = f"s3://{ml_bucket}/{sfm_checkpoint_prefix}"
+        try:
+            has_checkpoint = s3.list_objects_v2(Bucket=ml_bucket, Prefix=sfm_checkpoint_prefix, MaxKeys=1).get('KeyCount', 0) > 0
+        except Exception as e:
+            print(f"⚠️ Could not check for SfM checkpoints: {str(e)}")
+            has_checkpoint = False
+        if has_checkpoint:
+            # SageMaker rejects inputs with no objects, so this is only added once the prefix exists
+            sfm_processing_inputs.append({
+                "InputName": "sfm-checkpoint",
+                "AppManaged": False,
+                "S3Input": {
+                    "S3Uri": sfm_checkpoint_uri,
+                    "LocalPath": "/opt/ml/processing/checkpoint_restore",
+                    "S3DataType": "S3Prefix",
+                    "S3InputMode": "File"
+                }
+            })
+            print(f"♻️ Restoring SfM checkpoints from {sfm_checkpoint_uri}")
+        
         # Add CSV input if GPS data is available
         if has_gps_data:
             sfm_processing_inputs.append({
@@ -259,6 +283,7 @@ def lambda_handler(event, context):
             "pipelineStep": pipeline_step,
             "inputS3Uri": f"s3://{bucket_name}/{object_key}",
             "colmapOutputS3Uri": colmap_output_uri,
+            "sfmCheckpointS3Uri": sfm_checkpoint_uri,
             "gaussianOutputS3Uri": f"s3://{ml_bucket}/3dgs/{job_id}/",
             "compressedOutputS3Uri": f"s3://{ml_bucket}/compressed/{job_id}/",
             "sfmImageUri": sfm_image_uri,
@@ -234,6 +234,11 @@ class MLPipelineStack(Stack):
                                 f"{upload_bucket.bucket_arn}/*",
                                 f"{ml_bucket.bucket_arn}/*"
                             ]
+                        ),
+                        # Lets start_ml_job check for SfM checkpoints of an earlier run
+                        iam.PolicyStatement(
+                            actions=["s3:ListBucket"],
+                            resources=[ml_bucket.bucket_arn]
                         )
                     ]
                 )
@@ -383,6 +388,16 @@ class MLPipelineStack(Stack):
                             "LocalPath": "/opt/ml/processing/output",
                             "S3UploadMode": "EndOfJob"
                         }
+                    }, {
+                        # OpenSfM stage checkpoints, uploaded as each stage completes so a
+                        # restarted job for the same upload can resume (see stage_runner.py)
+                        "OutputName": "sfm-checkpoint",
+                        "AppManaged": False,
+                        "S3Output": {
+                            "S3Uri": sfn.JsonPath.string_at("$.sfmCheckpointS3Uri"),
+                            "LocalPath": "/opt/ml/processing/checkpoint",
+                            "S3UploadMode": "Continuous"
+                        }
                     }]
                 },
                 # Enable comprehensive CloudWatch logging
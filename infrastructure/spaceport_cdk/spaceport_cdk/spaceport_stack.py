@@ -294,6 +294,7 @@ class SpaceportStack(Stack):
             "SpaceportDronePathApi",
             rest_api_name=f"spaceport-drone-path-api-{suffix}",
             description=f"Spaceport Drone Path API for {env_config['domain']}",
+            binary_media_types=["application/zip"],
             default_cors_preflight_options=apigw.CorsOptions(
                 allow_origins=apigw.Cors.ALL_ORIGINS,
                 allow_methods=apigw.Cors.ALL_METHODS,
@@ -422,6 +423,10 @@ class SpaceportStack(Stack):
         battery_csv_resource = csv_resource.add_resource("battery").add_resource("{id}")
         battery_csv_resource.add_method("POST", apigw.LambdaIntegration(self.drone_path_lambda))
         
+        # Battery bundle endpoint (all battery CSVs as JSON or zip)
+        battery_bundle_resource = csv_resource.add_resource("batteries")
+        battery_bundle_resource.add_method("POST", apigw.LambdaIntegration(self.drone_path_lambda))
+        
         # Legacy endpoint
         legacy_resource = self.drone_path_api.root.add_resource("DronePathREST")
         legacy_resource.add_method("POST", apigw.LambdaIntegration(self.drone_path_lambda))
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Offline latency benchmark for the drone path Lambda.
+
+Invokes lambda_handler in-process with the synthetic terrain provider, so no
+network access or API key is needed. Times /api/optimize-spiral, /api/csv and
+every /api/csv/battery/{id} route across a grid of slice counts and hold radii,
+and reports per-route p50/p99 latency plus elevation provider calls.
+
+Cold start is measured per route in fresh subprocesses, the same way a new
+Lambda container would see it: handler import time, first-invocation latency
+and whether the route pulled in numpy / requests.
+
+Examples:
+    python scripts/benchmark_drone_path_lambda.py
+    python scripts/benchmark_drone_path_lambda.py --slices 1,3,5 --radii 1000,3000 --latency-ms 80
+    python scripts/benchmark_drone_path_lambda.py --warm --json results.json
+"""
+
+import argparse
+import contextlib
+import importlib.util
+import io
+import json
+import math
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List
+
+DRONE_PATH_DIR = (
+    Path(__file__).resolve().parents[1]
+    / "infrastructure"
+    / "spaceport_cdk"
+    / "lambda"
+    / "drone_path"
+)
+MODULE_PATH = DRONE_PATH_DIR / "lambda_function.py"
+CENTER = "41.74253337851678, -111.78932496414215"
+MIN_HEIGHT = 200
+MAX_HEIGHT = 400
+
+
+COLD_START_ROUTES = {
+    "OPTIONS": {"resource": "/api/csv", "httpMethod": "OPTIONS", "body": {}},
+    "/api/optimize-spiral": {"resource": "/api/optimize-spiral",
+                             "body": {"batteryMinutes": 20, "batteries": 3, "center": CENTER}},
+    "/api/csv": {"resource": "/api/csv", "body": {"slices": 3, "N": 8, "r0": 150, "rHold": 1595,
+                                                  "center": CENTER, "minHeight": MIN_HEIGHT}},
+    "/api/csv/batteries": {"resource": "/api/csv/batteries",
+                           "body": {"slices": 3, "N": 8, "r0": 150, "rHold": 1595, "center": CENTER,
+                                    "minHeight": MIN_HEIGHT, "format": "zip"}},
+}
+
+
+def load_module():
+    """Load the handler the way Lambda does: its directory on sys.path, sibling modules importable."""
+    if str(DRONE_PATH_DIR) not in sys.path:
+        sys.path.insert(0, str(DRONE_PATH_DIR))
+    spec = importlib.util.spec_from_file_location("drone_path_lambda_benchmark", MODULE_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def load_engine():
+    """Planning engine module (caches, providers) used by the handler."""
+    load_module()
+    import spiral_designer
+    return spiral_designer
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile."""
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100.0 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def route_requests(slices: int, r_hold: float) -> List[Dict]:
+    """Every route a client hits while planning one mission."""
+    params = {"slices": slices, "N": 8, "r0": 150, "rHold": r_hold, "center": CENTER,
+              "minHeight": MIN_HEIGHT, "maxHeight": MAX_HEIGHT}
+    routes = [
+        {"resource": "/api/optimize-spiral",
+         "body": {"batteryMinutes": 20, "batteries": slices, "center": CENTER}},
+        {"resource": "/api/csv", "body": params},
+    ]
+    for battery_id in range(1, slices + 1):
+        routes.append({"resource": "/api/csv/battery/{id}", "body": params,
+                       "pathParameters": {"id": str(battery_id)}})
+    return routes
+
+
+def invoke(module, route: Dict) -> Dict:
+    event = {
+        "httpMethod": route.get("httpMethod", "POST"),
+        "resource": route["resource"],
+        "pathParameters": route.get("pathParameters"),
+        "body": json.dumps(route["body"]),
+    }
+    with contextlib.redirect_stdout(io.StringIO()):
+        return module.lambda_handler(event, None)
+
+
+def run_grid(module, engine, slice_counts: List[int], radii: List[float], repeats: int,
+             latency_ms: float, warm: bool) -> Dict[str, Dict]:
+    provider = engine.SyntheticTerrainProvider(latency_s=latency_ms / 1000.0)
+    engine.make_elevation_provider = lambda api_key: provider  # Shared so calls can be counted
+
+    samples = defaultdict(lambda: {"latency_s": [], "provider_calls": [], "locations": []})
+    for slices in slice_counts:
+        for r_hold in radii:
+            for _ in range(repeats):
+                if not warm:
+                    engine.TERRAIN_TILE_CACHE.clear()
+                    engine.MISSION_PLAN_STORE.clear()
+                for route in route_requests(slices, r_hold):
+                    calls_before = provider.request_count
+                    locations_before = provider.location_count
+                    start = time.perf_counter()
+                    response = invoke(module, route)
+                    elapsed = time.perf_counter() - start
+                    if response["statusCode"] != 200:
+                        raise RuntimeError(f"{route['resource']} failed: {response['body']}")
+
+                    route_name = route["resource"]
+                    if route.get("pathParameters"):
+                        route_name = f"/api/csv/battery/{route['pathParameters']['id']}"
+                    sample = samples[route_name]
+                    sample["latency_s"].append(elapsed)
+                    sample["provider_calls"].append(provider.request_count - calls_before)
+                    sample["locations"].append(provider.location_count - locations_before)
+    return samples
+
+
+def measure_cold_start(runs: int, latency_ms: float) -> List[Dict]:
+    """Handler import + first invocation of each route in fresh interpreters."""
+    env = dict(os.environ, ELEVATION_PROVIDER="synthetic", ALLOW_SYNTHETIC_TERRAIN="1",
+               SYNTHETIC_ELEVATION_LATENCY_MS=str(latency_ms))
+    rows = []
+    for route_name in COLD_START_ROUTES:
+        imports, first_calls, loaded = [], [], set()
+        for _ in range(runs):
+            result = subprocess.run(
+                [sys.executable, __file__, "--cold-start-child", route_name],
+                env=env, capture_output=True, text=True, check=True,
+            )
+            timing = json.loads(result.stdout.strip().splitlines()[-1])
+            imports.append(timing["import_s"])
+            first_calls.append(timing["first_call_s"])
+            loaded.update(timing["heavy_modules"])
+        rows.append({
+            "route": route_name,
+            "import_p50_ms": percentile(imports, 50) * 1000,
+            "import_p99_ms": percentile(imports, 99) * 1000,
+            "first_call_p50_ms": percentile(first_calls, 50) * 1000,
+            "first_call_p99_ms": percentile(first_calls, 99) * 1000,
+            "heavy_modules": sorted(loaded),
+        })
+    return rows
+
+
+def cold_start_child(route_name: str) -> None:
+    start = time.perf_counter()
+    module = load_module()
+    imported = time.perf_counter()
+    response = invoke(module, COLD_START_ROUTES[route_name])
+    done = time.perf_counter()
+    if response["statusCode"] != 200:
+        raise RuntimeError(f"{route_name} failed: {response['body']}")
+    heavy = [name for name in ("numpy", "requests", "spiral_designer") if name in sys.modules]
+    print(json.dumps({"import_s": imported - start, "first_call_s": done - imported, "heavy_modules": heavy}))
+
+
+def summarize(samples: Dict[str, Dict]) -> List[Dict]:
+    summary = []
+    for route_name in sorted(samples, key=lambda name: (len(name), name)):
+        sample = samples[route_name]
+        summary.append({
+            "route": route_name,
+            "n": len(sample["latency_s"]),
+            "p50_ms": percentile(sample["latency_s"], 50) * 1000,
+            "p99_ms": percentile(sample["latency_s"], 99) * 1000,
+            "max_ms": max(sample["latency_s"]) * 1000,
+            "provider_calls_mean": sum(sample["provider_calls"]) / len(sample["provider_calls"]),
+            "locations_mean": sum(sample["locations"]) / len(sample["locations"]),
+        })
+    return summary
+
+
+def parse_list(value: str, cast) -> List:
+    return [cast(v) for v in value.split(",") if v.strip()]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--slices", default="1,3,5", help="Comma-separated battery/slice counts")
+    parser.add_argument("--radii", default="1000,1595,3000", help="Comma-separated hold radii (ft)")
+    parser.add_argument("--repeats", type=int, default=5, help="Runs per grid point")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Injected provider latency per request")
+    parser.add_argument("--warm", action="store_true", help="Keep process-wide caches between runs")
+    parser.add_argument("--cold-start-runs", type=int, default=3, help="Fresh-interpreter runs (0 to skip)")
+    parser.add_argument("--json", dest="json_path", help="Write results to this JSON file")
+    parser.add_argument("--cold-start-child", choices=sorted(COLD_START_ROUTES), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.cold_start_child:
+        cold_start_child(args.cold_start_child)
+        return 0
+
+    module = load_module()
+    engine = load_engine()
+    slice_counts = parse_list(args.slices, int)
+    radii = parse_list(args.radii, float)
+
+    print(f"🚀 Benchmarking drone path Lambda: slices={slice_counts} radii={radii} "
+          f"repeats={args.repeats} latency={args.latency_ms}ms caches={'warm' if args.warm else 'cold'}")
+    summary = summarize(run_grid(module, engine, slice_counts, radii, args.repeats, args.latency_ms, args.warm))
+
+    print(f"\n{'route':<28}{'n':>5}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}{'calls':>8}{'locs':>8}")
+    for row in summary:
+        print(f"{row['route']:<28}{row['n']:>5}{row['p50_ms']:>10.1f}{row['p99_ms']:>10.1f}"
+              f"{row['max_ms']:>10.1f}{row['provider_calls_mean']:>8.1f}{row['locations_mean']:>8.0f}")
+
+    results = {"summary": summary}
+    if args.cold_start_runs > 0:
+        cold = measure_cold_start(args.cold_start_runs, args.latency_ms)
+        results["cold_start"] = cold
+        print(f"\n🧊 Cold start ({args.cold_start_runs} fresh interpreters per route)")
+        print(f"{'route':<28}{'import p50':>12}{'first p50':>12}{'first p99':>12}  loaded")
+        for row in cold:
+            print(f"{row['route']:<28}{row['import_p50_ms']:>10.1f}ms{row['first_call_p50_ms']:>10.1f}ms"
+                  f"{row['first_call_p99_ms']:>10.1f}ms  {', '.join(row['heavy_modules']) or '-'}")
+
+    if args.json_path:
+        Path(args.json_path).write_text(json.dumps(results, indent=2))
+        print(f"💾 Results written to {args.json_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
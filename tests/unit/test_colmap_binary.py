@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""Unit tests for the array-based COLMAP binary model writer."""
+
+import json
+import struct
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+SFM_DIR = Path(__file__).resolve().parents[2] / "infrastructure" / "containers" / "sfm"
+if str(SFM_DIR) not in sys.path:
+    sys.path.insert(0, str(SFM_DIR))
+
+from colmap_binary import (  # noqa: E402
+    read_binary_model_summary,
+    write_cameras_binary,
+    write_images_binary,
+    write_points3d_binary,
+)
+from colmap_converter import OpenSfMToCOLMAPConverter  # noqa: E402
+
+NUM_PARAMS = {0: 3, 3: 5, 5: 8}
+
+
+def _read(f, fmt):
+    return struct.unpack("<" + fmt, f.read(struct.calcsize("<" + fmt)))
+
+
+def _read_model(sparse_dir: Path):
+    """Reference reader following COLMAP's read_write_model.py, one struct at a time"""
+    cameras, images, points = {}, {}, []
+    with open(sparse_dir / "cameras.bin", "rb") as f:
+        for _ in range(_read(f, "Q")[0]):
+            camera_id, model_id, width, height = _read(f, "iiQQ")
+            cameras[camera_id] = (model_id, width, height, _read(f, "d" * NUM_PARAMS[model_id]))
+        assert f.read() == b""
+    with open(sparse_dir / "images.bin", "rb") as f:
+        for _ in range(_read(f, "Q")[0]):
+            image_id, *pose, camera_id = _read(f, "idddddddi")
+            name = b""
+            while (char := f.read(1)) != b"\x00":
+                name += char
+            points2d = _read(f, "ddq" * _read(f, "Q")[0])
+            images[image_id] = (pose, camera_id, name.decode(), points2d)
+        assert f.read() == b""
+    with open(sparse_dir / "points3D.bin", "rb") as f:
+        for _ in range(_read(f, "Q")[0]):
+            point_id, x, y, z, r, g, b, error = _read(f, "QdddBBBd")
+            points.append((point_id, (x, y, z), (r, g, b), error, _read(f, "ii" * _read(f, "Q")[0])))
+        assert f.read() == b""
+    return cameras, images, points
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 100])
+def test_writer_round_trips_through_reference_reader(tmp_path, chunk_size):
+    write_cameras_binary(tmp_path / "cameras.bin", [(1, "RADIAL", 4000, 3000, [2800.0, 2000.0, 1500.0, -0.01, 0.002]),
+                                                   (2, "SIMPLE_PINHOLE", 640, 480, [768.0, 320.0, 240.0])])
+    write_images_binary(tmp_path / "images.bin", np.array([1, 2]), np.array([[1.0, 0, 0, 0], [0.5, 0.5, 0.5, 0.5]]),
+                        np.array([[1.0, 2.0, 3.0], [-1.0, 0.0, 0.5]]), np.array([1, 2]), ["A.JPG", "dir/B.JPG"],
+                        np.array([0, 0, 3]), np.array([[1.5, 2.5], [3.0, 4.0], [5.0, 6.0]]), np.array([7, -1, 9]))
+    # Second point has an empty track
+    write_points3d_binary(tmp_path / "points3D.bin", np.array([7, 8, 9]),
+                          np.array([[0.0, 1.0, 2.0], [3.0, 4.0, 5.0], [6.0, 7.0, 8.0]]),
+                          np.array([[255, 0, 1], [2, 3, 4], [5, 6, 7]], dtype=np.uint8), 0.5,
+                          np.array([0, 2, 2, 3]), np.array([1, 2, 2]), np.array([0, 0, 2]), chunk_size=chunk_size)
+
+    cameras, images, points = _read_model(tmp_path)
+    assert cameras == {1: (3, 4000, 3000, (2800.0, 2000.0, 1500.0, -0.01, 0.002)),
+                       2: (0, 640, 480, (768.0, 320.0, 240.0))}
+    assert images[1] == ([1.0, 0.0, 0.0, 0.0, 1.0, 2.0, 3.0], 1, "A.JPG", ())
+    assert images[2][2] == "dir/B.JPG"
+    assert images[2][3] == (1.5, 2.5, 7, 3.0, 4.0, -1, 5.0, 6.0, 9)
+    assert points == [(7, (0.0, 1.0, 2.0), (255, 0, 1), 0.5, (1, 0, 2, 0)),
+                      (8, (3.0, 4.0, 5.0), (2, 3, 4), 0.5, ()),
+                      (9, (6.0, 7.0, 8.0), (5, 6, 7), 0.5, (2, 2))]
+    assert read_binary_model_summary(tmp_path) == {
+        "camera_count": 2, "image_count": 2, "point_count": 3, "total_correspondences": 3}
+
+
+def _write_opensfm(opensfm_dir: Path) -> None:
+    (opensfm_dir / "images").mkdir(parents=True)
+    rng = np.random.default_rng(3)
+    shots = {f"IMG_{i}.JPG": {"rotation": rng.normal(size=3).tolist(), "translation": rng.normal(size=3).tolist(),
+                              "camera": "dji"} for i in range(4)}
+    for name in shots:
+        (opensfm_dir / "images" / name).write_bytes(b"\xff\xd8")
+    points = {str(p): {"coordinates": rng.normal(size=3).tolist(), "color": [p, 2 * p, 3 * p],
+                       "observations": {name: rng.normal(size=2).tolist() for name in list(shots)[: 1 + p % 4]}}
+              for p in range(20)}
+    reconstruction = {"cameras": {"dji": {"projection_type": "perspective", "width": 4000, "height": 3000,
+                                          "focal": 0.7, "k1": -0.01, "k2": 0.002}},
+                      "shots": shots, "points": points}
+    (opensfm_dir / "reconstruction.json").write_text(json.dumps([reconstruction]))
+
+
+def _text_lines(path: Path):
+    return [line.rstrip("\n") for line in path.read_text().splitlines(keepends=True) if not line.startswith("#")]
+
+
+def test_converter_binary_model_matches_text_model(tmp_path):
+    _write_opensfm(tmp_path / "opensfm")
+    results = OpenSfMToCOLMAPConverter(tmp_path / "opensfm", tmp_path / "out", output_format="both").convert()
+    assert results["quality_check_passed"]
+
+    sparse = tmp_path / "out" / "sparse" / "0"
+    cameras, images, points = _read_model(sparse)
+
+    [camera_line] = _text_lines(sparse / "cameras.txt")
+    assert camera_line.split()[4:] == [f"{p:.6f}" for p in cameras[1][3]]
+
+    image_lines = _text_lines(sparse / "images.txt")
+    for header, points2d in zip(image_lines[::2], image_lines[1::2]):
+        fields = header.split()
+        pose, camera_id, name, binary_points2d = images[int(fields[0])]
+        np.testing.assert_allclose([float(v) for v in fields[1:8]], pose, atol=1e-6)
+        assert (camera_id, name) == (int(fields[8]), fields[9])
+        np.testing.assert_allclose([float(v) for v in points2d.split()], binary_points2d, atol=1e-6)
+
+    for line, (point_id, xyz, rgb, error, track) in zip(_text_lines(sparse / "points3D.txt"), points):
+        fields = line.split()
+        assert int(fields[0]) == point_id
+        np.testing.assert_allclose([float(v) for v in fields[1:4]], xyz, atol=1e-6)
+        assert tuple(int(v) for v in fields[4:7]) == rgb
+        assert tuple(int(v) for v in fields[8:]) == track
+
+
+def test_converter_binary_only_output_validates(tmp_path):
+    _write_opensfm(tmp_path / "opensfm")
+    results = OpenSfMToCOLMAPConverter(tmp_path / "opensfm", tmp_path / "out", output_format="binary").convert()
+
+    sparse = tmp_path / "out" / "sparse" / "0"
+    assert not list(sparse.glob("*.txt"))
+    assert results["quality_check_passed"]
+    assert (results["camera_count"], results["image_count"], results["point_count"]) == (1, 4, 20)
+    assert results["total_correspondences"] == sum(1 + p % 4 for p in range(20))
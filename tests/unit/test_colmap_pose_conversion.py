@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""Unit tests for the batched OpenSfM → COLMAP pose conversion."""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+
+SFM_DIR = Path(__file__).resolve().parents[2] / "infrastructure" / "containers" / "sfm"
+if str(SFM_DIR) not in sys.path:
+    sys.path.insert(0, str(SFM_DIR))
+
+from colmap_converter import OpenSfMToCOLMAPConverter  # noqa: E402
+
+
+# Per-shot reference implementation the batched conversion must reproduce
+
+def _axis_angle_to_quaternion(axis_angle):
+    axis_angle = np.array(axis_angle)
+    angle = np.linalg.norm(axis_angle)
+    if angle < 1e-8:
+        return np.array([1.0, 0.0, 0.0, 0.0])
+    axis = axis_angle / angle
+    half_angle = angle / 2.0
+    xyz = np.sin(half_angle) * axis
+    return np.array([np.cos(half_angle), xyz[0], xyz[1], xyz[2]])
+
+
+def _quaternion_to_rotation_matrix(quat):
+    qw, qx, qy, qz = quat
+    norm = np.sqrt(qw*qw + qx*qx + qy*qy + qz*qz)
+    qw, qx, qy, qz = qw/norm, qx/norm, qy/norm, qz/norm
+    return np.array([
+        [1 - 2*(qy*qy + qz*qz), 2*(qx*qy - qw*qz), 2*(qx*qz + qw*qy)],
+        [2*(qx*qy + qw*qz), 1 - 2*(qx*qx + qz*qz), 2*(qy*qz - qw*qx)],
+        [2*(qx*qz - qw*qy), 2*(qy*qz + qw*qx), 1 - 2*(qx*qx + qy*qy)]
+    ])
+
+
+def _rotation_matrix_to_quaternion(R):
+    trace = np.trace(R)
+    if trace > 0:
+        s = np.sqrt(trace + 1.0) * 2
+        return np.array([0.25 * s, (R[2, 1] - R[1, 2]) / s, (R[0, 2] - R[2, 0]) / s, (R[1, 0] - R[0, 1]) / s])
+    if R[0, 0] > R[1, 1] and R[0, 0] > R[2, 2]:
+        s = np.sqrt(1.0 + R[0, 0] - R[1, 1] - R[2, 2]) * 2
+        return np.array([(R[2, 1] - R[1, 2]) / s, 0.25 * s, (R[0, 1] + R[1, 0]) / s, (R[0, 2] + R[2, 0]) / s])
+    if R[1, 1] > R[2, 2]:
+        s = np.sqrt(1.0 + R[1, 1] - R[0, 0] - R[2, 2]) * 2
+        return np.array([(R[0, 2] - R[2, 0]) / s, (R[0, 1] + R[1, 0]) / s, 0.25 * s, (R[1, 2] + R[2, 1]) / s])
+    s = np.sqrt(1.0 + R[2, 2] - R[0, 0] - R[1, 1]) * 2
+    return np.array([(R[1, 0] - R[0, 1]) / s, (R[0, 2] + R[2, 0]) / s, (R[1, 2] + R[2, 1]) / s, 0.25 * s])
+
+
+def _per_shot(rotation, translation):
+    """The original per-shot conversion: axis-angle → quaternion → matrix → inverse → quaternion"""
+    R_inv = _quaternion_to_rotation_matrix(_axis_angle_to_quaternion(rotation)).T
+    return _rotation_matrix_to_quaternion(R_inv), -R_inv @ np.asarray(translation)
+
+
+def test_batch_pose_conversion_matches_per_shot_math(tmp_path):
+    converter = OpenSfMToCOLMAPConverter(tmp_path / "opensfm", tmp_path / "out")
+    rng = np.random.default_rng(11)
+    rotations = np.vstack([
+        rng.normal(size=(200, 3)) * 1.5,
+        np.zeros((1, 3)),                           # identity
+        [[1e-9, 0.0, 0.0]],                         # below the axis-angle threshold
+        [[np.pi - 1e-3, 0.0, 0.0],                  # near-180° turns hit every matrix → quaternion branch
+         [0.0, np.pi - 1e-3, 0.0],
+         [0.0, 0.0, np.pi - 1e-3],
+         [2.0, 1.0, 0.3]],
+    ])
+    translations = rng.normal(size=(len(rotations), 3)) * 50.0
+
+    qvecs, tvecs = converter._shots_to_world_to_camera(rotations, translations)
+
+    expected = [_per_shot(r, t) for r, t in zip(rotations, translations)]
+    np.testing.assert_allclose(qvecs, [q for q, _ in expected], rtol=0, atol=1e-12)
+    np.testing.assert_allclose(tvecs, [t for _, t in expected], rtol=0, atol=1e-9)
+
+    # Every branch of the matrix → quaternion conversion was exercised
+    R_inv = np.swapaxes(converter._quaternions_to_rotation_matrices(converter._axis_angles_to_quaternions(rotations)), 1, 2)
+    trace = np.trace(R_inv, axis1=1, axis2=2)
+    diagonal = np.diagonal(R_inv, axis1=1, axis2=2)
+    assert (trace > 0).any()
+    assert {int(i) for i in np.argmax(diagonal[trace <= 0], axis=1)} == {0, 1, 2}
+
+
+def test_batch_pose_conversion_handles_no_shots(tmp_path):
+    converter = OpenSfMToCOLMAPConverter(tmp_path / "opensfm", tmp_path / "out")
+    qvecs, tvecs = converter._shots_to_world_to_camera(np.empty((0, 3)), np.empty((0, 3)))
+    assert qvecs.shape == (0, 4)
+    assert tvecs.shape == (0, 3)
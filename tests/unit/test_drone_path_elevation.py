@@ -0,0 +1,545 @@
+import io
+import sys
+import math
+import json
+import types
+import base64
+import bisect
+import itertools
+import zipfile
+import unittest
+import subprocess
+import importlib.util
+from pathlib import Path
+from unittest.mock import patch
+
+
+DRONE_PATH_DIR = (
+    Path(__file__).resolve().parents[2]
+    / "infrastructure"
+    / "spaceport_cdk"
+    / "lambda"
+    / "drone_path"
+)
+if str(DRONE_PATH_DIR) not in sys.path:
+    sys.path.insert(0, str(DRONE_PATH_DIR))
+
+import spiral_designer as drone_path_module  # noqa: E402
+import terrain_elevation  # noqa: E402
+
+SPEC = importlib.util.spec_from_file_location("drone_path_lambda_elevation", DRONE_PATH_DIR / "lambda_function.py")
+handler_module = importlib.util.module_from_spec(SPEC)
+assert SPEC and SPEC.loader
+SPEC.loader.exec_module(handler_module)
+
+
+def planar_elevation_m(lat: float, lon: float) -> float:
+    """Gently tilted plane: bilinear interpolation reproduces it exactly."""
+    return 1500.0 + (lat - 41.7) * 9000.0 + (lon + 111.8) * 4000.0
+
+
+def ridge_elevation_m(lat: float, lon: float) -> float:
+    """Flat valley floor with a single 60m ridge crossing the path at lat 41.7290."""
+    return 1500.0 + 60.0 * math.exp(-(((lat - 41.7290) * 111000.0) ** 2) / (2 * 60.0 ** 2))
+
+
+def two_ridge_elevation_m(lat: float, lon: float) -> float:
+    """ridge_elevation_m plus a lower 40m ridge early in the path at lat 41.7070."""
+    return ridge_elevation_m(lat, lon) + 40.0 * math.exp(-(((lat - 41.7070) * 111000.0) ** 2) / (2 * 60.0 ** 2))
+
+
+class FakeElevationResponse:
+    status_code = 200
+
+    def __init__(self, url: str, terrain=planar_elevation_m):
+        locations = url.split("locations=")[1].split("&")[0]
+        self._results = []
+        for pair in locations.split("|"):
+            lat, lon = (float(v) for v in pair.split(","))
+            self._results.append({"elevation": terrain(lat, lon)})
+
+    def json(self):
+        return {"status": "OK", "results": self._results}
+
+
+class FakeElevationApi:
+    def __init__(self, terrain=planar_elevation_m):
+        self.calls = 0
+        self.terrain = terrain
+
+    def get(self, url, timeout=None, **kwargs):
+        self.calls += 1
+        return FakeElevationResponse(url, self.terrain)
+
+
+class TerrainTileCacheTests(unittest.TestCase):
+    def setUp(self):
+        drone_path_module.TERRAIN_TILE_CACHE.clear()
+        self.api = FakeElevationApi()
+        patcher = patch.object(terrain_elevation, "_http_session", lambda: self.api)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(drone_path_module.TERRAIN_TILE_CACHE.clear)
+
+    def _designer(self):
+        with patch("builtins.print"):
+            return drone_path_module.SpiralDesigner()
+
+    def test_interpolated_elevation_matches_terrain(self):
+        designer = self._designer()
+        with patch("builtins.print"):
+            elevation = designer.get_elevation_feet(41.73218, -111.83979)
+
+        expected = planar_elevation_m(41.73218, -111.83979) * 3.28084
+        self.assertAlmostEqual(elevation, expected, delta=0.01)
+
+    def test_warm_designers_reuse_process_wide_tiles(self):
+        with patch("builtins.print"):
+            self._designer().get_elevation_feet(41.73218, -111.83979)
+        cold_calls = self.api.calls
+        self.assertEqual(cold_calls, 1)
+
+        # A new designer (new Lambda request) nearby must not hit the API again.
+        with patch("builtins.print"):
+            self._designer().get_elevation_feet(41.73220, -111.83975)
+        self.assertEqual(self.api.calls, cold_calls)
+
+    def test_waypoint_misses_are_fetched_in_one_batch(self):
+        designer = self._designer()
+        locations = [(41.73 + i * 0.001, -111.84 + i * 0.0015) for i in range(99)]
+        with patch("builtins.print"):
+            elevations = designer.get_elevations_feet_optimized(locations)
+
+        self.assertEqual(self.api.calls, 1)
+        for (lat, lon), elevation in zip(locations, elevations):
+            self.assertAlmostEqual(elevation, planar_elevation_m(lat, lon) * 3.28084, delta=0.05)
+
+    def test_batches_respect_url_length_limit(self):
+        provider = drone_path_module.GoogleElevationProvider("test-key")
+        locations = [(41.0 + i * 1e-4, -111.0 - i * 1e-4) for i in range(1200)]
+        batches = provider.make_batches(locations)
+
+        self.assertGreater(len(batches), 1)
+        self.assertEqual([loc for batch in batches for loc in batch], locations)
+        for batch in batches:
+            self.assertLessEqual(len(batch), provider.MAX_LOCATIONS_PER_REQUEST)
+
+    def test_concurrent_batches_count_every_request(self):
+        provider = drone_path_module.GoogleElevationProvider("test-key")
+        provider.MAX_LOCATIONS_PER_REQUEST = 10
+        locations = [(41.0 + i * 1e-4, -111.0 - i * 1e-4) for i in range(400)]
+        elevations = provider.fetch_elevations_m(locations)
+
+        self.assertEqual(self.api.calls, 40)
+        self.assertEqual(provider.request_count, self.api.calls)
+        self.assertNotIn(None, elevations)
+
+    def test_failed_batch_falls_back_to_default_elevation(self):
+        failing = types.SimpleNamespace(get=lambda *args, **kwargs: types.SimpleNamespace(status_code=400))
+        designer = self._designer()
+        with patch.object(terrain_elevation, "_http_session", lambda: failing), patch("builtins.print"):
+            self.assertEqual(designer.get_elevation_feet(41.73218, -111.83979), 1000.0)
+
+    def test_proximity_index_returns_nearest_within_radius(self):
+        index = drone_path_module.ProximityElevationIndex(radius_ft=15.0)
+        near, nearer = [100.0], [200.0]
+        index.insert(41.73218, -111.83979, near)
+        index.insert(41.73220, -111.83979, nearer)  # ~2.2m north
+
+        self.assertIs(index.nearest(41.732205, -111.83979), nearer)
+        self.assertIsNone(index.nearest(41.73240, -111.83979))  # ~24m away
+
+    def test_proximity_reuse_is_shared_across_calls(self):
+        designer = self._designer()
+        with patch("builtins.print"):
+            [waypoint_elevation] = designer.get_elevations_feet_optimized([(41.73218, -111.83979)])
+            # A later terrain sample ~1m away reuses the waypoint's elevation exactly.
+            [sample_elevation] = designer.get_elevations_feet_optimized([(41.73219, -111.83979)])
+
+        self.assertEqual(sample_elevation, waypoint_elevation)
+
+    def test_lru_bound_evicts_oldest_tiles(self):
+        cache = drone_path_module.TerrainTileCache(max_tiles=2)
+        for band in range(3):
+            cache.put_node(band, (band * cache.tile_cells, 0), 100.0)
+
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get_node(0, (0, 0)))
+
+
+class AdaptiveTerrainSamplingTests(unittest.TestCase):
+    def setUp(self):
+        drone_path_module.TERRAIN_TILE_CACHE.clear()
+        self.api = FakeElevationApi(ridge_elevation_m)
+        patcher = patch.object(terrain_elevation, "_http_session", lambda: self.api)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(drone_path_module.TERRAIN_TILE_CACHE.clear)
+
+    def _straight_path(self, designer, segments=12):
+        # ~1000ft segments heading north; the ridge sits inside segment 10
+        locations = [(41.7000 + k * 0.00275, -111.8000) for k in range(segments + 1)]
+        elevations = designer.get_elevations_feet_optimized(locations)
+        return [
+            {"lat": lat, "lon": lon, "x": 0.0, "y": 0.0, "phase": "outbound", "elevation": elevation}
+            for (lat, lon), elevation in zip(locations, elevations)
+        ]
+
+    def test_late_segments_are_covered(self):
+        with patch("builtins.print"):
+            designer = drone_path_module.SpiralDesigner()
+            waypoints = self._straight_path(designer)
+            safety = designer.adaptive_terrain_sampling(waypoints)
+
+        self.assertEqual([wp["segment_idx"] for wp in safety], [10])
+        self.assertEqual(safety[0]["type"], "critical_safety_enhanced")
+
+    def test_samples_and_follow_ups_are_batched(self):
+        with patch("builtins.print"):
+            designer = drone_path_module.SpiralDesigner()
+            waypoints = self._straight_path(designer)
+            calls_before = self.api.calls
+            designer.adaptive_terrain_sampling(waypoints)
+
+        # One request for every segment's samples, one for all anomaly follow-ups
+        self.assertEqual(self.api.calls - calls_before, 2)
+
+    def test_short_segments_are_not_sampled(self):
+        with patch("builtins.print"):
+            designer = drone_path_module.SpiralDesigner()
+            waypoints = self._straight_path(designer)
+            for k, wp in enumerate(waypoints):
+                wp["lat"] = 41.7000 + k * 0.0005  # ~180ft apart
+            calls_before = self.api.calls
+            safety = designer.adaptive_terrain_sampling(waypoints)
+
+        self.assertEqual(safety, [])
+        self.assertEqual(self.api.calls, calls_before)
+
+    def test_budget_keeps_largest_clearance_deficit(self):
+        self.api.terrain = two_ridge_elevation_m
+        with patch("builtins.print"):
+            designer = drone_path_module.SpiralDesigner()
+            waypoints = self._straight_path(designer)
+            unlimited = designer.adaptive_terrain_sampling(waypoints)
+            designer.RESERVED_SAFETY_WAYPOINTS = designer.MAX_SAFETY_WAYPOINTS_PER_PATH = 1
+            limited = designer.adaptive_terrain_sampling(waypoints)
+
+        # Both ridges become candidates; with room for one, the taller late ridge wins
+        self.assertEqual([wp["segment_idx"] for wp in unlimited], [2, 10])
+        self.assertEqual([wp["segment_idx"] for wp in limited], [10])
+        self.assertGreater(unlimited[1]["clearance_deficit"], unlimited[0]["clearance_deficit"])
+
+    def test_plan_keeps_path_order_and_breaks_ties_early(self):
+        with patch("builtins.print"):
+            designer = drone_path_module.SpiralDesigner()
+            candidates = [{"segment_idx": k, "clearance_deficit": d} for k, d in enumerate([50, 90, 50, 120, 10])]
+            planned = designer.plan_safety_waypoints(candidates, 3)
+
+        self.assertEqual([wp["segment_idx"] for wp in planned], [0, 1, 3])
+        self.assertEqual(designer.plan_safety_waypoints(candidates, 0), [])
+
+    def test_budget_fills_free_slots_within_bounds(self):
+        with patch("builtins.print"):
+            designer = drone_path_module.SpiralDesigner()
+
+        self.assertEqual(designer.safety_waypoint_budget(87), designer.RESERVED_SAFETY_WAYPOINTS)
+        self.assertEqual(designer.safety_waypoint_budget(83), 16)
+        self.assertEqual(designer.safety_waypoint_budget(40), designer.MAX_SAFETY_WAYPOINTS_PER_PATH)
+        self.assertEqual(designer.safety_waypoint_budget(95), 4)
+        self.assertEqual(designer.safety_waypoint_budget(99), 0)
+
+    def test_long_path_never_exceeds_waypoint_ceiling(self):
+        with patch("builtins.print"):
+            designer = drone_path_module.SpiralDesigner()
+            path_waypoints = 95
+            candidates = [{"segment_idx": k % (path_waypoints - 1), "clearance_deficit": float(k)} for k in range(30)]
+            planned = designer.plan_safety_waypoints(candidates, designer.safety_waypoint_budget(path_waypoints))
+
+        self.assertEqual(len(planned), 4)
+        self.assertLessEqual(path_waypoints + len(planned), designer.MAX_TOTAL_WAYPOINTS)
+
+    def test_full_mission_keeps_safety_waypoints_per_battery_slice(self):
+        drone_path_module.MISSION_PLAN_STORE.clear()
+        self.addCleanup(drone_path_module.MISSION_PLAN_STORE.clear)
+        params = {"slices": 3, "N": 8, "r0": 150, "rHold": 1595}
+        with patch("builtins.print"):
+            designer = drone_path_module.SpiralDesigner(elevation_provider=drone_path_module.SyntheticTerrainProvider())
+            slice_lengths = [len(w) for w in designer.compute_waypoints(params)]
+            designer.generate_csv(params, "41.74253, -111.78932", 120.0)
+
+        rows = designer._enhanced_waypoints_data
+        self.assertGreater(sum(slice_lengths), designer.MAX_TOTAL_WAYPOINTS)
+        self.assertIsNotNone(rows)
+
+        # Each battery's share of the combined path still fits one Litchi mission
+        slice_ends = list(itertools.accumulate(slice_lengths))
+        safety_per_slice = [0] * len(slice_lengths)
+        segment = -1
+        for row in rows:
+            if row["is_safety"]:
+                safety_per_slice[bisect.bisect_right(slice_ends, segment)] += 1
+            else:
+                segment += 1
+        self.assertGreater(sum(safety_per_slice), 0)
+        for length, safety in zip(slice_lengths, safety_per_slice):
+            self.assertLessEqual(safety, designer.safety_waypoint_budget(length))
+
+
+class ElevationProviderTests(unittest.TestCase):
+    CENTER = "41.74253, -111.78932"
+
+    def setUp(self):
+        drone_path_module.TERRAIN_TILE_CACHE.clear()
+        drone_path_module.MISSION_PLAN_STORE.clear()
+        self.addCleanup(drone_path_module.TERRAIN_TILE_CACHE.clear)
+        self.addCleanup(drone_path_module.MISSION_PLAN_STORE.clear)
+
+    def test_synthetic_provider_plans_without_network(self):
+        provider = drone_path_module.SyntheticTerrainProvider()
+        offline = types.SimpleNamespace(get=lambda *args, **kwargs: self.fail("network access"))
+        with patch.object(terrain_elevation, "_http_session", lambda: offline), patch("builtins.print"):
+            designer = drone_path_module.SpiralDesigner(elevation_provider=provider)
+            csv_content = designer.generate_battery_csv(
+                {"slices": 3, "N": 6, "r0": 150, "rHold": 1595}, self.CENTER, 0, 120.0
+            )
+
+        self.assertGreater(len(csv_content.splitlines()), 10)
+        self.assertGreater(provider.request_count, 0)
+        self.assertEqual(designer.elevation_failures, 0)
+
+    def test_synthetic_terrain_has_relief(self):
+        provider = drone_path_module.SyntheticTerrainProvider()
+        locations = [(41.74 + k * 0.0005, -111.79 + k * 0.0005) for k in range(200)]
+        elevations = provider.fetch_elevations_m(locations)
+
+        self.assertEqual(elevations, provider.fetch_elevations_m(locations))
+        self.assertGreater(max(elevations) - min(elevations), 100.0)
+
+    def test_latency_is_injected_per_request(self):
+        provider = drone_path_module.SyntheticTerrainProvider(latency_s=0.05, batch_size=100)
+        with patch.object(drone_path_module.time, "sleep") as sleep:
+            provider.fetch_elevations_m([(41.7, -111.8)] * 250)
+
+        sleep.assert_called_once_with(0.05 * 3)
+        self.assertEqual(provider.request_count, 3)
+
+    def test_environment_selects_provider(self):
+        environ = drone_path_module.os.environ
+        with patch.dict(environ, {"ELEVATION_PROVIDER": "synthetic", "ALLOW_SYNTHETIC_TERRAIN": "1",
+                                  "SYNTHETIC_ELEVATION_LATENCY_MS": "20"}), patch("builtins.print"):
+            environ.pop("AWS_LAMBDA_FUNCTION_NAME", None)
+            provider = drone_path_module.make_elevation_provider("test-key")
+        self.assertIsInstance(provider, drone_path_module.SyntheticTerrainProvider)
+        self.assertAlmostEqual(provider.latency_s, 0.02)
+
+        with patch.dict(drone_path_module.os.environ, {"ELEVATION_PROVIDER": ""}):
+            self.assertIsInstance(drone_path_module.make_elevation_provider("test-key"),
+                                  drone_path_module.GoogleElevationProvider)
+
+    def test_synthetic_provider_is_refused_without_opt_in_or_in_lambda(self):
+        environ = drone_path_module.os.environ
+        with patch.dict(environ, {"ELEVATION_PROVIDER": "synthetic"}):
+            environ.pop("ALLOW_SYNTHETIC_TERRAIN", None)
+            with self.assertRaises(ValueError):
+                drone_path_module.make_elevation_provider("test-key")
+
+        with patch.dict(environ, {"ELEVATION_PROVIDER": "synthetic", "ALLOW_SYNTHETIC_TERRAIN": "1",
+                                  "AWS_LAMBDA_FUNCTION_NAME": "Spaceport-DronePath"}):
+            with self.assertRaises(ValueError):
+                drone_path_module.make_elevation_provider("test-key")
+
+
+class LitchiCsvWriterTests(unittest.TestCase):
+    CENTER = {"lat": 41.74253, "lon": -111.78932}
+
+    def _designer(self):
+        with patch("builtins.print"):
+            return drone_path_module.SpiralDesigner(elevation_provider=drone_path_module.SyntheticTerrainProvider())
+
+    def _plan(self):
+        path = [
+            {"x": 0.0, "y": 100.0, "curve": 30, "phase": "outbound_start"},
+            {"x": 0.0, "y": 600.0, "curve": 45.5, "phase": "outbound_bounce_1"},
+            {"x": 120.0, "y": 650.0, "curve": 40, "phase": "safety_critical_safety_enhanced"},
+            {"x": 300.0, "y": 900.0, "curve": 60, "phase": "hold_mid"},
+            {"x": 200.0, "y": 300.0, "curve": 30, "phase": "inbound_bounce_1"},
+        ]
+        return {"takeoff_elevation_feet": 5000.0, "spiral_path": path,
+                "ground_elevations": [5000.0, 5010.0, 5090.0, 4990.0, 5020.0]}
+
+    def test_altitude_ramps_follow_phase_rules(self):
+        with patch("builtins.print"):
+            rows = self._designer()._write_litchi_csv(self._plan(), self.CENTER, 120.0).split("\n")
+
+        altitudes = [float(row.split(",")[2]) for row in rows[1:]]
+        hold_agl = 120.0 + (math.hypot(300.0, 900.0) - 100.0) * 0.20
+        self.assertEqual(altitudes[0], 120.0)
+        self.assertEqual(altitudes[1], round((10.0 + 120.0 + 500.0 * 0.20) * 100) / 100)
+        # Non-safety-aware (battery) rendering treats the safety pseudo waypoint as an unknown phase
+        self.assertEqual(altitudes[2], round((90.0 + 120.0 + (math.hypot(120.0, 650.0) - 100.0) * 0.20) * 100) / 100)
+        self.assertEqual(altitudes[3], round(hold_agl * 100) / 100)
+        inbound_agl = hold_agl + (math.hypot(300.0, 900.0) - math.hypot(200.0, 300.0)) * 0.1
+        self.assertEqual(altitudes[4], round((20.0 + inbound_agl) * 100) / 100)
+
+    def test_safety_rows_use_precalculated_position_and_altitude(self):
+        plan = self._plan()
+        safety_rows = [{"is_safety": False}] * 5
+        safety_rows[2] = {"is_safety": True, "coords": {"lat": 41.7441234, "lon": -111.7887654},
+                          "safety_altitude": 5190.0, "safety_reason": "ridge"}
+        with patch("builtins.print"):
+            rows = self._designer()._write_litchi_csv(plan, self.CENTER, 120.0, safety_rows=safety_rows).split("\n")
+
+        self.assertTrue(rows[3].startswith("41.74412,-111.78877,190.0,"))
+        # Safety rows never move the outbound maximum used by inbound waypoints
+        self.assertEqual(float(rows[5].split(",")[2]), float(
+            self._designer()._write_litchi_csv(plan, self.CENTER, 120.0).split("\n")[5].split(",")[2]))
+
+    def test_columns_match_litchi_format(self):
+        plan = self._plan()
+        plan["spiral_path"][0]["x"] = -0.5  # Longitude rounds to zero from below
+        with patch("builtins.print"):
+            rows = self._designer()._write_litchi_csv(plan, {"lat": 0.0, "lon": 0.0}, 120.0).split("\n")
+
+        self.assertEqual(rows[0], drone_path_module.SpiralDesigner.LITCHI_CSV_HEADER)
+        self.assertTrue(all(len(row.split(",")) == 16 for row in rows))
+        self.assertEqual(rows[1].split(",")[1], "0.0")  # Never "-0.0"
+        self.assertEqual([row.split(",")[14] for row in rows[1:]], ["3.0", "3.0", "3.0", "3.0", "0"])
+        self.assertEqual(rows[-1].split(",")[3], "0")  # Last waypoint keeps heading 0
+
+
+class MissionPlanStoreTests(unittest.TestCase):
+    PARAMS = {"slices": 3, "N": 6, "r0": 150, "rHold": 1595}
+    CENTER = "41.74253, -111.78932"
+
+    def setUp(self):
+        drone_path_module.TERRAIN_TILE_CACHE.clear()
+        drone_path_module.MISSION_PLAN_STORE.clear()
+        self.api = FakeElevationApi()
+        patcher = patch.object(terrain_elevation, "_http_session", lambda: self.api)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(drone_path_module.TERRAIN_TILE_CACHE.clear)
+        self.addCleanup(drone_path_module.MISSION_PLAN_STORE.clear)
+
+    def _battery_csv(self, battery_index):
+        with patch("builtins.print"):
+            designer = drone_path_module.SpiralDesigner()
+            return designer.generate_battery_csv(dict(self.PARAMS), self.CENTER, battery_index, 120.0)
+
+    def test_repeat_battery_download_is_a_lookup(self):
+        first = self._battery_csv(1)
+        with patch.object(drone_path_module.SpiralDesigner, "_build_slices") as build, \
+                patch.object(drone_path_module.SpiralDesigner, "get_elevations_feet_optimized") as fetch:
+            second = self._battery_csv(1)
+
+        build.assert_not_called()
+        fetch.assert_not_called()
+        self.assertEqual(first, second)
+
+    def test_equivalent_params_share_memoized_slices(self):
+        key_int = drone_path_module.MissionPlanStore.plan_key("slices", self.PARAMS)
+        key_float = drone_path_module.MissionPlanStore.plan_key(
+            "slices", {"slices": "3", "N": 6.0, "r0": 150.0, "rHold": 1595.0}
+        )
+        self.assertEqual(key_int, key_float)
+
+    def test_callers_cannot_mutate_memoized_slices(self):
+        with patch("builtins.print"):
+            designer = drone_path_module.SpiralDesigner()
+            designer.compute_waypoints(self.PARAMS)[0][0]["curve"] = -1
+            fresh = designer.compute_waypoints(self.PARAMS)[0][0]["curve"]
+
+        self.assertNotEqual(fresh, -1)
+
+
+class BatteryBundleTests(unittest.TestCase):
+    BODY = {"slices": 3, "N": 6, "r0": 150, "rHold": 1595, "center": "41.74253, -111.78932"}
+
+    def setUp(self):
+        drone_path_module.TERRAIN_TILE_CACHE.clear()
+        drone_path_module.MISSION_PLAN_STORE.clear()
+        self.api = FakeElevationApi()
+        patcher = patch.object(terrain_elevation, "_http_session", lambda: self.api)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(drone_path_module.TERRAIN_TILE_CACHE.clear)
+        self.addCleanup(drone_path_module.MISSION_PLAN_STORE.clear)
+
+    def _invoke(self, resource, body, path_parameters=None):
+        event = {"httpMethod": "POST", "resource": resource, "body": json.dumps(body),
+                 "pathParameters": path_parameters}
+        with patch("builtins.print"):
+            return handler_module.lambda_handler(event, None)
+
+    def _individual_csvs(self):
+        return [
+            self._invoke("/api/csv/battery/{id}", self.BODY, {"id": str(k)})["body"]
+            for k in range(1, self.BODY["slices"] + 1)
+        ]
+
+    def test_bundle_matches_individual_downloads(self):
+        bundle = json.loads(self._invoke("/api/csv/batteries", self.BODY)["body"])
+        bundle_calls = self.api.calls
+
+        drone_path_module.TERRAIN_TILE_CACHE.clear()
+        drone_path_module.MISSION_PLAN_STORE.clear()
+        self.api.calls = 0
+        individual = self._individual_csvs()
+
+        self.assertEqual(bundle["count"], 3)
+        self.assertEqual([b["csv"] for b in bundle["batteries"]], individual)
+        self.assertEqual(bundle_calls, 1)
+        self.assertLess(bundle_calls, self.api.calls)
+
+    def test_zip_bundle_contains_one_csv_per_battery(self):
+        response = self._invoke("/api/csv/batteries", dict(self.BODY, format="zip"))
+
+        self.assertTrue(response["isBase64Encoded"])
+        self.assertEqual(response["headers"]["Content-Type"], "application/zip")
+        with zipfile.ZipFile(io.BytesIO(base64.b64decode(response["body"]))) as zf:
+            self.assertEqual(zf.namelist(), ["battery-1.csv", "battery-2.csv", "battery-3.csv"])
+            self.assertEqual(zf.read("battery-2.csv").decode(), self._individual_csvs()[1])
+
+    def test_unknown_bundle_format_is_rejected(self):
+        response = self._invoke("/api/csv/batteries", dict(self.BODY, format="tar"))
+        self.assertEqual(response["statusCode"], 400)
+
+
+class ColdStartLayoutTests(unittest.TestCase):
+    def _fresh_interpreter_modules(self, event):
+        script = (
+            "import json, sys\n"
+            f"sys.path.insert(0, {str(DRONE_PATH_DIR)!r})\n"
+            "import lambda_function\n"
+            f"response = lambda_function.lambda_handler({event!r}, None)\n"
+            "print(json.dumps({'status': response['statusCode'], 'modules': sorted(sys.modules)}))\n"
+        )
+        result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True)
+        return json.loads(result.stdout.strip().splitlines()[-1])
+
+    def test_preflight_does_not_import_planning_engine(self):
+        result = self._fresh_interpreter_modules({"httpMethod": "OPTIONS", "resource": "/api/csv"})
+
+        self.assertEqual(result["status"], 200)
+        for heavy in ("spiral_designer", "numpy", "requests"):
+            self.assertNotIn(heavy, result["modules"])
+
+    def test_unknown_route_does_not_import_planning_engine(self):
+        result = self._fresh_interpreter_modules({"httpMethod": "POST", "resource": "/api/nope", "body": "{}"})
+
+        self.assertEqual(result["status"], 404)
+        self.assertNotIn("numpy", result["modules"])
+
+    def test_precompiled_center_patterns(self):
+        with patch("builtins.print"):
+            designer = drone_path_module.SpiralDesigner()
+
+        self.assertEqual(designer.parse_center("41.73218° N, 111.83979° W"), {"lat": 41.73218, "lon": -111.83979})
+        self.assertEqual(designer.parse_center("41.73218 s, 111.83979 e"), {"lat": -41.73218, "lon": 111.83979})
+        self.assertEqual(designer.parse_center(" 41.73218, -111.83979 "), {"lat": 41.73218, "lon": -111.83979})
+        self.assertIsNone(designer.parse_center("somewhere"))
+
+
+if __name__ == "__main__":
+    unittest.main()
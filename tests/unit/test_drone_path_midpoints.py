@@ -1,31 +1,21 @@
+import math
 import sys
-import types
 import unittest
-import importlib.util
 from pathlib import Path
 from unittest.mock import patch
 
 
-MODULE_PATH = (
+DRONE_PATH_DIR = (
     Path(__file__).resolve().parents[2]
     / "infrastructure"
     / "spaceport_cdk"
     / "lambda"
     / "drone_path"
-    / "lambda_function.py"
 )
+if str(DRONE_PATH_DIR) not in sys.path:
+    sys.path.insert(0, str(DRONE_PATH_DIR))
 
-
-if "requests" not in sys.modules:
-    # The unit tests don't exercise network calls; stub requests so the module imports
-    # cleanly in environments without that dependency.
-    fake_requests = types.SimpleNamespace(get=lambda *args, **kwargs: None)
-    sys.modules["requests"] = fake_requests
-
-SPEC = importlib.util.spec_from_file_location("drone_path_lambda", MODULE_PATH)
-drone_path_module = importlib.util.module_from_spec(SPEC)
-assert SPEC and SPEC.loader
-SPEC.loader.exec_module(drone_path_module)
+import spiral_designer as drone_path_module  # noqa: E402
 
 
 class DronePathMidpointSamplingTests(unittest.TestCase):
@@ -68,6 +58,28 @@ class DronePathMidpointSamplingTests(unittest.TestCase):
                 self.assertEqual(len(inbound_mids), midpoints + (6 - 1) * midpoints)
                 self.assertEqual(len(hold_mids), midpoints)
 
+    def test_vectorized_slices_match_single_slice_builds(self):
+        params = {"slices": 3, "N": 6, "r0": 150, "rHold": 1595}
+        with patch("builtins.print"):
+            all_slices = self.designer.compute_waypoints(params)
+            for slice_idx, slice_waypoints in enumerate(all_slices):
+                self.assertEqual(slice_waypoints, self.designer.build_slice(slice_idx, params))
+
+    def test_spiral_geometry_matches_scalar_rotation(self):
+        params = {"slices": 4, "N": 5, "r0": 100, "rHold": 2000}
+        dphi = 2 * math.pi / params["slices"]
+        with patch("builtins.print"):
+            raw = self.designer.make_spiral(dphi, params["N"], params["r0"], params["rHold"])
+            waypoints = self.designer.build_slice(2, params)
+
+        offset = math.pi / 2 + 2 * dphi
+        t_total = (2 * params["N"] + 1) * dphi
+        for wp in waypoints:
+            index = max(0, min(len(raw) - 1, round(wp["t"] * (len(raw) - 1) / t_total)))
+            expected = self.designer.rotate_point(raw[index], offset)
+            self.assertAlmostEqual(wp["x"], expected["x"], places=9)
+            self.assertAlmostEqual(wp["y"], expected["y"], places=9)
+
     def test_single_slice_optimizer_respects_waypoint_budget(self):
         with patch("builtins.print"):
             optimized = self.designer.optimize_spiral_for_battery(
@@ -85,5 +97,56 @@ class DronePathMidpointSamplingTests(unittest.TestCase):
         self.assertGreater(float(optimized["rHold"]), float(optimized["r0"]))
 
 
+class ArrayGeodesyTests(unittest.TestCase):
+    CENTER = (41.74253, -111.78932)
+
+    def setUp(self):
+        with patch("builtins.print"):
+            self.designer = drone_path_module.SpiralDesigner()
+
+    def test_projection_round_trip(self):
+        xy = drone_path_module.np.array([[0.0, 0.0], [1500.0, -320.5], [-4000.0, 2750.25]])
+        lat_lon = drone_path_module.xy_to_lat_lon_array(xy, *self.CENTER)
+        back = drone_path_module.lat_lon_to_xy_array(lat_lon, *self.CENTER)
+
+        drone_path_module.np.testing.assert_allclose(back, xy, atol=1e-6)
+        for (x, y), (lat, lon) in zip(xy.tolist(), lat_lon.tolist()):
+            self.assertEqual(self.designer.xy_to_lat_lon(x, y, *self.CENTER), {"lat": lat, "lon": lon})
+
+    def test_distance_along_segments_is_clamped_projection(self):
+        start = self.CENTER
+        end = drone_path_module.xy_to_lat_lon_array([(1000.0, 0.0)], *self.CENTER)[0]
+        points = drone_path_module.xy_to_lat_lon_array([(250.0, 80.0), (-50.0, 0.0), (1200.0, -10.0)], *self.CENTER)
+
+        along = drone_path_module.distance_along_segments_ft([start], [end], points)
+
+        drone_path_module.np.testing.assert_allclose(along, [250.0, 0.0, 1000.0], atol=1e-3)
+        self.assertEqual(self.designer.calculate_distance_along_segment(*start, *end, *points[0]), along[0])
+        self.assertEqual(drone_path_module.distance_along_segments_ft([start], [start], points[:1]).tolist(), [0.0])
+
+    def test_interpolated_elevations_follow_segment_fraction(self):
+        start, end = (41.0, -111.0), (41.01, -111.0)
+        points = [(41.0025, -111.0), (41.005, -111.0), (41.01, -111.0)]
+
+        expected = drone_path_module.interpolate_elevations([start], [end], 100.0, 200.0, points)
+
+        drone_path_module.np.testing.assert_allclose(expected, [125.0, 150.0, 200.0], rtol=1e-9)
+        self.assertEqual(drone_path_module.interpolate_elevations([start], [start], 100.0, 200.0, points[:1]).tolist(),
+                         [100.0])
+
+    def test_segment_samples_match_intermediate_points(self):
+        lat = drone_path_module.np.array([41.0, 41.01, 41.01])
+        lon = drone_path_module.np.array([-111.0, -111.0, -110.99])
+        segment_ft = drone_path_module.haversine_m(lat[:-1], lon[:-1], lat[1:], lon[1:]) * 3.28084
+
+        seg, _, sample_lat, sample_lon, distance = drone_path_module.segment_samples(lat, lon, segment_ft, [0, 1], 250)
+
+        for i in (0, 1):
+            points = self.designer.generate_intermediate_points(lat[i], lon[i], lat[i + 1], lon[i + 1], 250)
+            self.assertEqual([(p["lat"], p["lon"], p["distance_from_start"]) for p in points],
+                             list(zip(sample_lat[seg == i].tolist(), sample_lon[seg == i].tolist(),
+                                      distance[seg == i].tolist())))
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -68,7 +68,7 @@ def test_project_exif_gps_to_trajectory_uses_trajectory_altitude():
     proc.flight_segments = [seg]
 
     # Monkeypatch local conversion to treat lat->x and lon->y directly in meters for this unit test
-    proc.convert_to_local_3d = lambda lat, lon, alt: np.array([lat, lon, alt], dtype=float)
+    proc.convert_to_local_3d_batch = lambda lat, lon, alt: np.column_stack([lat, lon, alt]).astype(float)
 
     # EXIF location maps to x=50, y=0 (on the path mid point)
     exif = {'latitude': 50.0, 'longitude': 0.0}
@@ -80,3 +80,115 @@ def test_project_exif_gps_to_trajectory_uses_trajectory_altitude():
     assert projected['segment_index'] == 0
     assert 0.45 <= projected['segment_t'] <= 0.55
 
+
+
+def _curved_processor():
+    proc = Advanced3DPathProcessor(csv_path=Path('/tmp/none.csv'), images_dir=Path('/tmp/none'))
+    waypoints = [np.array([0.0, 0.0, 10.0]), np.array([100.0, 0.0, 20.0]),
+                 np.array([100.0, 100.0, 30.0]), np.array([0.0, 100.0, 40.0])]
+    proc.flight_segments = []
+    proc.path_distances = [0.0]
+    for i in range(len(waypoints) - 1):
+        start, end = waypoints[i], waypoints[i + 1]
+        control_points = proc._generate_curve_control_points(start, end, i, waypoints, None)
+        seg = FlightSegment(
+            start_point=start,
+            end_point=end,
+            control_points=control_points,
+            start_waypoint_idx=i,
+            end_waypoint_idx=i + 1,
+            distance=proc._calculate_curved_distance(start, end, control_points),
+            heading=0.0,
+            altitude_change=float(end[2] - start[2]),
+        )
+        proc.flight_segments.append(seg)
+        proc.path_distances.append(proc.path_distances[-1] + seg.distance)
+    return proc
+
+
+def test_batched_trajectory_query_matches_dense_brute_force_on_curves():
+    proc = _curved_processor()
+    queries = np.random.default_rng(3).uniform(-20.0, 120.0, size=(40, 2))
+
+    batched = proc.find_closest_trajectory_points(queries)
+
+    for xy, closest in zip(queries, batched):
+        # Brute force over finely sampled splines
+        best = min(
+            (np.linalg.norm(xy - pt[:2]), seg_idx, pt)
+            for seg_idx, seg in enumerate(proc.flight_segments)
+            for pt in seg.interpolate_points(np.linspace(0.0, 1.0, 2001))
+        )
+        assert closest['segment_index'] == best[1]
+        assert math.isclose(closest['distance_m'], best[0], abs_tol=0.02)
+        assert math.isclose(closest['altitude_local'], best[2][2], abs_tol=0.05)
+        # Single-point API agrees with the batch
+        assert proc.find_closest_trajectory_point(xy)['parameter_t'] == closest['parameter_t']
+
+
+def test_trajectory_index_rebuilds_when_flight_path_changes():
+    proc = _curved_processor()
+    first = proc._get_trajectory_index()
+    assert proc._get_trajectory_index() is first
+
+    proc.flight_segments = proc.flight_segments[:1]
+    proc.path_distances = proc.path_distances[:2]
+    assert proc._get_trajectory_index() is not first
+    assert proc.find_closest_trajectory_point(np.array([100.0, 100.0]))['segment_index'] == 0
+
+
+def test_batch_curve_geometry_matches_per_segment_helpers():
+    proc = Advanced3DPathProcessor(csv_path=Path('/tmp/none.csv'), images_dir=Path('/tmp/none'))
+    angles = np.linspace(0.0, 3 * np.pi, 12)
+    waypoints = np.column_stack([80 * np.cos(angles), 80 * np.sin(angles), 5 * angles])
+    waypoint_list = list(waypoints)
+
+    controls = proc._generate_all_curve_control_points(waypoints)
+    distances = proc._calculate_curved_distances(waypoints[:-1], controls, waypoints[1:])
+
+    for i in range(len(waypoints) - 1):
+        expected = proc._generate_curve_control_points(waypoints[i], waypoints[i + 1], i, waypoint_list, None)
+        np.testing.assert_allclose(controls[i], expected, atol=1e-9)
+        assert math.isclose(distances[i], proc._calculate_curved_distance(waypoints[i], waypoints[i + 1], expected),
+                            rel_tol=1e-12)
+        # Arc length of a curve is never shorter than its chord
+        assert distances[i] >= np.linalg.norm(waypoints[i + 1] - waypoints[i])
+
+    assert proc._generate_all_curve_control_points(waypoints[:2]) is None
+
+
+def test_segment_lookup_by_distance_uses_first_containing_segment():
+    proc = Advanced3DPathProcessor(csv_path=Path('/tmp/none.csv'), images_dir=Path('/tmp/none'))
+    proc.flight_segments = [None, None, None]
+    proc.path_distances = [0.0, 5.0, 5.0, 10.0]
+
+    assert proc._get_segment_at_distance(0.0) == (0, 0.0)
+    assert proc._get_segment_at_distance(2.5) == (0, 0.5)
+    assert proc._get_segment_at_distance(5.0) == (0, 1.0)
+    assert proc._get_segment_at_distance(7.5) == (2, 0.5)
+    assert proc._get_segment_at_distance(12.0) == (2, 1.0)
+    assert proc._get_segment_at_distance(-1.0) == (2, 1.0)
+
+
+def test_batch_local_frame_round_trip_across_zone_edge_and_equator():
+    import pandas as pd
+
+    proc = Advanced3DPathProcessor(csv_path=Path('/tmp/none.csv'), images_dir=Path('/tmp/none'))
+    # Straddles the 0° meridian (UTM zones 30/31) and the equator
+    lat = np.linspace(-0.004, 0.005, 25)
+    lon = np.linspace(-0.006, 0.003, 25)
+    alt = np.linspace(1500.0, 1560.0, 25)
+    proc.flight_data = pd.DataFrame({'latitude': lat, 'longitude': lon, 'altitude': alt})
+    proc.setup_local_coordinate_system()
+
+    local = proc.convert_to_local_3d_batch(lat, lon, alt)
+    assert local.shape == (25, 3)
+    np.testing.assert_allclose(proc.convert_to_local_3d(lat[3], lon[3], alt[3]), local[3])
+    # One continuous frame: consecutive points stay ~equally spaced through the zone edge
+    steps = np.linalg.norm(np.diff(local[:, :2], axis=0), axis=1)
+    assert steps.max() - steps.min() < 0.5
+
+    back_lat, back_lon, back_alt = proc.convert_from_local_3d_batch(local)
+    np.testing.assert_allclose(back_lat, lat, atol=1e-9)
+    np.testing.assert_allclose(back_lon, lon, atol=1e-9)
+    np.testing.assert_allclose(back_alt, alt)
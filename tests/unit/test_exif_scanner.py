@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""Unit tests for the single-read JPEG EXIF/XMP scanner in the SfM GPS processor."""
+
+import io
+import os
+import struct
+from datetime import datetime
+from pathlib import Path
+
+import exifread
+from PIL import Image
+
+from infrastructure.containers.sfm import gps_processor_3d
+from infrastructure.containers.sfm.gps_processor_3d import Advanced3DPathProcessor, scan_photo_exif, scan_photos_exif
+
+
+def _ifd(entries, base):
+    """Little-endian IFD at TIFF offset `base`; entries are (tag, type, count, payload bytes)."""
+    body = struct.pack('<H', len(entries))
+    extra = b''
+    extra_offset = base + 2 + 12 * len(entries) + 4
+    for tag, field_type, count, payload in entries:
+        if len(payload) <= 4:
+            body += struct.pack('<HHL', tag, field_type, count) + payload.ljust(4, b'\x00')
+        else:
+            body += struct.pack('<HHLL', tag, field_type, count, extra_offset + len(extra))
+            extra += payload
+    return body + struct.pack('<L', 0) + extra
+
+
+def _rationals(*pairs):
+    return b''.join(struct.pack('<LL', num, den) for num, den in pairs)
+
+
+def _exif_app1(timestamp='2024:05:01 10:20:30'):
+    """Exif APP1 payload with DateTimeOriginal and a DJI-style GPS IFD."""
+    stamp = timestamp.encode() + b'\x00'
+    gps_entries = [
+        (1, 2, 2, b'N\x00'),
+        (2, 5, 3, _rationals((47, 1), (51, 1), (198, 1000))),
+        (3, 2, 2, b'W\x00'),
+        (4, 5, 3, _rationals((114, 1), (15, 1), (44142, 1000))),
+        (5, 1, 1, b'\x00'),
+        (6, 5, 1, _rationals((123456, 1000))),
+    ]
+    # Layout: header(8) | IFD0 (2 entries) | Exif IFD | GPS IFD
+    ifd0_size = 2 + 12 * 2 + 4
+    exif_ifd = _ifd([(0x9003, 2, len(stamp), stamp)], 8 + ifd0_size)
+    gps_offset = 8 + ifd0_size + len(exif_ifd)
+    ifd0 = _ifd([(0x8769, 4, 1, struct.pack('<L', 8 + ifd0_size)),
+                 (0x8825, 4, 1, struct.pack('<L', gps_offset))], 8)
+    tiff = b'II*\x00' + struct.pack('<L', 8) + ifd0 + exif_ifd + _ifd(gps_entries, gps_offset)
+    return b'Exif\x00\x00' + tiff
+
+
+def _xmp_app1():
+    packet = (b'<x:xmpmeta><rdf:Description drone-dji:AbsoluteAltitude="+1532.87" '
+              b'drone-dji:GimbalPitchDegree="-30.00">'
+              b'<drone-dji:RelativeAltitude>+60.10</drone-dji:RelativeAltitude>'
+              b'</rdf:Description></x:xmpmeta>')
+    return b'http://ns.adobe.com/xap/1.0/\x00' + packet
+
+
+def _write_drone_jpeg(path: Path, timestamp='2024:05:01 10:20:30'):
+    buffer = io.BytesIO()
+    Image.new('RGB', (64, 48), (90, 120, 60)).save(buffer, format='JPEG')
+    body = buffer.getvalue()
+    segments = b''.join(b'\xff\xe1' + struct.pack('>H', len(p) + 2) + p
+                        for p in (_exif_app1(timestamp), _xmp_app1()))
+    path.write_bytes(body[:2] + segments + body[2:])
+    return path
+
+
+def test_scanner_reads_gps_dji_altitudes_and_timestamp(tmp_path):
+    photo = _write_drone_jpeg(tmp_path / 'DJI_0001.JPG')
+
+    exif = scan_photo_exif(photo)
+
+    assert abs(exif.latitude - (47 + 51 / 60 + 0.198 / 3600)) < 1e-9
+    assert abs(exif.longitude - (-(114 + 15 / 60 + 44.142 / 3600))) < 1e-9
+    assert abs(exif.gps_altitude - 123.456) < 1e-9
+    assert exif.absolute_altitude == 1532.87
+    assert exif.relative_altitude == 60.10
+    assert exif.timestamp == datetime(2024, 5, 1, 10, 20, 30)
+
+    # Same answer as a full exifread parse
+    with open(photo, 'rb') as f:
+        tags = exifread.process_file(f, details=False)
+    proc = Advanced3DPathProcessor(csv_path=Path('/tmp/none.csv'), images_dir=tmp_path)
+    assert exif.latitude == proc._dms_to_decimal(tags['GPS GPSLatitude'].values, str(tags['GPS GPSLatitudeRef']))
+    assert exif.longitude == proc._dms_to_decimal(tags['GPS GPSLongitude'].values, str(tags['GPS GPSLongitudeRef']))
+
+
+def test_scanner_reads_headers_only_and_memoizes_by_mtime(tmp_path, monkeypatch):
+    photo = _write_drone_jpeg(tmp_path / 'DJI_0002.JPG')
+    with open(photo, 'ab') as f:
+        f.write(b'\x00' * 1_000_000)  # Large image payload the scanner must not read
+
+    bytes_read = []
+    real_open = open
+
+    class CountingFile(io.BufferedReader):
+        def read(self, size=-1):
+            data = super().read(size)
+            bytes_read.append(len(data))
+            return data
+
+    def counting_open(path, mode='r', *args, **kwargs):
+        if mode == 'rb':
+            return CountingFile(real_open(path, 'rb', buffering=0))
+        return real_open(path, mode, *args, **kwargs)
+
+    monkeypatch.setattr(gps_processor_3d, 'open', counting_open, raising=False)
+
+    first = scan_photo_exif(photo)
+    assert 0 < sum(bytes_read) < 4096
+
+    bytes_read.clear()
+    assert scan_photo_exif(photo) is first
+    assert bytes_read == []
+
+    # A rewritten file (new mtime) is scanned again
+    _write_drone_jpeg(photo, timestamp='2024:05:01 11:00:00')
+    stat = photo.stat()
+    os.utime(photo, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert scan_photo_exif(photo).timestamp == datetime(2024, 5, 1, 11, 0, 0)
+
+
+def test_photo_list_orders_by_pooled_scan_timestamps(tmp_path):
+    stamps = {'DJI_0003.JPG': '2024:05:01 10:00:09', 'DJI_0001.JPG': '2024:05:01 10:00:03',
+              'DJI_0002.JPG': '2024:05:01 10:00:06'}
+    for name, stamp in stamps.items():
+        _write_drone_jpeg(tmp_path / name, timestamp=stamp)
+    (tmp_path / 'notes.png').write_bytes(b'not an image')
+
+    scanned = scan_photos_exif(sorted(tmp_path.glob('*.JPG')), max_workers=4)
+    assert [s.timestamp.second for s in scanned.values()] == [3, 6, 9]
+
+    proc = Advanced3DPathProcessor(csv_path=Path('/tmp/none.csv'), images_dir=tmp_path)
+    photos = proc.get_photo_list_with_validation()
+    assert [p[0].name for p in photos if p[0].suffix == '.JPG'] == ['DJI_0001.JPG', 'DJI_0002.JPG', 'DJI_0003.JPG']
+    assert proc.extract_dji_gps_from_exif(tmp_path / 'DJI_0001.JPG')['relative_altitude'] == 60.10
+    assert proc.extract_dji_gps_from_exif(tmp_path / 'notes.png') is None
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""Unit tests for zero-copy image staging in the SfM container."""
+
+import errno
+import os
+from pathlib import Path
+
+from infrastructure.containers.sfm import image_staging
+from infrastructure.containers.sfm.image_staging import ImageStager
+
+
+def _write_images(directory, count=3):
+    directory.mkdir(parents=True, exist_ok=True)
+    for i in range(count):
+        (directory / f"DJI_{i:04d}.JPG").write_bytes(b"\xff\xd8" + bytes([i]) * 1024)
+    return directory
+
+
+def test_stage_tree_hardlinks_on_same_filesystem(tmp_path):
+    src = _write_images(tmp_path / "images")
+    stager = ImageStager(mode="link")
+
+    assert stager.stage_tree(src, tmp_path / "opensfm" / "images") == 3
+    assert stager.stage_tree(src, tmp_path / "output" / "images") == 3
+
+    for name in ("DJI_0000.JPG", "DJI_0002.JPG"):
+        staged = tmp_path / "output" / "images" / name
+        assert staged.samefile(src / name)
+        assert os.stat(src / name).st_nlink == 3
+    assert stager.stats["hardlink"] == 6 and stager.stats["copy"] == 0
+
+
+def test_falls_back_to_copy_once_links_fail_for_a_device_pair(tmp_path, monkeypatch):
+    src = _write_images(tmp_path / "images")
+    attempts = []
+
+    def no_link(a, b):
+        attempts.append("hardlink")
+        raise OSError(errno.EXDEV, "cross-device link")
+
+    def no_reflink(a, b):
+        attempts.append("reflink")
+        raise OSError(errno.EOPNOTSUPP, "no reflink")
+
+    monkeypatch.setattr(image_staging.os, "link", no_link)
+    monkeypatch.setattr(image_staging, "_reflink", no_reflink)
+    stager = ImageStager(mode="link")
+
+    stager.stage_tree(src, tmp_path / "dst")
+
+    # Each method is tried once for the device pair, then skipped
+    assert attempts == ["hardlink", "reflink"]
+    assert stager.stats["copy"] == 3
+    staged = tmp_path / "dst" / "DJI_0001.JPG"
+    assert staged.read_bytes() == (src / "DJI_0001.JPG").read_bytes()
+    assert not staged.samefile(src / "DJI_0001.JPG")
+
+
+def test_per_file_link_errors_do_not_disable_linking(tmp_path, monkeypatch):
+    src = _write_images(tmp_path / "images")
+    real_link = os.link
+
+    def link_fails_once(a, b):
+        if Path(a).name == "DJI_0000.JPG":
+            raise OSError(errno.EMLINK, "too many links")
+        real_link(a, b)
+
+    monkeypatch.setattr(image_staging.os, "link", link_fails_once)
+    monkeypatch.setattr(image_staging, "_reflink", lambda a, b: (_ for _ in ()).throw(OSError(errno.EACCES, "denied")))
+    stager = ImageStager(mode="link")
+
+    stager.stage_tree(src, tmp_path / "dst")
+
+    # Only the failing file was copied; the rest of the job keeps hardlinking
+    assert stager.stats["copy"] == 1 and stager.stats["hardlink"] == 2
+    assert (tmp_path / "dst" / "DJI_0002.JPG").samefile(src / "DJI_0002.JPG")
+
+
+def test_dangling_symlink_destination_is_replaced(tmp_path):
+    src = _write_images(tmp_path / "images", count=1)
+    dst = tmp_path / "dst" / "DJI_0000.JPG"
+    dst.parent.mkdir()
+    dst.symlink_to(tmp_path / "missing.JPG")
+
+    assert ImageStager(mode="link").stage(src / "DJI_0000.JPG", dst) == "hardlink"
+    assert dst.samefile(src / "DJI_0000.JPG")
+
+
+def test_copy_mode_and_restaging_replace_existing_files(tmp_path):
+    src = _write_images(tmp_path / "images", count=1)
+    dst = tmp_path / "dst" / "DJI_0000.JPG"
+    dst.parent.mkdir()
+    dst.write_bytes(b"stale")
+
+    assert ImageStager(mode="copy").stage(src / "DJI_0000.JPG", dst) == "copy"
+    assert dst.read_bytes() == (src / "DJI_0000.JPG").read_bytes()
+
+    linker = ImageStager(mode="link")
+    assert linker.stage(src / "DJI_0000.JPG", dst) == "hardlink"
+    # Already the same file: nothing to do
+    assert linker.stage(src / "DJI_0000.JPG", dst) == "hardlink"
+    assert dst.samefile(src / "DJI_0000.JPG")
+    assert "2 hardlink" in linker.summary()
+
+
+def test_extract_image_archive_streams_images_in_parallel(tmp_path):
+    import zipfile
+
+    payloads = {f"DJI_{i:04d}.JPG": os.urandom(50_000 + i) for i in range(12)}
+    archive = tmp_path / "upload.zip"
+    with zipfile.ZipFile(archive, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for i, (name, data) in enumerate(payloads.items()):
+            zf.writestr(f"battery{i % 2}/{name}", data)
+        zf.writestr("__MACOSX/battery0/._DJI_0000.JPG", b"resource fork")
+        zf.writestr("flight.csv", b"latitude,longitude\n")
+        zf.writestr("battery0/", b"")
+        zf.writestr("old/DJI_0003.JPG", b"superseded")  # Later duplicate name wins, as before
+        payloads["DJI_0003.JPG"] = b"superseded"
+
+    landed = []
+    extracted = image_staging.extract_image_archive(
+        archive, tmp_path / "images", max_workers=4, on_image=landed.append, chunk_bytes=4096
+    )
+
+    assert sorted(p.name for p in extracted) == sorted(payloads)
+    assert sorted(landed) == sorted(extracted)
+    assert sorted(p.name for p in (tmp_path / "images").iterdir()) == sorted(payloads)
+    for name, data in payloads.items():
+        assert (tmp_path / "images" / name).read_bytes() == data
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""Unit tests for OpenSfM stage execution in the SfM pipeline (no OpenSfM needed)."""
+
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+SFM_DIR = Path(__file__).resolve().parents[2] / "infrastructure" / "containers" / "sfm"
+if str(SFM_DIR) not in sys.path:
+    sys.path.insert(0, str(SFM_DIR))
+
+import run_opensfm_gps  # noqa: E402
+from stage_runner import OPENSFM_STAGES  # noqa: E402
+
+MATCH_STAGE = next(stage for stage in OPENSFM_STAGES if stage.name == "match_features")
+
+
+@pytest.fixture
+def pipeline(tmp_path, monkeypatch):
+    monkeypatch.delenv("SFM_TWO_TIER_MATCHING", raising=False)
+    pipeline = run_opensfm_gps.OpenSfMGPSPipeline(tmp_path / "input", tmp_path / "output")
+    pipeline.opensfm_dir = tmp_path / "opensfm"
+    return pipeline
+
+
+def _run_match(pipeline, two_tier_seconds):
+    """Two-tier matching fails after `two_tier_seconds`; returns (stage result, stream calls)"""
+    clock = {"now": 1000.0}
+    calls = []
+
+    def fake_stream(argv, cmd, max_seconds):
+        calls.append((argv[0], max_seconds))
+        if len(calls) == 1:
+            clock["now"] += two_tier_seconds
+            return 1
+        return 0
+
+    with patch.object(pipeline, "_stream_command", side_effect=fake_stream), \
+            patch.object(run_opensfm_gps.time, "time", side_effect=lambda: clock["now"]), \
+            patch.object(run_opensfm_gps, "log_memory_usage"):
+        return pipeline._run_opensfm_stage(MATCH_STAGE), calls
+
+
+def test_match_fallback_gets_only_the_remaining_time_budget(pipeline):
+    ok, calls = _run_match(pipeline, two_tier_seconds=1000)
+
+    assert ok
+    assert calls == [(sys.executable, 2400), ("opensfm", 1400)]
+
+
+def test_match_fallback_skipped_when_budget_is_nearly_spent(pipeline):
+    ok, calls = _run_match(pipeline, two_tier_seconds=2400 - pipeline.MIN_MATCH_FALLBACK_SECONDS + 1)
+
+    assert not ok
+    assert len(calls) == 1
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""Unit tests for the parse-once OpenSfM reconstruction model and its COLMAP consumer."""
+
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+SFM_DIR = Path(__file__).resolve().parents[2] / "infrastructure" / "containers" / "sfm"
+if str(SFM_DIR) not in sys.path:
+    sys.path.insert(0, str(SFM_DIR))
+
+from colmap_binary import IMAGE_HEADER_DTYPE, POINT2D_DTYPE  # noqa: E402
+from colmap_converter import OpenSfMToCOLMAPConverter  # noqa: E402
+from reconstruction_model import ReconstructionModel, TrackTable  # noqa: E402
+
+CAMERAS = {"dji": {"projection_type": "perspective", "width": 4000, "height": 3000,
+                   "focal": 0.7, "k1": -0.01, "k2": 0.002}}
+
+
+def _write_reconstruction(opensfm_dir: Path) -> Path:
+    (opensfm_dir / "images").mkdir(parents=True)
+    for name in ("A.JPG", "B.JPG"):
+        (opensfm_dir / "images" / name).write_bytes(b"\xff\xd8")
+    large = {
+        "cameras": CAMERAS,
+        "shots": {
+            "A.JPG": {"rotation": [0.0, 0.0, 0.0], "translation": [1.0, 2.0, 3.0], "camera": "dji"},
+            "B.JPG": {"rotation": [0.1, -0.2, 0.3], "translation": [0.0, 0.0, 1.0], "camera": "dji"},
+        },
+        "points": {
+            "7": {"coordinates": [1.0, 2.0, 3.0], "color": [254.9, 10.0, 0.0],
+                  "observations": {"A.JPG": [0.1, 0.2], "GONE.JPG": [0.3, 0.4]}},
+            "9": {"coordinates": [-1.0, 0.5, 2.0], "color": [1, 2, 3],
+                  "observations": {"B.JPG": [-0.1, 0.05], "A.JPG": [0.2, 0.1]}},
+            "11": {"coordinates": [0.0, 0.0, 9.0], "color": [9, 9, 9]},
+        },
+    }
+    small = {"cameras": CAMERAS, "shots": {"B.JPG": large["shots"]["B.JPG"]},
+             "points": {"1": {"coordinates": [0, 0, 0], "color": [0, 0, 0]}}}
+    path = opensfm_dir / "reconstruction.json"
+    path.write_text(json.dumps([large, small]))
+    return path
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_model_columnarizes_shots_points_and_observations(tmp_path, stream):
+    if stream:
+        pytest.importorskip("ijson")
+    model = ReconstructionModel.load(_write_reconstruction(tmp_path / "opensfm"), stream=stream)
+
+    assert len(model) == 2
+    recon = model.first
+    assert model.largest is recon
+    assert recon.registered_shots == ["A.JPG", "B.JPG"]
+    assert recon.shot_cameras == ["dji", "dji"]
+    np.testing.assert_allclose(recon.shot_rotations[1], [0.1, -0.2, 0.3])
+    assert recon.point_ids == ["7", "9", "11"]
+    assert recon.point_coordinates.shape == (3, 3)
+    assert recon.point_colors.dtype == np.uint8
+    assert recon.point_colors[0].tolist() == [254, 10, 0]
+
+    # Observations: point-major order, unregistered shots kept after the registered ones
+    assert recon.observation_points.tolist() == [0, 0, 1, 1]
+    assert [recon.shot_names[s] for s in recon.observation_shots] == ["A.JPG", "GONE.JPG", "B.JPG", "A.JPG"]
+    assert recon.shot_index("GONE.JPG") == -1
+    np.testing.assert_allclose(recon.observation_xy[2], [-0.1, 0.05])
+
+
+def test_converter_uses_handed_over_model_without_reparsing(tmp_path):
+    opensfm_dir = tmp_path / "opensfm"
+    model = ReconstructionModel.load(_write_reconstruction(opensfm_dir))
+    (opensfm_dir / "reconstruction.json").unlink()  # Conversion must not need the file again
+
+    results = OpenSfMToCOLMAPConverter(opensfm_dir, tmp_path / "out", model=model).convert()
+
+    assert results["image_count"] == 2
+    assert results["point_count"] == 3
+    assert results["total_correspondences"] == 3
+    points = (tmp_path / "out" / "sparse" / "0" / "points3D.txt").read_text().splitlines()
+    assert points[3].split()[4:7] == ["254", "10", "0"]
+
+
+def test_track_table_indexes_observations_by_image_and_by_point(tmp_path):
+    recon = ReconstructionModel.load(_write_reconstruction(tmp_path / "opensfm"), stream=False).first
+    table = TrackTable.from_reconstruction(recon)
+
+    # GONE.JPG is not registered, so its observation is dropped; rows are grouped by shot
+    assert table.shot_index.tolist() == [0, 0, 1]
+    assert table.shot_offsets.tolist() == [0, 2, 3]
+    assert table.point2d_idx.tolist() == [0, 1, 0]
+    assert [recon.point_ids[p] for p in table.point_index] == ["7", "9", "9"]
+    assert table.track_lengths.tolist() == [1, 2, 0]
+
+    # Every track entry points back at a 2D point observing that same 3D point
+    shots, point2d_idx = table.point_tracks()
+    for p in range(recon.num_points):
+        for k in range(table.point_offsets[p], table.point_offsets[p + 1]):
+            row = table.shot_offsets[shots[k]] + point2d_idx[k]
+            assert table.point_index[row] == p
+
+
+def test_track_table_from_tracks_file_keeps_feature_ids(tmp_path):
+    recon = ReconstructionModel.load(_write_reconstruction(tmp_path / "opensfm"), stream=False).first
+    tracks = {
+        "9": [{"shot_id": "B.JPG", "feature": [0.5, 0.25], "feature_id": 42},
+              {"shot_id": "A.JPG", "feature": [0.1, 0.2], "feature_id": 7}],
+        "404": [{"shot_id": "A.JPG", "feature": [0.0, 0.0]}],  # No reconstructed point
+        "7": [{"shot_id": "A.JPG", "feature": [0.3]}],  # Malformed feature
+    }
+    table = TrackTable.from_tracks(tracks, recon)
+
+    assert table.shot_index.tolist() == [0, 1]
+    assert table.feature_index.tolist() == [7, 42]
+    np.testing.assert_allclose(table.xy, [[0.1, 0.2], [0.5, 0.25]])
+    assert table.track_lengths.tolist() == [0, 2, 0]
+
+
+TRACKS_CSV = (
+    "OPENSFM_TRACKS_VERSION_v2\n"
+    "B.JPG\t9\t42\t0.5\t0.25\t0.01\t1\t2\t3\n"
+    "A.JPG\t9\t7\t0.1\t0.2\t0.01\t1\t2\t3\n"
+    "A.JPG\t404\t8\t0.0\t0.0\t0.01\t0\t0\t0\n"  # Track without a reconstructed point
+    "GONE.JPG\t7\t3\t0.3\t0.4\t0.01\t0\t0\t0\n"  # Unregistered shot
+    "A.JPG\t7\t11\t0.6\t0.7\t0.01\t254\t10\t0\n"
+)
+
+
+def test_track_table_from_tracks_csv_keeps_reconstructed_observations(tmp_path):
+    recon = ReconstructionModel.load(_write_reconstruction(tmp_path / "opensfm"), stream=False).first
+    (tmp_path / "tracks.csv").write_text(TRACKS_CSV)
+    table = TrackTable.from_tracks_csv(tmp_path / "tracks.csv", recon)
+
+    assert table.shot_index.tolist() == [0, 0, 1]
+    assert table.feature_index.tolist() == [7, 11, 42]
+    assert [recon.point_ids[p] for p in table.point_index] == ["9", "7", "9"]
+    np.testing.assert_allclose(table.xy, [[0.1, 0.2], [0.6, 0.7], [0.5, 0.25]])
+    assert table.track_lengths.tolist() == [1, 2, 0]
+
+
+def test_converter_prefers_tracks_csv_over_point_observations(tmp_path):
+    opensfm_dir = tmp_path / "opensfm"
+    _write_reconstruction(opensfm_dir)
+    (opensfm_dir / "tracks.csv").write_text(TRACKS_CSV)
+    converter = OpenSfMToCOLMAPConverter(opensfm_dir, tmp_path / "out")
+    assert converter.load_opensfm_data()
+
+    assert converter.track_table.feature_index.tolist() == [7, 11, 42]
+
+
+def test_converter_writes_points2d_in_pixels(tmp_path):
+    opensfm_dir = tmp_path / "opensfm"
+    _write_reconstruction(opensfm_dir)
+    (opensfm_dir / "tracks.csv").write_text(TRACKS_CSV)
+    OpenSfMToCOLMAPConverter(opensfm_dir, tmp_path / "out", output_format="both").convert()
+    sparse = tmp_path / "out" / "sparse" / "0"
+
+    # 4000x3000 camera: x * 4000 + 2000, y * 4000 + 1500
+    expected = {"A.JPG": [[2400.0, 2300.0], [4400.0, 4300.0]], "B.JPG": [[4000.0, 2500.0]]}
+    image_lines = [line.rstrip("\n") for line in open(sparse / "images.txt") if not line.startswith("#")]
+    for header, points in zip(image_lines[::2], image_lines[1::2]):
+        values = [float(v) for v in points.split()]
+        np.testing.assert_allclose(list(zip(values[0::3], values[1::3])), expected[header.split()[-1]])
+
+    with open(sparse / "images.bin", "rb") as f:
+        f.seek(8 + IMAGE_HEADER_DTYPE.itemsize)
+        assert f.read(6) == b"A.JPG\x00"
+        count = int(np.frombuffer(f.read(8), dtype="<u8")[0])
+        points2d = np.frombuffer(f.read(count * POINT2D_DTYPE.itemsize), dtype=POINT2D_DTYPE)
+    np.testing.assert_allclose(points2d["xy"], expected["A.JPG"])
+
+
+def test_converter_tracks_reference_their_image_points(tmp_path):
+    opensfm_dir = tmp_path / "opensfm"
+    _write_reconstruction(opensfm_dir)
+    OpenSfMToCOLMAPConverter(opensfm_dir, tmp_path / "out", output_format="text").convert()
+    sparse = tmp_path / "out" / "sparse" / "0"
+
+    image_lines = [line.rstrip("\n") for line in open(sparse / "images.txt") if not line.startswith("#")]
+    points2d = {int(header.split()[0]): [int(v) for v in points.split()[2::3]]
+                for header, points in zip(image_lines[::2], image_lines[1::2])}
+    point_lines = [line.split() for line in open(sparse / "points3D.txt") if not line.startswith("#")]
+
+    assert [int(fields[0]) for fields in point_lines] == [1, 2, 3]
+    for fields in point_lines:
+        track = [int(v) for v in fields[8:]]
+        for image_id, point2d_idx in zip(track[::2], track[1::2]):
+            assert points2d[image_id][point2d_idx] == int(fields[0])
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""Unit tests for the checkpointed, resumable OpenSfM stage runner."""
+
+import json
+
+from infrastructure.containers.sfm import stage_runner
+from infrastructure.containers.sfm.stage_runner import MANIFEST_NAME, OPENSFM_STAGES, StageRunner
+
+
+def _make_dataset(dataset_dir, config="processes: 4\n"):
+    (dataset_dir / "images").mkdir(parents=True)
+    for i in range(3):
+        (dataset_dir / "images" / f"DJI_{i:04d}.JPG").write_bytes(b"\xff\xd8" + bytes([i]) * 2048)
+    (dataset_dir / "config.yaml").write_text(config)
+    return dataset_dir
+
+
+class FakeOpenSfM:
+    """Writes each stage's declared outputs; optionally fails at one stage"""
+
+    def __init__(self, dataset_dir, fail_at=None):
+        self.dataset_dir = dataset_dir
+        self.fail_at = fail_at
+        self.calls = []
+
+    def __call__(self, stage):
+        self.calls.append(stage.name)
+        if stage.name == self.fail_at:
+            return False
+        for rel in stage.outputs:
+            target = self.dataset_dir / rel
+            if "." in rel:
+                target.write_text(f"{stage.name} output")
+            else:
+                target.mkdir(exist_ok=True)
+                (target / "part.bin").write_bytes(stage.name.encode())
+        return True
+
+
+ALL_STAGES = [stage.name for stage in OPENSFM_STAGES]
+
+
+def test_restart_after_interruption_resumes_at_failed_stage(tmp_path, monkeypatch):
+    monkeypatch.delenv("SFM_RESUME", raising=False)
+    checkpoint = tmp_path / "checkpoint"
+    first = _make_dataset(tmp_path / "run1")
+    interrupted = FakeOpenSfM(first, fail_at="reconstruct")
+    assert not StageRunner(first, checkpoint_dir=checkpoint).run(interrupted)
+
+    manifest = json.loads((checkpoint / MANIFEST_NAME).read_text())
+    assert list(manifest["stages"]) == ["extract_metadata", "detect_features", "match_features", "create_tracks"]
+    assert (checkpoint / "matches" / "part.bin").exists()
+
+    # A fresh workspace (new container) with the same upload and config
+    second = _make_dataset(tmp_path / "run2")
+    resumed = FakeOpenSfM(second)
+    runner = StageRunner(second, checkpoint_dir=checkpoint)
+    assert runner.run(resumed)
+
+    assert resumed.calls == ["reconstruct", "export_colmap"]
+    assert runner.skipped == ["extract_metadata", "detect_features", "match_features", "create_tracks"]
+    assert (second / "features" / "part.bin").read_bytes() == b"detect_features"  # Restored from checkpoint
+    assert list(json.loads((second / MANIFEST_NAME).read_text())["stages"]) == ALL_STAGES
+
+
+def test_changed_inputs_rerun_from_the_first_affected_stage(tmp_path, monkeypatch):
+    monkeypatch.delenv("SFM_RESUME", raising=False)
+    monkeypatch.delenv("SFM_COARSE_FEATURES", raising=False)
+    dataset = _make_dataset(tmp_path / "opensfm")
+    assert StageRunner(dataset).run(FakeOpenSfM(dataset))
+
+    unchanged = FakeOpenSfM(dataset)
+    assert StageRunner(dataset).run(unchanged)
+    assert unchanged.calls == []
+
+    monkeypatch.setenv("SFM_COARSE_FEATURES", "1024")
+    retuned = FakeOpenSfM(dataset)
+    assert StageRunner(dataset).run(retuned)
+    assert retuned.calls == ["match_features", "create_tracks", "reconstruct", "export_colmap"]
+
+    (dataset / "images" / "DJI_0001.JPG").write_bytes(b"\xff\xd8" + b"\x09" * 2048)
+    new_images = FakeOpenSfM(dataset)
+    assert StageRunner(dataset).run(new_images)
+    assert new_images.calls == ALL_STAGES
+
+
+def test_missing_outputs_or_disabled_resume_run_stages_again(tmp_path, monkeypatch):
+    monkeypatch.delenv("SFM_RESUME", raising=False)
+    dataset = _make_dataset(tmp_path / "opensfm")
+    assert StageRunner(dataset).run(FakeOpenSfM(dataset))
+
+    # No checkpoint to restore tracks.csv from, so create_tracks and everything after it reruns
+    (dataset / "tracks.csv").unlink()
+    rerun = FakeOpenSfM(dataset)
+    assert StageRunner(dataset).run(rerun)
+    assert rerun.calls == ["create_tracks", "reconstruct", "export_colmap"]
+
+    monkeypatch.setenv("SFM_RESUME", "0")
+    forced = FakeOpenSfM(dataset)
+    assert StageRunner(dataset).run(forced)
+    assert forced.calls == ALL_STAGES
+
+
+def test_new_job_resumes_from_mounted_checkpoint_of_earlier_job(tmp_path, monkeypatch):
+    for var in ("SFM_RESUME", "SFM_CHECKPOINT_DIR", "SFM_CHECKPOINT_RESTORE_DIR"):
+        monkeypatch.delenv(var, raising=False)
+    # The processing job mounts the checkpoint output; no restore input exists yet
+    monkeypatch.setattr(stage_runner, "DEFAULT_CHECKPOINT_DIR", tmp_path / "job1" / "checkpoint")
+    monkeypatch.setattr(stage_runner, "DEFAULT_RESTORE_DIR", tmp_path / "job1" / "checkpoint_restore")
+    (tmp_path / "job1" / "checkpoint").mkdir(parents=True)
+    first = _make_dataset(tmp_path / "job1" / "opensfm")
+    runner = StageRunner(first)
+    assert runner.restore_dir is None
+    assert not runner.run(FakeOpenSfM(first, fail_at="reconstruct"))
+
+    # The restarted job gets the uploaded prefix back as a read-only input
+    monkeypatch.setattr(stage_runner, "DEFAULT_CHECKPOINT_DIR", tmp_path / "job2" / "checkpoint")
+    monkeypatch.setattr(stage_runner, "DEFAULT_RESTORE_DIR", tmp_path / "job1" / "checkpoint")
+    (tmp_path / "job2" / "checkpoint").mkdir(parents=True)
+    second = _make_dataset(tmp_path / "job2" / "opensfm")
+    resumed = FakeOpenSfM(second)
+    runner = StageRunner(second)
+    assert runner.run(resumed)
+
+    assert resumed.calls == ["reconstruct", "export_colmap"]
+    assert (second / "matches" / "part.bin").read_bytes() == b"match_features"
+    manifest = json.loads((tmp_path / "job2" / "checkpoint" / MANIFEST_NAME).read_text())
+    assert list(manifest["stages"]) == ALL_STAGES
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""Unit tests for the coarse tier of two-tier SfM feature matching."""
+
+import numpy as np
+import pytest
+
+from infrastructure.containers.sfm.two_tier_matching import (
+    CoarseResult,
+    coarse_pair_check,
+    rescue_isolated_images,
+    select_strongest,
+)
+
+cv2 = pytest.importorskip("cv2")
+
+
+def _project(points_3d, rotation, translation):
+    cam = points_3d @ rotation.T + translation
+    return cam[:, :2] / cam[:, 2:3] * 0.5  # Normalized image coordinates
+
+
+def _overlapping_views(rng, count=300):
+    points_3d = np.column_stack([rng.uniform(-4, 4, count), rng.uniform(-3, 3, count), rng.uniform(8, 14, count)])
+    angle = np.radians(6)
+    rotation = np.array([[np.cos(angle), 0, np.sin(angle)], [0, 1, 0], [-np.sin(angle), 0, np.cos(angle)]])
+    descriptors = rng.normal(size=(count, 128)).astype(np.float32)
+    sizes = rng.uniform(1, 10, count)
+    view1 = np.column_stack([_project(points_3d, np.eye(3), np.zeros(3)), sizes, np.zeros(count)])
+    view2 = np.column_stack([_project(points_3d, rotation, np.array([-1.0, 0.1, 0.0])), sizes, np.zeros(count)])
+    noisy = descriptors + rng.normal(scale=0.05, size=descriptors.shape).astype(np.float32)
+    return (view1, descriptors), (view2, noisy)
+
+
+def test_select_strongest_keeps_largest_scale_features():
+    points = np.array([[0.1, 0.1, 2.0, 0], [0.2, 0.2, 9.0, 0], [0.3, 0.3, 5.0, 0]])
+    descriptors = np.eye(3, dtype=np.float32)
+
+    coarse = select_strongest(points, descriptors, 2)
+
+    np.testing.assert_allclose(coarse.points, [[0.2, 0.2], [0.3, 0.3]], rtol=1e-6)
+    assert coarse.descriptors.tolist() == [[0, 1, 0], [0, 0, 1]]
+
+
+def test_overlapping_views_pass_coarse_check():
+    rng = np.random.default_rng(7)
+    (p1, d1), (p2, d2) = _overlapping_views(rng)
+
+    passed, ratio_matches, inliers = coarse_pair_check(
+        select_strongest(p1, d1, 128), select_strongest(p2, d2, 128), min_inliers=15
+    )
+
+    assert passed
+    assert inliers >= 15 and ratio_matches >= inliers
+
+
+def test_unrelated_views_are_rejected():
+    rng = np.random.default_rng(11)
+    (p1, d1), _ = _overlapping_views(rng)
+    (p2, d2), _ = _overlapping_views(rng)
+
+    passed, _, inliers = coarse_pair_check(
+        select_strongest(p1, d1, 128), select_strongest(p2, d2, 128), min_inliers=15
+    )
+
+    assert not passed
+    assert inliers < 15
+
+
+def test_isolated_images_keep_their_best_pairs():
+    results = [
+        CoarseResult(("a", "b"), True, 80, 60),
+        CoarseResult(("a", "c"), False, 10, 9),
+        CoarseResult(("c", "d"), False, 6, 3),
+        CoarseResult(("b", "d"), True, 70, 40),
+    ]
+
+    restored = rescue_isolated_images(results, min_pairs=1)
+
+    assert restored == 1
+    assert [r.pair for r in results if r.passed] == [("a", "b"), ("a", "c"), ("b", "d")]
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""Unit tests for loss-weighted training view sampling (CPU only)."""
+
+import importlib.util
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+MODULE_PATH = (
+    Path(__file__).resolve().parents[2]
+    / "infrastructure"
+    / "containers"
+    / "3dgs"
+    / "utils"
+    / "view_sampler.py"
+)
+SPEC = importlib.util.spec_from_file_location("gsplat_view_sampler", MODULE_PATH)
+view_sampler = importlib.util.module_from_spec(SPEC)
+SPEC.loader.exec_module(view_sampler)
+LossWeightedViewSampler = view_sampler.LossWeightedViewSampler
+
+
+def test_starts_uniform_and_explores_unseen_views():
+    sampler = LossWeightedViewSampler([3, 7, 9, 11], seed=0)
+    np.testing.assert_allclose(sampler.probabilities(), 0.25)
+
+    sampler.update(3, 0.01)
+    sampler.update(7, 0.04)
+
+    p = sampler.probabilities()
+    # Unseen views (9, 11) borrow the largest estimate, so they rank with the hardest seen view
+    assert p[1] == pytest.approx(p[2]) == pytest.approx(p[3])
+    assert p[0] < p[1]
+
+
+def test_probabilities_follow_tempered_loss_with_floor():
+    sampler = LossWeightedViewSampler([0, 1], exponent=0.5, uniform_floor=0.2, seed=0)
+    sampler.update(0, 0.01)
+    sampler.update(1, 0.09)
+
+    # sqrt weights 0.1 : 0.3 -> 0.25 / 0.75, mixed 80/20 with uniform 0.5
+    np.testing.assert_allclose(sampler.probabilities(), [0.8 * 0.25 + 0.1, 0.8 * 0.75 + 0.1])
+
+
+def test_hard_views_get_more_steps_but_every_view_keeps_a_floor():
+    losses = {view: (0.2 if view == 5 else 0.02) for view in range(10)}
+    sampler = LossWeightedViewSampler(list(losses), exponent=1.0, uniform_floor=0.1, seed=1)
+
+    for _ in range(3000):
+        view = sampler.sample()
+        sampler.update(view, losses[view])
+
+    counts = sampler.sample_counts
+    assert counts[5] > 3 * np.median(counts)
+    assert counts.min() >= 0.5 * 3000 * 0.1 / 10
+
+
+def test_same_seed_gives_same_view_sequence():
+    def run(seed):
+        sampler = LossWeightedViewSampler(list(range(20)), seed=seed)
+        views = []
+        for step in range(200):
+            view = sampler.sample()
+            sampler.update(view, 0.01 + (view % 4) * 0.02 + step * 1e-5)
+            views.append(view)
+        return views
+
+    assert run(7) == run(7)
+    assert run(7) != run(8)
+
+
+def test_snapshot_reports_distribution_history():
+    sampler = LossWeightedViewSampler([0, 1, 2], seed=0)
+    assert sampler.snapshot(0)['effective_views'] == pytest.approx(3.0)
+
+    sampler.update(2, 1.0)
+    sampler.update(0, 0.001)
+    sampler.update(1, 0.001)
+    snapshot = sampler.snapshot(100)
+
+    assert snapshot['top_views'][0]['view'] == 2
+    assert snapshot['effective_views'] < 3.0
+    assert [s['iteration'] for s in sampler.summary()['history']] == [0, 100]
+
+
+def test_non_finite_losses_are_ignored():
+    sampler = LossWeightedViewSampler([0, 1], seed=0)
+    sampler.update(0, float('nan'))
+    assert not sampler.observed.any()
+    np.testing.assert_allclose(sampler.probabilities(), 0.5)